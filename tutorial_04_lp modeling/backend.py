@@ -0,0 +1,329 @@
+"""
+Solver backends that solve a production planning instance with Gurobi or with HiGHS.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+import constant
+
+
+@dataclass
+class SolveResult:
+    """
+    The outcome of solving an instance with a backend.
+
+    Attributes
+    ----------
+    backend : str
+        The backend name
+    status : str
+        `OPTIMAL`, `INFEASIBLE`, `UNBOUNDED` or another backend-specific status
+    objVal : float or None
+        The optimal objective function value (None if not optimal)
+    x : numpy.ndarray or None
+        The optimal batches produced, in the product order of the instance
+    duals : numpy.ndarray or None
+        The optimal dual variable values of the plant constraints, in the plant order of the instance
+    buildTime : float
+        The time spent building the solver model, in seconds (0 for a backend that builds and
+        solves in one call, see `SolverBackend.timesBuild`)
+    solveTime : float
+        The time spent solving, in seconds
+    """
+
+    backend: str
+    status: str
+    objVal: float = None
+    x: np.ndarray = None
+    duals: np.ndarray = None
+    buildTime: float = 0.0
+    solveTime: float = 0.0
+
+    def solution(self, instance) -> dict[str, float]:
+        """
+        Return the solution as a dict keyed by product name, as `getOptimalSolution` does.
+
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance that was solved
+
+        Returns
+        -------
+        soln : dict
+            - Keys: product names
+            - Values: optimal decision variable values
+        """
+        if self.x is None:
+            return {}
+        return dict(zip(instance.productNames, self.x.tolist()))
+
+
+_GUROBI_STATUS_NAMES = {}
+
+
+def gurobiStatusName(status) -> str:
+    """
+    Return the name of a Gurobi status code, e.g. `OPTIMAL` for `GRB.OPTIMAL`, as used in
+    `SolveResult.status`. `gurobipy` is imported on first use.
+
+    Parameters
+    ----------
+    status : int
+        The Gurobi status code, `model.Status`
+
+    Returns
+    -------
+    name : str
+        The status name, or the code as a string if it is unknown
+    """
+    if not _GUROBI_STATUS_NAMES:
+        import gurobipy as grb
+
+        _GUROBI_STATUS_NAMES.update({getattr(grb.GRB.Status, name): name
+                                     for name in dir(grb.GRB.Status) if name.isupper()})
+
+    return _GUROBI_STATUS_NAMES.get(status, str(status))
+
+
+class SolverBackend:
+    """
+    The interface every backend implements: solve a `ProductionInstance` and return a `SolveResult`.
+
+    Attributes
+    ----------
+    name : str
+        The backend name
+    timesBuild : bool
+        Whether the model build is timed separately; if False, `SolveResult.solveTime` is the
+        end-to-end time and `SolveResult.buildTime` is 0
+    """
+
+    name = None
+    timesBuild = True
+
+    def solve(self, instance) -> SolveResult:
+        """
+        Build and solve the LP of the given instance.
+
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance data
+
+        Returns
+        -------
+        result : SolveResult
+            The solution, duals and timings
+        """
+        raise NotImplementedError
+
+
+class GurobiBackend(SolverBackend):
+    """
+    Solve with Gurobi through the matrix model builder. `gurobipy` is imported on first use.
+    """
+
+    name = "gurobi"
+
+    def __init__(self, env=None):
+        """
+        Parameters
+        ----------
+        env : gurobipy.Env, optional
+            The Gurobi environment to create the models in (default: the shared environment, `environment.getEnv()`)
+        """
+        self.env = env
+
+    def solve(self, instance) -> SolveResult:
+        model, buildTime = self.build(instance)
+        try:
+            return self.optimize(model, buildTime)
+        finally:
+            model.dispose()
+
+    def build(self, instance) -> tuple:
+        """
+        Build the Gurobi model of an instance, without solving it.
+
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance data
+
+        Returns
+        -------
+        model : gurobipy.Model
+            The model; the caller disposes of it
+        buildTime : float
+            The time spent building it, in seconds
+        """
+        from model import formulateModel
+
+        startTime = time.perf_counter()
+        model = formulateModel(instance, env=self.env)
+        model.update()
+
+        return model, time.perf_counter() - startTime
+
+    def optimize(self, model, buildTime=0.0, callback=None) -> SolveResult:
+        """
+        Solve a model returned by `build` and collect its result; the model is not disposed.
+
+        Parameters
+        ----------
+        model : gurobipy.Model
+            The model
+        buildTime : float, optional
+            The build time to report
+        callback : callable, optional
+            A Gurobi callback, passed to `model.optimize`
+
+        Returns
+        -------
+        result : SolveResult
+            The solution, duals and timings
+        """
+        import gurobipy as grb
+
+        startTime = time.perf_counter()
+        model.optimize(callback)
+        solveTime = time.perf_counter() - startTime
+
+        result = SolveResult(self.name, gurobiStatusName(model.Status), buildTime=buildTime, solveTime=solveTime)
+        if model.Status == grb.GRB.OPTIMAL:
+            result.objVal = model.ObjVal
+            result.x = np.asarray(model.getAttr("X", model.getVars()))
+            result.duals = np.asarray(model.getAttr("Pi", model.getConstrs()))
+
+        return result
+
+
+class HighsBackend(SolverBackend):
+    """
+    Solve with the open-source HiGHS solver through `scipy.optimize.linprog`; no license needed.
+
+    `linprog` converts the data into a HiGHS model and solves it in one call, so only the
+    end-to-end time is reported, as `solveTime`.
+    """
+
+    name = "highs"
+    timesBuild = False
+
+    _STATUS = {0: "OPTIMAL", 1: "ITERATION_LIMIT", 2: "INFEASIBLE", 3: "UNBOUNDED", 4: "NUMERIC"}
+
+    def __init__(self, method="highs"):
+        """
+        Parameters
+        ----------
+        method : str, optional
+            The `linprog` method: `highs` (automatic), `highs-ds` (dual simplex) or `highs-ipm`
+        """
+        self.method = method
+
+    def solve(self, instance) -> SolveResult:
+        from scipy.optimize import linprog
+
+        # linprog rejects an empty objective; with no products the plan is empty and no hours are used.
+        if instance.numProducts == 0:
+            if (instance.plantAvailableHours < 0).any():
+                return SolveResult(self.name, "INFEASIBLE")
+            return SolveResult(self.name, "OPTIMAL", objVal=0.0, x=np.zeros(0), duals=np.zeros(instance.numPlants))
+
+        # linprog minimizes, so the profits are negated.
+        startTime = time.perf_counter()
+        res = linprog(-instance.productProfits,
+                      A_ub=instance.plantProductHours,
+                      b_ub=instance.plantAvailableHours,
+                      bounds=np.column_stack([np.zeros(instance.numProducts), instance.productUpperBounds]),
+                      method=self.method)
+        solveTime = time.perf_counter() - startTime
+
+        result = SolveResult(self.name, self._STATUS.get(res.status, str(res.status)), solveTime=solveTime)
+        if res.status == 0:
+            result.objVal = -res.fun
+            result.x = res.x
+            result.duals = -res.ineqlin.marginals
+
+        return result
+
+
+class ColumnGenerationBackend(SolverBackend):
+    """
+    Solve with Gurobi by column generation (see `colgen.solveColumnGeneration`), which only builds
+    variables for the products that can enter the optimum. `gurobipy` is imported on first use.
+    """
+
+    name = "colgen"
+
+    def __init__(self, env=None, **options):
+        """
+        Parameters
+        ----------
+        env : gurobipy.Env, optional
+            The Gurobi environment to create the master in (default: the shared environment)
+        **options
+            Passed to `solveColumnGeneration`, e.g. `initialColumns` or `maxColumnsPerRound`
+        """
+        self.env = env
+        self.options = options
+        self.history = []
+
+    def solve(self, instance) -> SolveResult:
+        from colgen import solveColumnGeneration
+
+        result, self.history = solveColumnGeneration(instance, env=self.env, **self.options)
+        return result
+
+
+BACKENDS = {GurobiBackend.name: GurobiBackend, HighsBackend.name: HighsBackend,
+            ColumnGenerationBackend.name: ColumnGenerationBackend}
+
+
+def getBackend(name, **kwargs) -> SolverBackend:
+    """
+    Create a backend by name.
+
+    Parameters
+    ----------
+    name : str
+        `gurobi`, `highs` or `colgen`
+    **kwargs
+        Passed to the backend constructor
+
+    Returns
+    -------
+    backend : SolverBackend
+        The backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend {name!r}, expected one of {sorted(BACKENDS)}")
+
+    return BACKENDS[name](**kwargs)
+
+
+def selectBackend(instance, maxHighsNonzeros=constant.HIGHS_MAX_NONZEROS) -> SolverBackend:
+    """
+    Route small or routine instances to HiGHS and keep Gurobi for the big runs.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance to solve
+    maxHighsNonzeros : int, optional
+        The largest number of nonzeros in the hours matrix sent to HiGHS
+        (default: `constant.HIGHS_MAX_NONZEROS`)
+
+    Returns
+    -------
+    backend : SolverBackend
+        A `HighsBackend` or a `GurobiBackend`
+    """
+    if instance.plantProductHours.nnz <= maxHighsNonzeros:
+        return HighsBackend()
+
+    return GurobiBackend()
+
@@ -0,0 +1,228 @@
+"""
+Solve many workbooks or what-if scenarios in parallel across a process pool.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+
+import gurobipy as grb
+import pandas as pd
+
+import constant
+from backend import gurobiStatusName
+from cache import readDataCached
+from environment import configureEnv, disposeEnv, getEnv
+from io_utils import atomicWrite
+from model import formulateModel
+from result_store import ResultStore, recordFromBatchResult
+
+
+def loadScenarios(path) -> list[dict]:
+    """
+    Load the scenarios to solve from a directory of workbooks or from a JSON manifest.
+
+    A manifest is a list of scenarios such as::
+
+        [{"name": "base", "workbook": "data/wyndor.xlsx"},
+         {"name": "plant 3 +10h", "workbook": "data/wyndor.xlsx", "plantAvailableHours": {"Plant 3": 28}},
+         {"name": "windows 6000", "workbook": "data/wyndor.xlsx", "productProfits": {"Windows": 6000}}]
+
+    Relative workbook paths are resolved against the manifest's directory.
+
+    Parameters
+    ----------
+    path : str
+        A directory (every `.xlsx` file in it is one scenario) or a `.json` manifest
+
+    Returns
+    -------
+    scenarios : list of dict
+        - name: the scenario name
+        - workbook: the path to the Excel file
+        - productProfits (optional): dict of profit overrides
+        - plantAvailableHours (optional): dict of available hours overrides
+    """
+    if os.path.isdir(path):
+        fileNames = sorted(fileName for fileName in os.listdir(path)
+                           if fileName.endswith(".xlsx") and not fileName.startswith("~$"))
+        return [{"name": os.path.splitext(fileName)[0], "workbook": os.path.join(path, fileName)}
+                for fileName in fileNames]
+
+    with open(path) as file:
+        scenarios = json.load(file)
+
+    baseDir = os.path.dirname(os.path.abspath(path))
+    for i, scenario in enumerate(scenarios):
+        scenario.setdefault("name", f"scenario {i + 1}")
+        scenario["workbook"] = os.path.join(baseDir, scenario["workbook"])
+
+    return scenarios
+
+
+def _initWorker(params) -> None:
+    """
+    Start the shared Gurobi environment that every scenario solved by this worker process reuses,
+    and dispose of it when the worker exits, so that its license is released.
+
+    Parameters
+    ----------
+    params : dict
+        The Gurobi parameters of the environment
+    """
+    configureEnv(params)
+    getEnv()
+    # Finalizers run when a pool worker exits; atexit handlers do not.
+    util.Finalize(None, disposeEnv, exitpriority=10)
+
+
+def solveScenario(scenario) -> dict:
+    """
+    Read, formulate and solve one scenario in the worker's Gurobi environment.
+
+    Parameters
+    ----------
+    scenario : dict
+        A scenario as returned by `loadScenarios`
+
+    Returns
+    -------
+    result : dict
+        - name, workbook: copied from the scenario
+        - status: the Gurobi status name, or `ERROR`
+        - objVal: the optimal objective function value (None if not optimal)
+        - soln: dict of optimal decision variable values (empty if not optimal)
+        - duals: dict of optimal dual values by plant (empty if not optimal)
+        - instanceHash: the `ProductionInstance.contentHash` of the solved data (None if not read)
+        - readTime, buildTime, solveTime, totalTime: wall times in seconds
+        - error: the error message (None on success)
+    """
+    result = {"name": scenario["name"], "workbook": scenario["workbook"],
+              "status": "ERROR", "objVal": None, "soln": {}, "duals": {},
+              "instanceHash": None,
+              "readTime": None, "buildTime": None, "solveTime": None, "totalTime": None,
+              "error": None}
+    startTime = time.perf_counter()
+
+    try:
+        instance = readDataCached(scenario["workbook"])
+        instance = instance.withUpdates(scenario.get("productProfits"), scenario.get("plantAvailableHours"))
+        result["instanceHash"] = instance.contentHash()
+        readTime = time.perf_counter()
+
+        model = formulateModel(instance)
+        try:
+            model.update()
+            buildTime = time.perf_counter()
+
+            model.optimize()
+            solveTime = time.perf_counter()
+
+            result["status"] = gurobiStatusName(model.Status)
+            if model.Status == grb.GRB.OPTIMAL:
+                result["objVal"] = model.ObjVal
+                result["soln"] = dict(zip(model.getAttr("VarName", model.getVars()),
+                                          model.getAttr("X", model.getVars())))
+                result["duals"] = dict(zip(model.getAttr("ConstrName", model.getConstrs()),
+                                           model.getAttr("Pi", model.getConstrs())))
+        finally:
+            # Free the model even if the solve fails, so a failing scenario does not leak it
+            model.dispose()
+
+        result["readTime"] = readTime - startTime
+        result["buildTime"] = buildTime - readTime
+        result["solveTime"] = solveTime - buildTime
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    result["totalTime"] = time.perf_counter() - startTime
+
+    return result
+
+
+def solveBatch(scenarios, maxWorkers=constant.BATCH_MAX_WORKERS,
+               gurobiParams=constant.BATCH_GUROBI_PARAMS) -> list[dict]:
+    """
+    Solve the scenarios in a process pool, each worker reusing one Gurobi environment.
+
+    Parameters
+    ----------
+    scenarios : list of dict
+        The scenarios, as returned by `loadScenarios`
+    maxWorkers : int, optional
+        The number of worker processes (default: `constant.BATCH_MAX_WORKERS`)
+    gurobiParams : dict, optional
+        The Gurobi parameters of each worker environment (default: `constant.BATCH_GUROBI_PARAMS`)
+
+    Returns
+    -------
+    results : list of dict
+        One result per scenario, in the order of `scenarios` (see `solveScenario`)
+    """
+    with ProcessPoolExecutor(max_workers=maxWorkers, initializer=_initWorker, initargs=(gurobiParams,)) as pool:
+        return list(pool.map(solveScenario, scenarios))
+
+
+def summarizeResults(results) -> pd.DataFrame:
+    """
+    Build the per-scenario summary table of status, objective value and timings.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results returned by `solveBatch`
+
+    Returns
+    -------
+    summary : pandas.DataFrame
+        One row per scenario
+    """
+    columns = ["name", "workbook", "status", "objVal", "readTime", "buildTime", "solveTime", "totalTime", "error"]
+    return pd.DataFrame([{column: result[column] for column in columns} for result in results], columns=columns)
+
+
+def writeBatchResults(results, filePath=constant.BATCH_RESULTS_PATH) -> None:
+    """
+    Write all results at once to a single workbook: a `Summary` sheet and a `Solutions` sheet.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results returned by `solveBatch`
+    filePath : str, optional
+        The path to the results workbook (default: `constant.BATCH_RESULTS_PATH`)
+    """
+    summary = summarizeResults(results)
+    solutions = pd.DataFrame([result["soln"] for result in results], index=summary["name"])
+
+    with atomicWrite(filePath) as tmpPath:
+        with pd.ExcelWriter(tmpPath, engine="openpyxl") as writer:
+            summary.to_excel(writer, sheet_name="Summary", index=False)
+            solutions.to_excel(writer, sheet_name="Solutions")
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser(description="Solve a batch of Wyndor workbooks or scenarios.")
+    parser.add_argument("path", help="a directory of .xlsx workbooks or a .json scenario manifest")
+    parser.add_argument("--workers", type=int, default=constant.BATCH_MAX_WORKERS, help="number of worker processes")
+    parser.add_argument("--output", default=constant.BATCH_RESULTS_PATH, help="the results workbook")
+    parser.add_argument("--store", default=None, help="also append the results to this result store (SQLite)")
+    args = parser.parse_args()
+
+    results = solveBatch(loadScenarios(args.path), maxWorkers=args.workers)
+    writeBatchResults(results, args.output)
+    if args.store:
+        with ResultStore(args.store) as store:
+            store.appendMany(recordFromBatchResult(result, constant.BATCH_GUROBI_PARAMS) for result in results)
+
+    print(summarizeResults(results).drop(columns="workbook").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
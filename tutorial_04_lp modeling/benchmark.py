@@ -0,0 +1,749 @@
+"""
+Benchmark the pipeline stages, the model building paths, the solver backends, the model and data
+file formats, the presolve reduction and the integer batch MIP on generated instances of increasing size.
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import gurobipy as grb
+import numpy as np
+
+import constant
+from backend import getBackend
+from generator import generateInstance, writeInstanceWorkbook
+from io_openpyxl import readDataOpenpyxl, writeDataOpenpyxl
+from io_pandas import readDataPandas, writeDataPandas
+from io_tabular import readDataTabular, writeInstanceTabular
+from model import (formulateDictModel, formulateModel, getOptimalSolution, readModel, saveModel, setMipStart,
+                   solveModel)
+from mps_reader import readMps
+from parametric import sweepAvailableHours
+from presolve import reduceInstance
+
+
+def isSameModel(model1, model2) -> bool:
+    """
+    Check whether two Gurobi models have the same variables, constraints and coefficients.
+
+    Parameters
+    ----------
+    model1, model2 : gurobipy.Model
+        The models to compare
+
+    Returns
+    -------
+    same : bool
+        True if the names, objective, bounds, senses, right-hand sides and matrix coefficients agree
+    """
+    model1.update()
+    model2.update()
+
+    if model1.ModelSense != model2.ModelSense:
+        return False
+
+    vars1, vars2 = model1.getVars(), model2.getVars()
+    constrs1, constrs2 = model1.getConstrs(), model2.getConstrs()
+    if len(vars1) != len(vars2) or len(constrs1) != len(constrs2):
+        return False
+
+    for attr in ("VarName", "Obj", "LB", "UB", "VType"):
+        if model1.getAttr(attr, vars1) != model2.getAttr(attr, vars2):
+            return False
+
+    for attr in ("ConstrName", "Sense", "RHS"):
+        if model1.getAttr(attr, constrs1) != model2.getAttr(attr, constrs2):
+            return False
+
+    diff = model1.getA() - model2.getA()
+    return diff.count_nonzero() == 0
+
+
+def benchmarkBuild(sizes, density=0.1) -> list[dict]:
+    """
+    Time the dict-based and the matrix-based model building paths on instances of the given sizes.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size with the build time of each path (in seconds)
+    """
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+        productProfits, plantProductHours, plantAvailableHours = instance.toDicts()
+
+        startTime = time.perf_counter()
+        dictModel = formulateDictModel(productProfits, plantProductHours, plantAvailableHours)
+        dictModel.update()
+        dictTime = time.perf_counter() - startTime
+
+        startTime = time.perf_counter()
+        matrixModel = formulateModel(instance)
+        matrixModel.update()
+        matrixTime = time.perf_counter() - startTime
+
+        results.append({"products": numProducts,
+                        "plants": numPlants,
+                        "dict": dictTime,
+                        "matrix": matrixTime,
+                        "same": isSameModel(dictModel, matrixModel)})
+
+        dictModel.dispose()
+        matrixModel.dispose()
+
+    return results
+
+
+def benchmarkBackends(sizes, backendNames=("gurobi", "highs"), density=0.1) -> list[dict]:
+    """
+    Time the build and solve of each solver backend on instances of the given sizes.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    backendNames : tuple of str, optional
+        The backends to compare
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and backend with the build, solve and total times (in seconds) and
+        objective value; the build time is None for a backend that does not time it separately
+        (HiGHS), whose solve time is then end-to-end
+    """
+    backendOptions = {"gurobi": {"env": grb.Env(params={"OutputFlag": 0})}}
+
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+
+        for backendName in backendNames:
+            backend = getBackend(backendName, **backendOptions.get(backendName, {}))
+            result = backend.solve(instance)
+            results.append({"products": numProducts,
+                            "plants": numPlants,
+                            "backend": backendName,
+                            "status": result.status,
+                            "objVal": result.objVal,
+                            "build": result.buildTime if backend.timesBuild else None,
+                            "solve": result.solveTime,
+                            "total": result.buildTime + result.solveTime})
+
+    return results
+
+
+def benchmarkPresolve(sizes, density=0.1, zeroProfitFraction=0.2) -> list[dict]:
+    """
+    Compare building and solving the full instance with reducing it first.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+    zeroProfitFraction : float, optional
+        The fraction of products whose profit is set to 0, as in a catalogue with inactive products
+
+    Returns
+    -------
+    results : list of dict
+        One row per size with the reduced size, the reduce, build and solve times (in seconds),
+        the build time saved by the reduction (net of the reduce time), and whether the optimal
+        objective values agree
+    """
+    env = grb.Env(params={"OutputFlag": 0})
+
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+        rng = np.random.default_rng(0)
+        instance = instance.withUpdates({name: 0.0 for name in instance.productNames
+                                         if rng.random() < zeroProfitFraction})
+
+        times = {}
+        objVals = {}
+        reduction = None
+        for name in ("full", "reduced"):
+            startTime = time.perf_counter()
+            if name == "reduced":
+                reduction = reduceInstance(instance)
+            model = formulateModel(instance if reduction is None else reduction.reduced, env=env)
+            model.update()
+            times[name] = time.perf_counter() - startTime
+
+            startTime = time.perf_counter()
+            model.optimize()
+            times[f"{name}Solve"] = time.perf_counter() - startTime
+            objVals[name] = model.ObjVal
+            model.dispose()
+
+        results.append({"products": numProducts,
+                        "plants": numPlants,
+                        "reducedProducts": reduction.reduced.numProducts,
+                        "reducedPlants": reduction.reduced.numPlants,
+                        "reduce": reduction.stats["reduceTime"],
+                        "buildFull": times["full"],
+                        "buildReduced": times["reduced"],
+                        "buildSaved": times["full"] - times["reduced"],
+                        "solveFull": times["fullSolve"],
+                        "solveReduced": times["reducedSolve"],
+                        "same": abs(objVals["full"] - objVals["reduced"]) <= 1e-6 * max(1.0, abs(objVals["full"]))})
+
+    return results
+
+
+def benchmarkColumnGeneration(sizes, density=0.02) -> list[dict]:
+    """
+    Compare solving the full LP with HiGHS against column generation on wide instances.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size with the time and peak traced memory of each method, the number of
+        products in the final master, the number of rounds, and whether the optimal objective
+        values agree
+    """
+    env = grb.Env(params={"OutputFlag": 0})
+
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+
+        row = {"products": numProducts, "plants": numPlants}
+        objVals = {}
+        for name, backend in (("full", getBackend("highs")), ("colgen", getBackend("colgen", env=env))):
+            tracemalloc.start()
+            startTime = time.perf_counter()
+            result = backend.solve(instance)
+            row[name] = time.perf_counter() - startTime
+            row[f"{name}Memory"] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+            objVals[name] = result.objVal
+
+        row["columns"] = backend.history[-1]["columns"]
+        row["rounds"] = len(backend.history)
+        row["same"] = abs(objVals["full"] - objVals["colgen"]) <= 1e-6 * max(1.0, abs(objVals["full"]))
+        results.append(row)
+
+    return results
+
+
+def benchmarkParametric(sizes, gridPoints=41, density=0.1) -> list[dict]:
+    """
+    Compare tracing the profit over the available hours of one plant (from 0 to twice its hours)
+    by re-building and solving at every grid point with the breakpoint-jumping parametric sweep.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    gridPoints : int, optional
+        The number of grid points of the loop
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size with the time of each method, the number of solves of the sweep, and
+        whether the curve agrees with the objective at every grid point
+    """
+    env = grb.Env(params={"OutputFlag": 0})
+
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+        plant = instance.plantNames[0]
+        grid = np.linspace(0.0, 2 * instance.plantAvailableHours[0], gridPoints)
+
+        startTime = time.perf_counter()
+        gridObjVals = []
+        for value in grid:
+            model = formulateModel(instance.withUpdates(plantAvailableHours={plant: value}), env=env)
+            model.optimize()
+            gridObjVals.append(model.ObjVal)
+            model.dispose()
+        gridTime = time.perf_counter() - startTime
+
+        startTime = time.perf_counter()
+        curve = sweepAvailableHours(instance, plant, grid[0], grid[-1], env=env)[plant]
+        sweepTime = time.perf_counter() - startTime
+
+        results.append({"products": numProducts,
+                        "plants": numPlants,
+                        "grid": gridTime,
+                        "gridSolves": gridPoints,
+                        "sweep": sweepTime,
+                        "sweepSolves": curve.solves,
+                        "breakpoints": curve.breakpoints.size,
+                        "same": np.allclose(curve.evaluate(grid), gridObjVals, rtol=1e-6)})
+
+    return results
+
+
+def benchmarkMip(sizes, density=0.1, gaps=(0.1, 0.01, 0.001), setupFraction=0.3, params=None) -> list[dict]:
+    """
+    Time how long the integer batch MIP takes to reach each relative gap, with and without the
+    rounded LP solution as a MIP start.
+
+    A `setupFraction` of the products get a setup cost of 1 to 10 times their profit per batch,
+    and as many get a minimum lot size of 1 to 5 batches.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+    gaps : tuple of float, optional
+        The relative gaps to time
+    setupFraction : float, optional
+        The fraction of products with a setup cost, and the fraction with a minimum lot size
+    params : dict, optional
+        The MIP controls (default: `constant.MIP_PARAMS` with `MIPGap` set to the smallest gap)
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and start with the time (in seconds) to reach each gap (None if not
+        reached), the final gap, the total solve time and the number of nodes
+    """
+    if params is None:
+        params = {**constant.MIP_PARAMS, "MIPGap": min(gaps)}
+    env = grb.Env(params={"OutputFlag": 0})
+
+    results = []
+    for numProducts, numPlants in sizes:
+        instance = generateInstance(numProducts, numPlants, density)
+        rng = np.random.default_rng(0)
+        setupCosts = np.where(rng.random(numProducts) < setupFraction,
+                              instance.productProfits * rng.uniform(1, 10, numProducts), 0)
+        minLotSizes = np.where(rng.random(numProducts) < setupFraction, rng.integers(1, 6, numProducts), 0)
+
+        for useStart in (False, True):
+            model = formulateModel(instance, env=env, integer=True, minLotSizes=minLotSizes, setupCosts=setupCosts)
+            if useStart:
+                setMipStart(model)
+
+            gapTimes = dict.fromkeys(gaps)
+
+            def callback(cbModel, where):
+                if where != grb.GRB.Callback.MIP:
+                    return
+                best = cbModel.cbGet(grb.GRB.Callback.MIP_OBJBST)
+                bound = cbModel.cbGet(grb.GRB.Callback.MIP_OBJBND)
+                if best <= -grb.GRB.INFINITY or best == 0:
+                    return
+                gap = abs(bound - best) / abs(best)
+                for target in gaps:
+                    if gapTimes[target] is None and gap <= target:
+                        gapTimes[target] = cbModel.cbGet(grb.GRB.Callback.RUNTIME)
+
+            for name, value in params.items():
+                model.setParam(name, value)
+            model.optimize(callback)
+
+            # A gap reached at the very end (e.g. at the root) is only seen in the final attributes.
+            finalGap = model.MIPGap if model.SolCount else None
+            for target in gaps:
+                if gapTimes[target] is None and finalGap is not None and finalGap <= target:
+                    gapTimes[target] = model.Runtime
+
+            results.append({"products": numProducts,
+                            "plants": numPlants,
+                            "start": useStart,
+                            **{f"gap{target:g}": gapTimes[target] for target in gaps},
+                            "gap": finalGap,
+                            "time": model.Runtime,
+                            "nodes": int(model.NodeCount)})
+            model.dispose()
+
+    return results
+
+
+def measure(func, *args, traceMemory=True, **kwargs) -> tuple:
+    """
+    Call a function and measure its wall time and its peak Python memory allocation.
+
+    Memory is traced with `tracemalloc`, which sees NumPy, pandas and openpyxl allocations but not
+    the memory Gurobi allocates in its C library. Tracing slows down allocation-heavy code, so
+    pass `traceMemory=False` when only the time matters.
+
+    Parameters
+    ----------
+    func : callable
+        The function to call
+    *args, **kwargs
+        Passed to `func`
+    traceMemory : bool, optional
+        If False, skip the memory measurement
+
+    Returns
+    -------
+    result : object
+        The return value of `func`
+    wallTime : float
+        The wall time in seconds
+    peakMemory : float or None
+        The peak traced memory in MB (None if not traced)
+    """
+    if traceMemory:
+        tracemalloc.start()
+
+    startTime = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        wallTime = time.perf_counter() - startTime
+        peakMemory = tracemalloc.get_traced_memory()[1] / 2 ** 20 if traceMemory else None
+    finally:
+        if traceMemory:
+            tracemalloc.stop()
+
+    return result, wallTime, peakMemory
+
+
+def benchmarkPipeline(sizes, density=0.1, workDir=None) -> list[dict]:
+    """
+    Time each pipeline stage separately, and record its peak memory, on generated workbooks.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+    workDir : str, optional
+        The directory for the generated workbooks (default: a temporary directory)
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and stage with the wall time (in seconds) and peak memory (in MB)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        workDir = workDir or tmpDir
+
+        for numProducts, numPlants in sizes:
+            instance = generateInstance(numProducts, numPlants, density)
+            filePath = os.path.join(workDir, f"generated_{numProducts}x{numPlants}.xlsx")
+
+            def record(stage, func, *args, **kwargs):
+                result, wallTime, peakMemory = measure(func, *args, **kwargs)
+                results.append({"products": numProducts, "plants": numPlants, "stage": stage,
+                                "time": wallTime, "memory": peakMemory})
+                return result
+
+            layout = record("writeWorkbook", writeInstanceWorkbook, instance, filePath)
+            record("readDataOpenpyxl", readDataOpenpyxl, filePath, layout=layout)
+            record("readDataPandas", readDataPandas, filePath, layout=layout)
+
+            model = record("formulateModel", formulateModel, instance)
+            model.Params.OutputFlag = 0
+            record("solveModel", solveModel, model)
+
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                soln, objVal = record("getOptimalSolution", getOptimalSolution, model)
+
+            record("writeDataOpenpyxl", writeDataOpenpyxl, soln, objVal, instance, filePath, layout=layout)
+            record("writeDataPandas", writeDataPandas, soln, objVal, instance, filePath, layout=layout)
+            model.dispose()
+
+    return results
+
+
+def benchmarkModelFormats(sizes, extensions=(".lp", ".mps", ".mps.gz", ".mps.bz2", ".npz"), density=0.1) -> list[dict]:
+    """
+    Time `saveModel` and `readModel` for each file format, and check the round trip is lossless.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    extensions : tuple of str, optional
+        The file formats to compare
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and format with the save and load times (in seconds), the file size
+        (in MB) and whether the loaded model equals the original
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for numProducts, numPlants in sizes:
+            model = formulateModel(generateInstance(numProducts, numPlants, density))
+            model.update()
+
+            for extension in extensions:
+                filePath = os.path.join(tmpDir, f"model{extension}")
+                _, saveTime, _ = measure(saveModel, model, filePath, traceMemory=False)
+                loadedModel, loadTime, _ = measure(readModel, filePath, traceMemory=False)
+
+                results.append({"products": numProducts,
+                                "plants": numPlants,
+                                "format": extension,
+                                "save": saveTime,
+                                "load": loadTime,
+                                "size": os.path.getsize(filePath) / 2 ** 20,
+                                "same": isSameModel(model, loadedModel)})
+                loadedModel.dispose()
+
+            model.dispose()
+
+    return results
+
+
+def benchmarkMpsReader(sizes, extensions=(".mps", ".mps.gz"), density=0.01) -> list[dict]:
+    """
+    Compare reading MPS files with Gurobi (`grb.read`) and with the streaming NumPy reader.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    extensions : tuple of str, optional
+        The file formats to compare
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and format with the read time of Gurobi, the parse time and peak traced
+        memory of the NumPy reader, the time to also build the Gurobi model from its arrays, and
+        whether that model equals the one Gurobi read
+    """
+    env = grb.Env(params={"OutputFlag": 0})
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for numProducts, numPlants in sizes:
+            model = formulateModel(generateInstance(numProducts, numPlants, density), env=env)
+            model.update()
+
+            for extension in extensions:
+                filePath = os.path.join(tmpDir, f"model{extension}")
+                saveModel(model, filePath)
+
+                gurobiModel, gurobiTime, _ = measure(grb.read, filePath, env=env, traceMemory=False)
+                # Tracing slows the parse down, so the time and the memory come from separate runs.
+                data, parseTime, _ = measure(readMps, filePath, traceMemory=False)
+                _, _, parseMemory = measure(readMps, filePath)
+                numpyModel, buildTime, _ = measure(data.toModel, env, traceMemory=False)
+
+                results.append({"products": numProducts,
+                                "plants": numPlants,
+                                "format": extension,
+                                "size": os.path.getsize(filePath) / 2 ** 20,
+                                "gurobi": gurobiTime,
+                                "parse": parseTime,
+                                "parseMemory": parseMemory,
+                                "parseBuild": parseTime + buildTime,
+                                "same": isSameModel(gurobiModel, numpyModel)})
+                gurobiModel.dispose()
+                numpyModel.dispose()
+
+            model.dispose()
+
+    return results
+
+
+def _isSameInstance(instance1, instance2) -> bool:
+    """
+    Check whether two instances have the same names and data.
+    """
+    return (instance1.productNames == instance2.productNames
+            and instance1.plantNames == instance2.plantNames
+            and np.array_equal(instance1.productProfits, instance2.productProfits)
+            and np.array_equal(instance1.plantAvailableHours, instance2.plantAvailableHours)
+            and (instance1.plantProductHours != instance2.plantProductHours).nnz == 0)
+
+
+def benchmarkDataFormats(sizes, fileFormats=("xlsx", "csv", "parquet", "arrow"), density=0.1) -> list[dict]:
+    """
+    Time writing and reading an instance as an Excel workbook and as CSV, Parquet and Arrow tables.
+
+    Parameters
+    ----------
+    sizes : list of tuple of int
+        The (number of products, number of plants) pairs to benchmark
+    fileFormats : tuple of str, optional
+        The data formats to compare; `xlsx` goes through `writeInstanceWorkbook` and `readDataOpenpyxl`
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+
+    Returns
+    -------
+    results : list of dict
+        One row per size and format with the save and load times (in seconds), the size on disk
+        (in MB) and whether the loaded instance equals the original
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for numProducts, numPlants in sizes:
+            instance = generateInstance(numProducts, numPlants, density)
+
+            for fileFormat in fileFormats:
+                if fileFormat == "xlsx":
+                    filePath = os.path.join(tmpDir, "instance.xlsx")
+                    _, saveTime, _ = measure(writeInstanceWorkbook, instance, filePath, traceMemory=False)
+                    loadedInstance, loadTime, _ = measure(readDataOpenpyxl, filePath, traceMemory=False)
+                    size = os.path.getsize(filePath)
+                else:
+                    filePath = os.path.join(tmpDir, fileFormat)
+                    _, saveTime, _ = measure(writeInstanceTabular, instance, filePath, fileFormat, traceMemory=False)
+                    loadedInstance, loadTime, _ = measure(readDataTabular, filePath, fileFormat, traceMemory=False)
+                    size = sum(entry.stat().st_size for entry in os.scandir(filePath))
+
+                results.append({"products": numProducts,
+                                "plants": numPlants,
+                                "format": fileFormat,
+                                "save": saveTime,
+                                "load": loadTime,
+                                "size": size / 2 ** 20,
+                                "same": _isSameInstance(instance, loadedInstance)})
+
+    return results
+
+
+def printTable(rows, columns) -> None:
+    """
+    Print benchmark rows as an aligned text table.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The benchmark results
+    columns : list of tuple
+        (key, header, format) for each column, e.g. `("time", "time (s)", ".3f")`
+    """
+    table = [[header for _, header, _ in columns]]
+    for row in rows:
+        table.append(["-" if row[key] is None else format(row[key], fmt) for key, _, fmt in columns])
+
+    widths = [max(len(cells[k]) for cells in table) for k in range(len(columns))]
+    for cells in table:
+        print("  ".join(f"{cell:>{width}}" for cell, width in zip(cells, widths)))
+    print()
+
+
+def writeCsv(rows, filePath) -> None:
+    """
+    Write benchmark rows to a CSV file, so that runs can be compared over time.
+
+    Parameters
+    ----------
+    rows : list of dict
+        The benchmark results
+    filePath : str
+        The path to the CSV file
+    """
+    with open(filePath, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the production planning pipeline.")
+    parser.add_argument("--density", type=float, default=0.1, help="fraction of nonzero hours")
+    parser.add_argument("--csv", default=None, help="directory to write one CSV file per suite to")
+
+    # The suites read the parsed arguments only when they run.
+    suites = {
+        "pipeline": (lambda: benchmarkPipeline([(100, 20), (1000, 100), (2000, 500)], args.density),
+                     [("products", "products", "d"), ("plants", "plants", "d"), ("stage", "stage", "s"),
+                      ("time", "time (s)", ".3f"), ("memory", "peak (MB)", ".1f")]),
+        "build": (lambda: benchmarkBuild([(100, 10), (1000, 50), (5000, 100), (10000, 200)], args.density),
+                  [("products", "products", "d"), ("plants", "plants", "d"), ("dict", "dict (s)", ".3f"),
+                   ("matrix", "matrix (s)", ".3f"), ("same", "same", "")]),
+        "backends": (lambda: benchmarkBackends([(100, 10), (1000, 100), (1500, 500)], density=args.density),
+                     [("products", "products", "d"), ("plants", "plants", "d"), ("backend", "backend", "s"),
+                      ("status", "status", "s"), ("objVal", "objective", ".2f"), ("build", "build (s)", ".3f"),
+                      ("solve", "solve (s)", ".3f"), ("total", "total (s)", ".3f")]),
+        "formats": (lambda: benchmarkModelFormats([(1000, 100), (10000, 500)], density=args.density),
+                    [("products", "products", "d"), ("plants", "plants", "d"), ("format", "format", "s"),
+                     ("save", "save (s)", ".3f"), ("load", "load (s)", ".3f"), ("size", "size (MB)", ".2f"),
+                     ("same", "same", "")]),
+        "data": (lambda: benchmarkDataFormats([(1000, 100), (10000, 500)], density=args.density),
+                 [("products", "products", "d"), ("plants", "plants", "d"), ("format", "format", "s"),
+                  ("save", "save (s)", ".3f"), ("load", "load (s)", ".3f"), ("size", "size (MB)", ".2f"),
+                  ("same", "same", "")]),
+        "presolve": (lambda: benchmarkPresolve([(1000, 100), (1900, 1000), (1900, 1900)], density=args.density),
+                     [("products", "products", "d"), ("plants", "plants", "d"),
+                      ("reducedProducts", "reduced products", "d"), ("reducedPlants", "reduced plants", "d"),
+                      ("reduce", "reduce (s)", ".3f"), ("buildFull", "build full (s)", ".3f"),
+                      ("buildReduced", "reduce+build (s)", ".3f"), ("buildSaved", "saved (s)", ".3f"),
+                      ("solveFull", "solve full (s)", ".3f"), ("solveReduced", "solve reduced (s)", ".3f"),
+                      ("same", "same", "")]),
+        "mip": (lambda: benchmarkMip([(200, 50), (500, 200), (900, 500)], density=args.density),
+                [("products", "products", "d"), ("plants", "plants", "d"), ("start", "MIP start", ""),
+                 ("gap0.1", "to 10% (s)", ".2f"), ("gap0.01", "to 1% (s)", ".2f"), ("gap0.001", "to 0.1% (s)", ".2f"),
+                 ("gap", "final gap", ".4f"), ("time", "time (s)", ".2f"), ("nodes", "nodes", "d")]),
+        "colgen": (lambda: benchmarkColumnGeneration([(10000, 100), (100000, 200), (500000, 300)],
+                                                     density=min(args.density, 0.02)),
+                   [("products", "products", "d"), ("plants", "plants", "d"), ("full", "full (s)", ".3f"),
+                    ("fullMemory", "full peak (MB)", ".1f"), ("colgen", "colgen (s)", ".3f"),
+                    ("colgenMemory", "colgen peak (MB)", ".1f"), ("columns", "columns", "d"),
+                    ("rounds", "rounds", "d"), ("same", "same", "")]),
+        "parametric": (lambda: benchmarkParametric([(100, 20), (1000, 200), (1900, 1000)], density=args.density),
+                       [("products", "products", "d"), ("plants", "plants", "d"), ("grid", "grid (s)", ".3f"),
+                        ("gridSolves", "grid solves", "d"), ("sweep", "sweep (s)", ".3f"),
+                        ("sweepSolves", "sweep solves", "d"), ("breakpoints", "breakpoints", "d"),
+                        ("same", "same", "")]),
+        "mps": (lambda: benchmarkMpsReader([(10000, 500), (100000, 1000), (300000, 2000)],
+                                           density=min(args.density, 0.01)),
+                [("products", "products", "d"), ("plants", "plants", "d"), ("format", "format", "s"),
+                 ("size", "size (MB)", ".1f"), ("gurobi", "grb.read (s)", ".3f"), ("parse", "parse (s)", ".3f"),
+                 ("parseMemory", "parse peak (MB)", ".1f"), ("parseBuild", "parse+build (s)", ".3f"),
+                 ("same", "same", "")]),
+    }
+
+    parser.add_argument("--suite", choices=sorted(suites) + ["all"], default="all")
+    args = parser.parse_args()
+
+    for name, (run, columns) in suites.items():
+        if args.suite not in (name, "all"):
+            continue
+
+        rows = run()
+        print(f"[{name}]")
+        printTable(rows, columns)
+        if name == "backends":
+            print("HiGHS builds and solves in one linprog call: its solve time is end-to-end (build -).\n")
+        if args.csv:
+            writeCsv(rows, os.path.join(args.csv, f"benchmark_{name}.csv"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+On-disk cache of parsed instances, keyed by the workbook content and the sheet layout.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+
+import constant
+from instance import ProductionInstance
+from io_openpyxl import readDataOpenpyxl
+
+CACHE_SUFFIX = ".npz"
+
+
+def getCacheKey(filePath, layout=None) -> str:
+    """
+    Compute the cache key of a workbook: a hash of its content and of the sheet layout.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the Excel file
+    layout : SheetLayout, optional
+        The layout the workbook is parsed with (default: detected from the workbook, which
+        depends on its content and on the label and defined name constants)
+
+    Returns
+    -------
+    key : str
+        The hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(filePath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    if layout is None:
+        # The detected layout depends on the labels and defined names that locate the blocks
+        layoutKey = {"detect": constant.SHEET_NAME,
+                     "labels": [constant.LABEL_PROFIT, constant.LABEL_HOURS_AVAILABLE,
+                                constant.LABEL_BATCHES_PRODUCED, constant.LABEL_TOTAL_PROFIT],
+                     "maxHeaderRows": constant.LAYOUT_MAX_HEADER_ROWS,
+                     "definedNames": [constant.DEFINED_NAME_PRODUCTS, constant.DEFINED_NAME_PLANTS,
+                                      constant.DEFINED_NAME_PROFITS, constant.DEFINED_NAME_HOURS,
+                                      constant.DEFINED_NAME_HOURS_AVAILABLE, constant.DEFINED_NAME_BATCHES_PRODUCED,
+                                      constant.DEFINED_NAME_TOTAL_PROFIT]}
+    else:
+        layoutKey = asdict(layout)
+    digest.update(json.dumps(layoutKey, sort_keys=True).encode())
+
+    return digest.hexdigest()
+
+
+def evictCache(cacheDir=constant.CACHE_DIR, maxCacheBytes=constant.CACHE_MAX_BYTES) -> list[str]:
+    """
+    Remove the least recently used cache entries until the cache fits in `maxCacheBytes`.
+
+    Parameters
+    ----------
+    cacheDir : str, optional
+        The cache directory (default: `constant.CACHE_DIR`)
+    maxCacheBytes : int, optional
+        The maximum total size of the cache (default: `constant.CACHE_MAX_BYTES`)
+
+    Returns
+    -------
+    removed : list of str
+        The paths of the removed entries
+    """
+    if not os.path.isdir(cacheDir):
+        return []
+
+    entries = []
+    for entry in os.scandir(cacheDir):
+        if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    # A hit touches its entry, so the oldest modification time is the least recently used.
+    entries.sort()
+    totalBytes = sum(size for _, size, _ in entries)
+
+    removed = []
+    for _, size, path in entries:
+        if totalBytes <= maxCacheBytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process evicted it first.
+            pass
+        totalBytes -= size
+        removed.append(path)
+
+    return removed
+
+
+def readDataCached(filePath=constant.DATA_PATH, reader=readDataOpenpyxl, useCache=True, layout=None,
+                   cacheDir=constant.CACHE_DIR, maxCacheBytes=constant.CACHE_MAX_BYTES) -> ProductionInstance:
+    """
+    Read production planning data through the on-disk instance cache.
+
+    On a hit, the instance is memory-mapped from the cache and Excel is not parsed at all. On a
+    miss, `reader` parses the workbook and the result is stored for next time.
+
+    Parameters
+    ----------
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    reader : callable, optional
+        The reader used on a miss, `readDataOpenpyxl` or `readDataPandas`
+    useCache : bool, optional
+        If False, bypass the cache and always call `reader`
+    layout : SheetLayout, optional
+        Where the blocks are in the sheet (default: detected by the reader)
+    cacheDir : str, optional
+        The cache directory (default: `constant.CACHE_DIR`)
+    maxCacheBytes : int, optional
+        The maximum total size of the cache (default: `constant.CACHE_MAX_BYTES`)
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The production planning data
+    """
+    if not useCache:
+        return reader(filePath, layout=layout)
+
+    cachePath = os.path.join(cacheDir, getCacheKey(filePath, layout) + CACHE_SUFFIX)
+
+    if os.path.exists(cachePath):
+        # Mark the entry as recently used.
+        os.utime(cachePath)
+        return ProductionInstance.load(cachePath)
+
+    instance = reader(filePath, layout=layout)
+
+    os.makedirs(cacheDir, exist_ok=True)
+    instance.save(cachePath)
+    evictCache(cacheDir, maxCacheBytes)
+
+    return instance
@@ -0,0 +1,189 @@
+"""
+Column generation for instances with far more candidate products than are ever produced.
+"""
+
+import time
+
+import gurobipy as grb
+import numpy as np
+
+import constant
+from backend import SolveResult, gurobiStatusName
+from environment import getEnv
+from model import formulateMatrixModel
+
+
+def priceColumns(productProfits, plantProductHours, duals, batchSize=constant.COLGEN_PRICING_BATCH) -> np.ndarray:
+    """
+    Compute the reduced cost of every product: its profit minus the value of the hours it uses.
+
+    Parameters
+    ----------
+    productProfits : numpy.ndarray, shape (n,)
+        The profit per batch of each product
+    plantProductHours : scipy.sparse.csc_matrix, shape (m, n)
+        The hours per batch, in CSC form so that column batches are slices without copies of the rest
+    duals : numpy.ndarray, shape (m,)
+        The dual values (shadow prices per hour) of the plant constraints
+    batchSize : int, optional
+        The number of products priced per sparse matrix-vector product, which bounds the temporary
+        memory (default: `constant.COLGEN_PRICING_BATCH`)
+
+    Returns
+    -------
+    reducedCosts : numpy.ndarray, shape (n,)
+        The reduced cost of each product
+    """
+    numProducts = productProfits.size
+    reducedCosts = np.empty(numProducts)
+
+    for start in range(0, numProducts, batchSize):
+        end = min(start + batchSize, numProducts)
+        reducedCosts[start:end] = productProfits[start:end] - plantProductHours[:, start:end].T @ duals
+
+    return reducedCosts
+
+
+def _initialColumns(instance, numColumns) -> np.ndarray:
+    """
+    Pick the products of the first restricted master: the most profit per share of the plant
+    hours used, which is the pricing rule with every hour valued at 1 / available hours.
+    """
+    capacityShare = instance.plantProductHours.T @ (1.0 / np.maximum(instance.plantAvailableHours, 1e-12))
+    score = instance.productProfits / np.maximum(capacityShare, 1e-12)
+    score[instance.productProfits <= 0] = -np.inf
+
+    if numColumns >= instance.numProducts:
+        return np.flatnonzero(np.isfinite(score))
+
+    columns = np.argpartition(-score, numColumns)[:numColumns]
+    return np.sort(columns[np.isfinite(score[columns])])
+
+
+def solveColumnGeneration(instance, initialColumns=constant.COLGEN_INITIAL_COLUMNS,
+                          maxColumnsPerRound=constant.COLGEN_MAX_COLUMNS_PER_ROUND, tolerance=1e-9,
+                          maxRounds=1000, env=None, verbose=False) -> tuple[SolveResult, list[dict]]:
+    """
+    Solve the LP of an instance by column generation.
+
+    A restricted master LP holds every plant but only some products. After each solve, the plant
+    duals price all products at once (see `priceColumns`), and the products with the largest
+    positive reduced costs are added as new columns. The master is re-optimized from its previous
+    basis, and the loop stops when no product has a positive reduced cost, at which point the
+    master optimum is the optimum of the full LP.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance
+    initialColumns : int or array-like, optional
+        The number of products in the first master, or their indices
+        (default: `constant.COLGEN_INITIAL_COLUMNS`)
+    maxColumnsPerRound : int, optional
+        The maximum number of products added per round (default: `constant.COLGEN_MAX_COLUMNS_PER_ROUND`)
+    tolerance : float, optional
+        The smallest reduced cost that counts as positive
+    maxRounds : int, optional
+        The maximum number of pricing rounds. If they run out before pricing finds no more
+        columns, the status is `ITERATION_LIMIT` and the solution, that of the last master, is
+        feasible but may not be optimal.
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the master in (default: the shared environment)
+    verbose : bool, optional
+        If True, print one line per round
+
+    Returns
+    -------
+    result : SolveResult
+        The solution in the product order of the full instance (0 for the products never added)
+    history : list of dict
+        One entry per round: round, columns, objVal, maxReducedCost, added
+    """
+    if np.ndim(initialColumns) == 0:
+        columns = _initialColumns(instance, int(initialColumns))
+    else:
+        columns = np.asarray(initialColumns, dtype=int)
+
+    startTime = time.perf_counter()
+    model = formulateMatrixModel(instance.productProfits[columns],
+                                 instance.plantProductHours[:, columns],
+                                 instance.plantAvailableHours,
+                                 [instance.productNames[j] for j in columns.tolist()],
+                                 instance.plantNames,
+                                 env if env is not None else getEnv(),
+                                 instance.productUpperBounds[columns])
+    model.update()
+    constrs = model.getConstrs()
+    buildTime = time.perf_counter() - startTime
+
+    hours = instance.plantProductHours.tocsc()
+    inMaster = np.zeros(instance.numProducts, dtype=bool)
+    inMaster[columns] = True
+
+    history = []
+    solveTime = 0.0
+    converged = False
+    pendingColumns = True
+    for roundIndex in range(maxRounds):
+        startTime = time.perf_counter()
+        model.optimize()
+        solveTime += time.perf_counter() - startTime
+        pendingColumns = False
+        if model.Status != grb.GRB.OPTIMAL:
+            break
+
+        # Price every product with the plant duals, fetched in one bulk attribute query.
+        startTime = time.perf_counter()
+        duals = np.asarray(model.getAttr("Pi", constrs))
+        reducedCosts = priceColumns(instance.productProfits, hours, duals)
+        reducedCosts[inMaster] = -np.inf
+
+        candidates = np.flatnonzero(reducedCosts > tolerance)
+        if candidates.size > maxColumnsPerRound:
+            candidates = candidates[np.argpartition(-reducedCosts[candidates], maxColumnsPerRound)[:maxColumnsPerRound]]
+
+        history.append({"round": roundIndex + 1,
+                        "columns": int(inMaster.sum()),
+                        "objVal": model.ObjVal,
+                        "maxReducedCost": float(reducedCosts.max()) if candidates.size else 0.0,
+                        "added": int(candidates.size)})
+        if verbose:
+            print(", ".join(f"{key} {value}" for key, value in history[-1].items()))
+
+        if candidates.size == 0:
+            buildTime += time.perf_counter() - startTime
+            converged = True
+            break
+
+        # Add the new columns: each product enters every plant constraint it uses.
+        for j in candidates.tolist():
+            start, end = hours.indptr[j], hours.indptr[j + 1]
+            column = grb.Column(hours.data[start:end].tolist(), [constrs[i] for i in hours.indices[start:end].tolist()])
+            model.addVar(lb=0.0, ub=instance.productUpperBounds[j], obj=instance.productProfits[j],
+                         name=instance.productNames[j], column=column)
+        inMaster[candidates] = True
+        columns = np.concatenate([columns, candidates])
+        pendingColumns = True
+        buildTime += time.perf_counter() - startTime
+
+    if pendingColumns:
+        # The rounds ran out after adding columns: solve the master once more so that its
+        # solution covers every column, even though they were not priced again.
+        startTime = time.perf_counter()
+        model.optimize()
+        solveTime += time.perf_counter() - startTime
+
+    status = gurobiStatusName(model.Status)
+    if model.Status == grb.GRB.OPTIMAL and not converged:
+        # The master is optimal, but some products may still have a positive reduced cost.
+        status = "ITERATION_LIMIT"
+
+    result = SolveResult("colgen", status, buildTime=buildTime, solveTime=solveTime)
+    if model.Status == grb.GRB.OPTIMAL:
+        result.objVal = model.ObjVal
+        result.x = np.zeros(instance.numProducts)
+        result.x[columns] = model.getAttr("X", model.getVars())
+        result.duals = np.asarray(model.getAttr("Pi", constrs))
+    model.dispose()
+
+    return result, history
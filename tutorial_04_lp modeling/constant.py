@@ -8,6 +8,19 @@ SHEET_NAME = "Data"
 
 LP_PATH = "./instance/wyndor.lp"
 MPS_PATH = "./instance/wyndor.mps"
+MPS_GZ_PATH = "./instance/wyndor.mps.gz"
+SNAPSHOT_PATH = "./instance/wyndor.npz"
+
+# The approximate size of each chunk of lines read by the streaming MPS reader
+MPS_CHUNK_BYTES = 1 << 20
+
+# Tabular (CSV, Parquet, Arrow IPC) data directory, holding one table per file
+TABULAR_PATH = "./data/wyndor"
+TABULAR_FORMAT = "csv"
+
+# Parsed instance cache directory and its maximum total size in bytes
+CACHE_DIR = "./cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 # Profit per batch data location (Doors & Windows)
 INPUT_PROFIT_START_ROW = 4
@@ -28,6 +41,34 @@ OUTPUT_BATCHES_PRODUCED_START_COL = 2
 OUTPUT_PROFIT_START_ROW = 12
 OUTPUT_PROFIT_START_COL = 6
 
+# Header labels that locate the blocks when the layout is detected from the sheet
+LABEL_PROFIT = "Profit per batch"
+LABEL_HOURS_AVAILABLE = "available"
+LABEL_BATCHES_PRODUCED = "Batches produced"
+LABEL_TOTAL_PROFIT = "Total profit"
+
+# The profit and hours available labels must appear within this many rows from the top of the sheet
+LAYOUT_MAX_HEADER_ROWS = 100
+
+# Excel defined names that locate the blocks, if the workbook defines them
+DEFINED_NAME_PRODUCTS = "Products"
+DEFINED_NAME_PLANTS = "Plants"
+DEFINED_NAME_PROFITS = "ProfitPerBatch"
+DEFINED_NAME_HOURS = "HoursUsed"
+DEFINED_NAME_HOURS_AVAILABLE = "HoursAvailable"
+DEFINED_NAME_BATCHES_PRODUCED = "BatchesProduced"
+DEFINED_NAME_TOTAL_PROFIT = "TotalProfit"
+
+# Sensitivity report sheet names
+SENSITIVITY_CONSTR_SHEET_NAME = "Constraint Sensitivity"
+SENSITIVITY_VAR_SHEET_NAME = "Variable Sensitivity"
+
+# Parametric analysis: sheet name of the curves, maximum number of breakpoints per curve, and the
+# step past a breakpoint (relative to the swept range) used to find the next basis
+PARAMETRIC_SHEET_NAME = "Parametric Analysis"
+PARAMETRIC_MAX_BREAKPOINTS = 1000
+PARAMETRIC_STEP = 1e-7
+
 # Product names list
 PRODUCT_NAMES = ["Doors", "Windows"]
 
@@ -36,3 +77,48 @@ PLANT_NAMES = ["Plant 1", "Plant 2", "Plant 3"]
 
 # Model name
 MODEL_NAME = "Wyndor"
+
+# MIP solve controls for integer batches (see `solveModel`): threads (0: all cores), relative gap,
+# time limit in seconds, and the number of concurrent MIP solves with different seeds
+MIP_PARAMS = {"Threads": 0, "MIPGap": 1e-4, "TimeLimit": 60, "ConcurrentMIP": 1}
+
+# Labels of the MIP gap and best bound cells the writers add below the total profit
+LABEL_MIP_GAP = "MIP gap"
+LABEL_OBJ_BOUND = "Best bound"
+
+# Parameters of the shared Gurobi environment (see `environment.py`); the values are Gurobi's defaults
+GUROBI_PARAMS = {"OutputFlag": 1, "Threads": 0, "Method": -1, "LogFile": ""}
+
+# Maximum number of variables printed by `getOptimalSolution`
+SOLUTION_PRINT_LIMIT = 20
+
+# Environment variables that turn on the stage timing log (JSON lines) and a whole-run profile dump
+PROFILE_LOG_ENV = "WYNDOR_PROFILE_LOG"
+PROFILE_DUMP_ENV = "WYNDOR_PROFILE_DUMP"
+
+# Instances with at most this many nonzeros in the hours matrix are routed to HiGHS by `selectBackend`
+HIGHS_MAX_NONZEROS = 100000
+
+# Column generation: number of products in the first restricted master, maximum number of columns
+# added per pricing round, and the number of products priced per vectorized batch
+COLGEN_INITIAL_COLUMNS = 500
+COLGEN_MAX_COLUMNS_PER_ROUND = 200
+COLGEN_PRICING_BATCH = 100000
+
+# Batch scenario solving: number of worker processes (None: one per CPU), Gurobi parameters of the
+# environment each worker creates once, and the workbook the results are written to
+BATCH_MAX_WORKERS = None
+BATCH_GUROBI_PARAMS = {"OutputFlag": 0, "Threads": 1}
+BATCH_RESULTS_PATH = "./data/batch_results.xlsx"
+
+# The SQLite result store that solve results are appended to
+RESULT_STORE_PATH = "./data/results.sqlite"
+
+# Parallel workbook reading: number of worker processes (None: one per CPU) and the maximum number of
+# files being parsed or waiting to be consumed at once (None: twice the number of workers)
+PARALLEL_READ_MAX_WORKERS = None
+PARALLEL_READ_MAX_PENDING = None
+
+# Solve service: maximum number of concurrent solves and Gurobi parameters of each worker environment
+SERVICE_MAX_CONCURRENCY = 2
+SERVICE_GUROBI_PARAMS = {"OutputFlag": 0}
@@ -0,0 +1,65 @@
+"""
+One shared Gurobi environment per process.
+
+Starting an environment checks out the license, which is a noticeable part of a short run, so every
+model of a process is created in the same environment. `gurobipy` is imported on first use only,
+so modules that merely read and write workbooks never load it.
+"""
+
+import os
+
+import constant
+
+_state = {"env": None, "pid": None, "params": dict(constant.GUROBI_PARAMS)}
+
+
+def getEnv():
+    """
+    Return the shared Gurobi environment of this process, starting it on first use.
+
+    A child process (e.g. a forked pool worker) starts its own environment instead of using the
+    one inherited from its parent.
+
+    Returns
+    -------
+    env : gurobipy.Env
+        The shared environment, with the parameters of `constant.GUROBI_PARAMS` and `configureEnv`
+    """
+    if _state["env"] is None or _state["pid"] != os.getpid():
+        import gurobipy as grb
+
+        _state["env"] = grb.Env(params=_state["params"])
+        _state["pid"] = os.getpid()
+
+    return _state["env"]
+
+
+def configureEnv(params) -> None:
+    """
+    Set parameters of the shared environment, e.g. `{"Threads": 1, "OutputFlag": 0}`.
+
+    The parameters apply to the models created afterwards. If the environment has not been
+    started yet, they are used to start it.
+
+    Parameters
+    ----------
+    params : dict
+        - Keys: Gurobi parameter names
+        - Values: parameter values
+    """
+    _state["params"].update(params)
+
+    if _state["env"] is not None and _state["pid"] == os.getpid():
+        for name, value in params.items():
+            _state["env"].setParam(name, value)
+
+
+def disposeEnv() -> None:
+    """
+    Dispose of the shared environment and release its license; the next `getEnv` starts a new one.
+    """
+    if _state["env"] is not None and _state["pid"] == os.getpid():
+        _state["env"].dispose()
+
+    _state["env"] = None
+    _state["pid"] = None
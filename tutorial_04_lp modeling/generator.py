@@ -0,0 +1,166 @@
+"""
+Generate synthetic production planning instances of any size for benchmarking.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from openpyxl import Workbook
+
+import constant
+from instance import ProductionInstance
+from io_utils import atomicWrite
+from layout import SheetLayout
+
+
+def generateInstance(numProducts, numPlants, density=0.1, seed=0) -> ProductionInstance:
+    """
+    Generate a random, bounded production planning instance.
+
+    Parameters
+    ----------
+    numProducts : int
+        The number of products
+    numPlants : int
+        The number of plants
+    density : float, optional
+        The fraction of nonzero entries in the hours matrix
+    seed : int, optional
+        The random seed
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The generated instance; every product uses at least one plant, so the LP is bounded
+    """
+    rng = np.random.default_rng(seed)
+
+    # Names without spaces survive a round trip through the LP and MPS files.
+    productNames = [f"Product_{j + 1}" for j in range(numProducts)]
+    plantNames = [f"Plant_{i + 1}" for i in range(numPlants)]
+
+    profits = rng.integers(1, 100, size=numProducts).astype(float)
+    hours = sp.random(numPlants, numProducts, density=density, format="lil", random_state=rng,
+                      data_rvs=lambda size: rng.integers(1, 10, size=size))
+    availableHours = rng.integers(10, 1000, size=numPlants).astype(float)
+
+    # Every product uses at least one plant, otherwise the LP is unbounded.
+    unusedProducts = np.flatnonzero(hours.getnnz(axis=0) == 0)
+    randomPlants = rng.integers(0, numPlants, size=unusedProducts.size)
+    hours[randomPlants, unusedProducts] = rng.integers(1, 10, size=unusedProducts.size)
+
+    return ProductionInstance(productNames, plantNames, profits, hours.tocsr(), availableHours)
+
+
+def writeInstanceWorkbook(instance, filePath) -> SheetLayout:
+    """
+    Write an instance to an Excel file in the Wyndor layout, stretched to the instance size.
+
+    The workbook is written in openpyxl's write-only mode, row by row, and zero hours are left
+    empty, so memory stays flat and the file stays small for sparse instances.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance to write
+    filePath : str
+        The path to the Excel file
+
+    Returns
+    -------
+    layout : SheetLayout
+        The layout to pass to the readers and writers for this workbook
+    """
+    layout = SheetLayout.forNames(instance.productNames, instance.plantNames)
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet(layout.sheetName)
+
+    firstCol = layout.profitStartCol - 1
+    gap = [None] * (layout.hoursAvailableStartCol - layout.hoursStartCol - instance.numProducts)
+    hours = instance.plantProductHours
+
+    # Rows are appended in order, starting at row 1; None leaves a cell empty.
+    sheet.append(["Production Planning Problem"])
+    sheet.append([])
+    sheet.append([None] * firstCol + list(instance.productNames))
+    sheet.append(["Profit per batch"] + [None] * (firstCol - 1) + instance.productProfits.tolist())
+    sheet.append([None] * (layout.hoursAvailableStartCol - 1) + ["Hours"])
+    sheet.append([None] * firstCol + ["Hours used per batch produced"] + [None] * (instance.numProducts - 1)
+                 + gap + ["available"])
+
+    for i, plant in enumerate(instance.plantNames):
+        row = [None] * instance.numProducts
+        start, end = hours.indptr[i], hours.indptr[i + 1]
+        for j, value in zip(hours.indices[start:end].tolist(), hours.data[start:end].tolist()):
+            row[j] = value
+        sheet.append([plant] + [None] * (firstCol - 1) + row + gap + [instance.plantAvailableHours[i].item()])
+
+    sheet.append([])
+    sheet.append([None] * firstCol + list(instance.productNames) + gap + ["Total profit"])
+    sheet.append(["Batches produced"])
+
+    with atomicWrite(filePath) as tmpPath:
+        book.save(tmpPath)
+
+    return layout
+
+
+def writeInstanceModels(instance, directory=os.path.dirname(constant.LP_PATH), baseName="generated") -> list[str]:
+    """
+    Write an instance as LP and MPS files through the Gurobi model builder.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance to write
+    directory : str, optional
+        The output directory (default: the `instance` directory)
+    baseName : str, optional
+        The file name without extension
+
+    Returns
+    -------
+    filePaths : list of str
+        The paths of the LP and MPS files
+    """
+    from model import formulateModel, saveModel
+
+    model = formulateModel(instance)
+    filePaths = [os.path.join(directory, f"{baseName}.{extension}") for extension in ("lp", "mps")]
+    for filePath in filePaths:
+        saveModel(model, filePath)
+    model.dispose()
+
+    return filePaths
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic production planning instance.")
+    parser.add_argument("products", type=int, help="number of products")
+    parser.add_argument("plants", type=int, help="number of plants")
+    parser.add_argument("--density", type=float, default=0.1, help="fraction of nonzero hours")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--name", default=None, help="base file name (default: generated_<products>x<plants>)")
+    parser.add_argument("--no-models", action="store_true", help="do not write the LP and MPS files")
+    args = parser.parse_args()
+
+    baseName = args.name or f"generated_{args.products}x{args.plants}"
+    instance = generateInstance(args.products, args.plants, args.density, args.seed)
+
+    workbookPath = os.path.join(os.path.dirname(constant.DATA_PATH), f"{baseName}.xlsx")
+    writeInstanceWorkbook(instance, workbookPath)
+    print(f"Wrote {workbookPath}")
+
+    if not args.no_models:
+        for filePath in writeInstanceModels(instance, baseName=baseName):
+            print(f"Wrote {filePath}")
+
+
+if __name__ == "__main__":
+    main()
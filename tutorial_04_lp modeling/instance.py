@@ -0,0 +1,320 @@
+"""
+Array-backed representation of a production planning instance.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import scipy.sparse as sp
+
+from io_utils import loadArrays, saveArrays
+
+
+@dataclass
+class ProductionInstance:
+    """
+    A production planning instance stored as NumPy arrays and a sparse hours matrix.
+
+    Attributes
+    ----------
+    productNames : list of str
+        The product names, in column order
+    plantNames : list of str
+        The plant names, in row order
+    productProfits : numpy.ndarray, shape (n,)
+        The profit per batch for each product
+    plantProductHours : scipy.sparse.csr_matrix, shape (m, n)
+        The hours required to produce one batch of each product (column) at each plant (row)
+    plantAvailableHours : numpy.ndarray, shape (m,)
+        The available hours at each plant
+    productUpperBounds : numpy.ndarray, shape (n,)
+        The maximum number of batches of each product (default: unbounded, `numpy.inf`)
+    productIndex : dict
+        - Keys: product names
+        - Values: column index
+    plantIndex : dict
+        - Keys: plant names
+        - Values: row index
+    """
+
+    productNames: list
+    plantNames: list
+    productProfits: np.ndarray
+    plantProductHours: sp.csr_matrix
+    plantAvailableHours: np.ndarray
+    productUpperBounds: np.ndarray = None
+    productIndex: dict = field(init=False, repr=False)
+    plantIndex: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.productNames = list(self.productNames)
+        self.plantNames = list(self.plantNames)
+        self.productProfits = np.asarray(self.productProfits, dtype=float)
+        self.plantAvailableHours = np.asarray(self.plantAvailableHours, dtype=float)
+        self.plantProductHours = sp.csr_matrix(self.plantProductHours, dtype=float)
+        self.plantProductHours.eliminate_zeros()
+        if self.productUpperBounds is None:
+            self.productUpperBounds = np.full(len(self.productNames), np.inf)
+        self.productUpperBounds = np.asarray(self.productUpperBounds, dtype=float)
+
+        if self.productProfits.shape != (len(self.productNames),):
+            raise ValueError(f"productProfits has shape {self.productProfits.shape}, "
+                             f"expected ({len(self.productNames)},)")
+        if self.plantAvailableHours.shape != (len(self.plantNames),):
+            raise ValueError(f"plantAvailableHours has shape {self.plantAvailableHours.shape}, "
+                             f"expected ({len(self.plantNames)},)")
+        if self.productUpperBounds.shape != (len(self.productNames),):
+            raise ValueError(f"productUpperBounds has shape {self.productUpperBounds.shape}, "
+                             f"expected ({len(self.productNames)},)")
+        if self.plantProductHours.shape != (len(self.plantNames), len(self.productNames)):
+            raise ValueError(f"plantProductHours has shape {self.plantProductHours.shape}, "
+                             f"expected ({len(self.plantNames)}, {len(self.productNames)})")
+
+        self.productIndex = {name: j for j, name in enumerate(self.productNames)}
+        self.plantIndex = {name: i for i, name in enumerate(self.plantNames)}
+
+    @property
+    def numProducts(self) -> int:
+        """The number of products."""
+        return len(self.productNames)
+
+    @property
+    def numPlants(self) -> int:
+        """The number of plants."""
+        return len(self.plantNames)
+
+    def maxBatches(self) -> np.ndarray:
+        """
+        The most batches of each product that fit, i.e. the tightest of its upper bound and the
+        available hours over the hours per batch at every plant it uses.
+
+        Returns
+        -------
+        maxBatches : numpy.ndarray, shape (n,)
+            The maximum number of batches per product; `numpy.inf` for a product that uses no plant
+            and has no upper bound
+        """
+        hours = self.plantProductHours.tocsc()
+        columns = np.repeat(np.arange(self.numProducts), np.diff(hours.indptr))
+        maxBatches = np.array(self.productUpperBounds)
+        np.minimum.at(maxBatches, columns, self.plantAvailableHours[hours.indices] / hours.data)
+
+        return maxBatches
+
+    def contentHash(self) -> str:
+        """
+        Compute a hash of the instance data, equal for equal instances wherever they were read from.
+
+        Returns
+        -------
+        key : str
+            The hexadecimal SHA-256 digest of the names, profits, hours, available hours and bounds
+        """
+        hours = self.plantProductHours
+        if not hours.has_sorted_indices:
+            hours = hours.sorted_indices()
+
+        digest = hashlib.sha256()
+        digest.update("\0".join(self.productNames).encode())
+        digest.update(b"\1" + "\0".join(self.plantNames).encode())
+        for array in (self.productProfits, self.plantAvailableHours, self.productUpperBounds, hours.data):
+            digest.update(np.ascontiguousarray(array, dtype=float).tobytes())
+        for array in (hours.indices, hours.indptr):
+            digest.update(np.ascontiguousarray(array, dtype=np.int64).tobytes())
+
+        return digest.hexdigest()
+
+    @classmethod
+    def fromDicts(cls, productProfits, plantProductHours, plantAvailableHours) -> "ProductionInstance":
+        """
+        Build an instance from the nested-dict form returned by the original readers.
+
+        Parameters
+        ----------
+        productProfits : dict
+            - Keys: product names
+            - Values: profit per batch
+        plantProductHours : nested dict
+            - Keys: plant names
+            - Values: dict
+                - Keys: product names
+                - Values: hours required
+        plantAvailableHours : dict
+            - Keys: plant names
+            - Values: available hours
+
+        Returns
+        -------
+        instance : ProductionInstance
+            The equivalent array-backed instance
+        """
+        productNames = list(productProfits)
+        plantNames = list(plantAvailableHours)
+        productIndex = {name: j for j, name in enumerate(productNames)}
+
+        rows, cols, values = [], [], []
+        for i, plant in enumerate(plantNames):
+            for product, hours in plantProductHours.get(plant, {}).items():
+                if hours:
+                    rows.append(i)
+                    cols.append(productIndex[product])
+                    values.append(hours)
+
+        hoursMatrix = sp.csr_matrix((values, (rows, cols)), shape=(len(plantNames), len(productNames)))
+
+        return cls(productNames,
+                   plantNames,
+                   [productProfits[product] for product in productNames],
+                   hoursMatrix,
+                   [plantAvailableHours[plant] for plant in plantNames])
+
+    def toDicts(self) -> tuple[dict, dict, dict]:
+        """
+        Convert the instance back to the nested-dict form.
+
+        Returns
+        -------
+        productProfits : dict
+            The profit per batch for each product
+        plantProductHours : nested dict
+            The hours required to produce one batch of each product at each plant
+        plantAvailableHours : dict
+            The available hours at each plant
+        """
+        productProfits = dict(zip(self.productNames, self.productProfits.tolist()))
+
+        denseHours = self.plantProductHours.toarray()
+        plantProductHours = {plant: dict(zip(self.productNames, denseHours[i].tolist()))
+                             for i, plant in enumerate(self.plantNames)}
+
+        plantAvailableHours = dict(zip(self.plantNames, self.plantAvailableHours.tolist()))
+
+        return productProfits, plantProductHours, plantAvailableHours
+
+    def withUpdates(self, productProfits=None, plantAvailableHours=None) -> "ProductionInstance":
+        """
+        Return a copy of the instance with some profits and/or available hours replaced.
+
+        Parameters
+        ----------
+        productProfits : dict, optional
+            - Keys: product names
+            - Values: new profit per batch
+        plantAvailableHours : dict, optional
+            - Keys: plant names
+            - Values: new available hours
+
+        Returns
+        -------
+        instance : ProductionInstance
+            The updated copy; the hours matrix is shared with the original
+        """
+        profits = np.array(self.productProfits)
+        for product, profit in (productProfits or {}).items():
+            profits[self.productIndex[product]] = profit
+
+        availableHours = np.array(self.plantAvailableHours)
+        for plant, hours in (plantAvailableHours or {}).items():
+            availableHours[self.plantIndex[plant]] = hours
+
+        return ProductionInstance(self.productNames, self.plantNames, profits, self.plantProductHours, availableHours,
+                                  self.productUpperBounds)
+
+    def save(self, filePath) -> None:
+        """
+        Save the instance to an uncompressed `.npz` file that `ProductionInstance.load` can memory-map.
+
+        Parameters
+        ----------
+        filePath : str
+            The path to the `.npz` file
+        """
+        hours = self.plantProductHours
+        saveArrays(filePath, {"productNames": np.array(self.productNames, dtype=str),
+                              "plantNames": np.array(self.plantNames, dtype=str),
+                              "productProfits": self.productProfits,
+                              "plantAvailableHours": self.plantAvailableHours,
+                              "productUpperBounds": self.productUpperBounds,
+                              "hoursData": hours.data,
+                              "hoursIndices": hours.indices,
+                              "hoursIndptr": hours.indptr})
+
+    @classmethod
+    def load(cls, filePath, mmap=True) -> "ProductionInstance":
+        """
+        Load an instance saved by `ProductionInstance.save`.
+
+        Parameters
+        ----------
+        filePath : str
+            The path to the `.npz` file
+        mmap : bool, optional
+            If True, the numeric arrays are memory-mapped instead of read into memory
+
+        Returns
+        -------
+        instance : ProductionInstance
+            The loaded instance
+        """
+        arrays = loadArrays(filePath, mmap=mmap)
+
+        productNames = arrays["productNames"].tolist()
+        plantNames = arrays["plantNames"].tolist()
+        hours = sp.csr_matrix((arrays["hoursData"], arrays["hoursIndices"], arrays["hoursIndptr"]),
+                              shape=(len(plantNames), len(productNames)))
+
+        return cls(productNames, plantNames, arrays["productProfits"], hours, arrays["plantAvailableHours"],
+                   arrays.get("productUpperBounds"))
+
+
+def stackInstances(instances) -> ProductionInstance:
+    """
+    Stack several instances, e.g. one per week or per site, into one multi-period instance.
+
+    The hours matrix is block diagonal, so the stacked model is the separate models side by
+    side in one Gurobi model; linking constraints (shared capacity, inventory) can be added on
+    top of it. Products and plants are renamed `name[key]`.
+
+    Parameters
+    ----------
+    instances : dict
+        - Keys: period (or sheet) names
+        - Values: ProductionInstance
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The stacked instance; use `splitValues` to split its solution by period
+    """
+    productNames = [f"{name}[{key}]" for key, instance in instances.items() for name in instance.productNames]
+    plantNames = [f"{name}[{key}]" for key, instance in instances.items() for name in instance.plantNames]
+
+    return ProductionInstance(productNames,
+                              plantNames,
+                              np.concatenate([instance.productProfits for instance in instances.values()]),
+                              sp.block_diag([instance.plantProductHours for instance in instances.values()],
+                                            format="csr"),
+                              np.concatenate([instance.plantAvailableHours for instance in instances.values()]),
+                              np.concatenate([instance.productUpperBounds for instance in instances.values()]))
+
+
+def splitValues(values, instances) -> dict[str, np.ndarray]:
+    """
+    Split a product-ordered vector of a stacked instance (e.g. its solution) by period.
+
+    Parameters
+    ----------
+    values : array-like, shape (total number of products,)
+        The values in the product order of `stackInstances(instances)`
+    instances : dict
+        The instances that were stacked
+
+    Returns
+    -------
+    values : dict
+        - Keys: period (or sheet) names
+        - Values: numpy.ndarray, in the product order of that period's instance
+    """
+    offsets = np.cumsum([instance.numProducts for instance in instances.values()])[:-1]
+    return dict(zip(instances, np.split(np.asarray(values), offsets)))
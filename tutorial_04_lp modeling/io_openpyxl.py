@@ -2,92 +2,247 @@
 Reading from and writing to an Excel file using openpyxl.
 """
 
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+import scipy.sparse as sp
 from openpyxl import load_workbook
 
 import constant
+from instance import ProductionInstance
+from io_utils import atomicWrite
+from layout import SheetLayout, selectSheetNames
+from profiling import instrumented
 
 
-def readDataOpenpyxl() -> tuple[dict, dict, dict]:
+def _recordNonzeros(rows, nonzeros, firstCol=1):
     """
-    Given an Excel file, read production planning data from Excel file using openpyxl.
+    Pass rows of cell values through unchanged, recording their nonzero numbers row by row in
+    compressed sparse row form.
 
-    Returns
-    -------
-    productProfits : dict
-        The profit per batch for each product
-        - Keys: product names (`Doors`, `Windows`)
-        - Values: profit per batch
-    plantProductHours : nested dict
-        The hours required to produce one batch of each product at each plant
-        - Keys: plant names (`Plant 1`, `Plant 2`, `Plant 3`)
-        - Values: dict
-            - Keys: product names (`Doors` and `Windows`)
-            - Values: hours required
-    plantAvailableHours : dict
-        The available hours at each plant
-        - Keys: plant names (`Plant 1`, `Plant 2`, `Plant 3`)
-        - Values: available hours
+    Parameters
+    ----------
+    rows : iterable of sequences
+        The cell values row by row, e.g. from `sheet.iter_rows(values_only=True)`
+    nonzeros : tuple of array.array
+        The row pointers (`"q"`, starting with a single 0), the 1-based columns (`"i"`) and the
+        values (`"d"`) of the nonzero numbers, appended to as the rows are consumed
+    firstCol : int, optional
+        The 1-based column of the first cell of each row
+
+    Yields
+    ------
+    row : sequence
+        Each row, after its numbers are recorded
     """
+    indptr, colIndices, values = nonzeros
+    for row in rows:
+        cols = [j for j, value in enumerate(row, start=firstCol) if value and type(value) in (int, float)]
+        colIndices.extend(cols)
+        values.extend([row[j - firstCol] for j in cols])
+        indptr.append(len(values))
+        yield row
 
-    # Load a workbook from DATA_PATH
-    inputBook = load_workbook(constant.DATA_PATH)
 
-    # Find the sheet in which you want to write the solution
-    inputSheet = inputBook[constant.SHEET_NAME]
+def _instanceFromNonzeros(layout, nonzeros, firstRow=1) -> ProductionInstance:
+    """
+    Pick the input blocks of a layout out of the nonzeros recorded by `_recordNonzeros` from
+    row `firstRow` on; the hours matrix is built from them directly, without a dense copy.
+    """
+    indptr, colIndices, values = (np.frombuffer(array, dtype=dtype) if len(array) else np.zeros(0, dtype=dtype)
+                                  for array, dtype in zip(nonzeros, (np.int64, np.int32, float)))
+    numRecorded = indptr.size - 1
+
+    def block(startRow, startCol, numRows, numCols):
+        # The recorded rows of the block, padded with empty rows if the sheet ends first
+        start = min(startRow - firstRow, numRecorded)
+        end = min(start + numRows, numRecorded)
+        rowPtr = indptr[start:end + 1]
+        rowPtr = np.concatenate([rowPtr, np.full(numRows - (end - start), rowPtr[-1])])
+
+        cols = colIndices[rowPtr[0]:rowPtr[-1]]
+        inBlock = (cols >= startCol) & (cols < startCol + numCols)
+        keptBefore = np.concatenate([[0], np.cumsum(inBlock)])
+
+        return sp.csr_matrix((values[rowPtr[0]:rowPtr[-1]][inBlock], cols[inBlock] - startCol,
+                              keptBefore[rowPtr - rowPtr[0]]),
+                             shape=(numRows, numCols))
+
+    productProfits = block(layout.profitStartRow, layout.profitStartCol, 1, layout.numProducts).toarray()[0]
+    plantAvailableHours = block(layout.hoursAvailableStartRow, layout.hoursAvailableStartCol,
+                                layout.numPlants, 1).toarray()[:, 0]
+    plantProductHours = block(layout.hoursStartRow, layout.hoursStartCol, layout.numPlants, layout.numProducts)
+
+    return ProductionInstance(layout.productNames,
+                              layout.plantNames,
+                              productProfits,
+                              plantProductHours,
+                              plantAvailableHours)
+
+
+@instrumented
+def readDataOpenpyxl(filePath=constant.DATA_PATH, workbook=None, layout=None,
+                     sheetName=constant.SHEET_NAME) -> ProductionInstance:
+    """
+    Given an Excel file, read production planning data from Excel file using openpyxl.
 
-    # Read data from the inputSheet and create dictionaries
-    productProfits = {}
-    for productName in constant.PRODUCT_NAMES:
-        colIndex = constant.INPUT_PROFIT_START_COL + constant.PRODUCT_NAMES.index(productName)
-        profitValue = inputSheet.cell(constant.INPUT_PROFIT_START_ROW, colIndex).value
-        productProfits[productName] = profitValue
+    Parameters
+    ----------
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    workbook : openpyxl.Workbook, optional
+        An already loaded workbook to read from instead of `filePath`. Load it with
+        `load_workbook(filePath)` and pass the same handle to `writeDataOpenpyxl` so that
+        one solve parses the file only once.
+    layout : SheetLayout, optional
+        Where the blocks are in the sheet. If None, the layout, including the product and plant
+        names, is taken from the defined names of the workbook, or else detected from the header
+        labels with `SheetLayout.fromRows` in the same pass that reads the data.
+    sheetName : str, optional
+        The worksheet to detect the layout in, if `layout` is None (default: `constant.SHEET_NAME`)
 
-    plantAvailableHours = {}
-    for i, plantName in enumerate(constant.PLANT_NAMES):
-        rowIndex = constant.INPUT_HOURS_AVAILABLE_START_ROW + i
-        colIndex = constant.INPUT_HOURS_AVAILABLE_START_COL
-        hours = inputSheet.cell(rowIndex, colIndex).value
-        plantAvailableHours[plantName] = hours
+    Returns
+    -------
+    instance : ProductionInstance
+        The production planning data
+        - productProfits: the profit per batch for each product (`Doors`, `Windows`)
+        - plantProductHours: the hours required to produce one batch of each product at each plant
+        - plantAvailableHours: the available hours at each plant (`Plant 1`, `Plant 2`, `Plant 3`)
+        Use `instance.toDicts()` to obtain the nested-dict form.
+    """
 
-    plantProductHours = {}
-    for i, plantName in enumerate(constant.PLANT_NAMES):
-        rowIndex = constant.INPUT_HOURS_START_ROW + i
-        hoursPerProduct = {}
-        for productName in constant.PRODUCT_NAMES:
-            colIndex = constant.INPUT_HOURS_START_COL + constant.PRODUCT_NAMES.index(productName)
-            hours = inputSheet.cell(rowIndex, colIndex).value
-            hoursPerProduct[productName] = hours
-        plantProductHours[plantName] = hoursPerProduct
+    # Load a workbook from filePath in read-only mode, which streams the sheet XML
+    # instead of building every cell object up front.
+    inputBook = workbook if workbook is not None else load_workbook(filePath, read_only=True, data_only=True)
+
+    try:
+        if layout is None:
+            layout = SheetLayout.fromDefinedNames(inputBook, sheetName)
+
+        # The numbers are recorded as the rows stream past, so the sheet is parsed only once
+        nonzeros = (array("q", [0]), array("i"), array("d"))
+        firstRow = 1
+        if layout is None:
+            # Detect the layout from the header labels; the data rows are read on the way
+            rows = inputBook[sheetName].iter_rows(values_only=True)
+            layout = SheetLayout.fromRows(_recordNonzeros(rows, nonzeros), sheetName)
+        else:
+            # Read the bounding rectangle of the input blocks
+            firstRow = min(layout.profitStartRow, layout.hoursStartRow, layout.hoursAvailableStartRow)
+            lastRow = max(layout.profitStartRow,
+                          layout.hoursStartRow + layout.numPlants - 1,
+                          layout.hoursAvailableStartRow + layout.numPlants - 1)
+            firstCol = min(layout.profitStartCol, layout.hoursStartCol, layout.hoursAvailableStartCol)
+            lastCol = max(layout.profitStartCol + layout.numProducts - 1,
+                          layout.hoursStartCol + layout.numProducts - 1,
+                          layout.hoursAvailableStartCol)
+            rows = inputBook[layout.sheetName].iter_rows(min_row=firstRow,
+                                                         max_row=lastRow,
+                                                         min_col=firstCol,
+                                                         max_col=lastCol,
+                                                         values_only=True)
+            for _ in _recordNonzeros(rows, nonzeros, firstCol):
+                pass
+    finally:
+        # Read-only workbooks keep the file open until closed
+        if workbook is None:
+            inputBook.close()
+
+    return _instanceFromNonzeros(layout, nonzeros, firstRow)
+
+
+@instrumented
+def readWorkbookOpenpyxl(filePath=constant.DATA_PATH, sheetNames=None, layout=None) -> dict[str, ProductionInstance]:
+    """
+    Read one instance per worksheet, opening the workbook only once.
 
-    return productProfits, plantProductHours, plantAvailableHours
+    Every selected sheet uses the same layout, e.g. one sheet per week or per site.
 
+    Parameters
+    ----------
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    sheetNames : str or list of str, optional
+        The sheets to read: None for all of them, a pattern such as `"Week *"`, or a list of names
+    layout : SheetLayout, optional
+        Where the blocks are in each sheet; its sheet name is ignored. If None, the layout of
+        each sheet is detected separately, so the sheets may differ in size.
 
-def writeDataOpenpyxl(soln, objVal) -> None:
+    Returns
+    -------
+    instances : dict
+        - Keys: sheet names, in workbook order (or in the order listed)
+        - Values: the instance read from that sheet
+    """
+    inputBook = load_workbook(filePath, read_only=True, data_only=True)
+    try:
+        return {sheetName: readDataOpenpyxl(workbook=inputBook,
+                                            layout=None if layout is None else layout.forSheet(sheetName),
+                                            sheetName=sheetName)
+                for sheetName in selectSheetNames(inputBook.sheetnames, sheetNames)}
+    finally:
+        inputBook.close()
+
+
+@instrumented
+def writeDataOpenpyxl(soln, objVal, instance=None, filePath=constant.DATA_PATH, workbook=None,
+                      layout=None, mipGap=None, objBound=None) -> None:
     """
     Write the solution back to the Excel file using openpyxl.
 
+    Only the output cells are updated; every other sheet and the formatting are kept. The file
+    is saved atomically, so a crash during the save never leaves a half-written workbook.
+
     Parameters
     ----------
-    soln : dict
+    soln : dict, SolutionView or array-like
         The optimal solutions
-        - Keys: variable names
-        - Values: optimal decision variable values
+        - If a dict, keys are variable names and values are optimal decision variable values
+        - If array-like, the values are in the product order of `instance`
     objVal : float
         The optimal objective function value
+    instance : ProductionInstance, optional
+        The instance that was solved; its product names fix the output order
+        (default: the product names of `layout`)
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    workbook : openpyxl.Workbook, optional
+        The (writable) workbook already loaded for reading; if given, it is updated and saved
+        to `filePath` without loading the file again
+    layout : SheetLayout, optional
+        Where the output cells are in the sheet (default: detected in the `constant.SHEET_NAME` sheet)
+    mipGap, objBound : float, optional
+        For a MIP, the relative gap and the best bound (see `getMipGap`), written with their labels
+        in the two rows below the total profit
     """
-    # Load a workbook from DATA_PATH
-    outputBook = load_workbook(constant.DATA_PATH)
+    # Reuse the workbook the reader loaded, or load it from filePath
+    outputBook = workbook if workbook is not None else load_workbook(filePath)
+
+    if layout is None:
+        layout = SheetLayout.detect(outputBook)
+
+    productNames = layout.productNames if instance is None else instance.productNames
+    if not isinstance(soln, Mapping):
+        soln = dict(zip(productNames, np.asarray(soln).tolist()))
 
     # Find the sheet to write the solution
-    outputSheet = outputBook[constant.SHEET_NAME]
+    outputSheet = outputBook[layout.sheetName]
 
     # Write the optimal solutions to the outputSheet
-    for j, product in enumerate(constant.PRODUCT_NAMES):
-        rowIndex = constant.OUTPUT_BATCHES_PRODUCED_START_ROW
-        colIndex = constant.OUTPUT_BATCHES_PRODUCED_START_COL + j
+    for j, product in enumerate(productNames):
+        rowIndex = layout.batchesProducedStartRow
+        colIndex = layout.batchesProducedStartCol + j
         outputSheet.cell(rowIndex, colIndex, soln[product])
 
-    outputSheet.cell(constant.OUTPUT_PROFIT_START_ROW, constant.OUTPUT_PROFIT_START_COL, objVal)
+    outputSheet.cell(layout.totalProfitRow, layout.totalProfitCol, objVal)
+
+    if mipGap is not None:
+        for rowOffset, (label, value) in enumerate([(constant.LABEL_MIP_GAP, mipGap),
+                                                    (constant.LABEL_OBJ_BOUND, objBound)], start=1):
+            outputSheet.cell(layout.totalProfitRow + rowOffset, layout.totalProfitCol - 1, label)
+            outputSheet.cell(layout.totalProfitRow + rowOffset, layout.totalProfitCol, value)
 
-    # Save the workbook
-    outputBook.save(constant.DATA_PATH)
+    # Save the workbook through a temporary file
+    with atomicWrite(filePath) as tmpPath:
+        outputBook.save(tmpPath)
@@ -1,83 +1,220 @@
-"""
-Reading from and writing to an Excel file using pandas.
-"""
-
-import pandas as pd
-import constant
-
-
-def readDataPandas() -> tuple[dict, dict, dict]:
-    """
-    Read production planning data from an Excel file using pandas.
-
-    Returns
-    -------
-    productProfits : dict
-        The profit per batch for each product.
-    plantProductHours : nested dict
-        The hours required to produce one batch of each product at each plant.
-    plantAvailableHours : dict
-        The available hours at each plant.
-    """
-
-    # Read data from the inputSheet.
-    data = pd.read_excel(constant.DATA_PATH, sheet_name=constant.SHEET_NAME, header=None)
-
-    # Create dictionaries based on start coordinates and list lengths.
-    productProfits = {}
-    startRow = constant.INPUT_PROFIT_START_ROW - 1
-    startCol = constant.INPUT_PROFIT_START_COL - 1
-    for j, productName in enumerate(constant.PRODUCT_NAMES):
-        profitValue = data.iloc[startRow, startCol + j]
-        productProfits[productName] = profitValue
-
-    plantAvailableHours = {}
-    startRow = constant.INPUT_HOURS_AVAILABLE_START_ROW - 1
-    startCol = constant.INPUT_HOURS_AVAILABLE_START_COL - 1
-    for i, plantName in enumerate(constant.PLANT_NAMES):
-        hours = data.iloc[startRow + i, startCol]
-        plantAvailableHours[plantName] = hours
-
-    plantProductHours = {}
-    startRow = constant.INPUT_HOURS_START_ROW - 1
-    startCol = constant.INPUT_HOURS_START_COL - 1
-    for i, plantName in enumerate(constant.PLANT_NAMES):
-        hoursPerProduct = {}
-        for j, productName in enumerate(constant.PRODUCT_NAMES):
-            hours = data.iloc[startRow + i, startCol + j]
-            hoursPerProduct[productName] = hours
-        plantProductHours[plantName] = hoursPerProduct
-
-    return productProfits, plantProductHours, plantAvailableHours
-
-
-def writeDataPandas(soln, objVal) -> None:
-    """
-    Write the solution back to the original Excel sheet using pandas.
-
-    Parameters
-    ----------
-    soln : dict
-        The optimal solutions (key is the full variable name).
-    objVal : float
-        The optimal objective function value.
-    """
-    # Read data from the inputSheet.
-    data = pd.read_excel(constant.DATA_PATH, sheet_name=constant.SHEET_NAME, header=None)
-
-    # Write the batches produced solutions.
-    startRow = constant.OUTPUT_BATCHES_PRODUCED_START_ROW - 1
-    startCol = constant.OUTPUT_BATCHES_PRODUCED_START_COL - 1
-    for j, product in enumerate(constant.PRODUCT_NAMES):
-        varName = product
-        value = soln.get(product, 0)
-        data.loc[startRow, startCol + j] = value
-
-    # Write the total profit solution.
-    profitRow = constant.OUTPUT_PROFIT_START_ROW - 1
-    profitCol = constant.OUTPUT_PROFIT_START_COL - 1
-    data.loc[profitRow, profitCol] = objVal
-
-    # Save to Excel file.
-    data.to_excel(constant.DATA_PATH, sheet_name=constant.SHEET_NAME, index=False, header=False)
-
+"""
+Reading from and writing to an Excel file using pandas.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+import constant
+from instance import ProductionInstance
+from io_utils import atomicWrite
+from layout import SheetLayout, selectSheetNames
+from profiling import instrumented
+
+
+@instrumented
+def readDataPandas(filePath=constant.DATA_PATH, layout=None, sheetName=constant.SHEET_NAME) -> ProductionInstance:
+    """
+    Read production planning data from an Excel file using pandas.
+
+    Parameters
+    ----------
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    layout : SheetLayout, optional
+        Where the blocks are in the sheet. If None, the layout, including the product and plant
+        names, is detected from the header labels with `SheetLayout.fromLabels`.
+    sheetName : str, optional
+        The worksheet to read, if `layout` is None (default: `constant.SHEET_NAME`)
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The profit per batch for each product, the hours required to produce one batch of
+        each product at each plant, and the available hours at each plant.
+    """
+    # Read data from the inputSheet.
+    data = pd.read_excel(filePath, sheet_name=sheetName if layout is None else layout.sheetName, header=None)
+
+    return _instanceFromFrame(data, layout, sheetName)
+
+
+@instrumented
+def readWorkbookPandas(filePath=constant.DATA_PATH, sheetNames=None, layout=None) -> dict[str, ProductionInstance]:
+    """
+    Read one instance per worksheet with a single `pd.read_excel` call.
+
+    Every selected sheet uses the same layout, e.g. one sheet per week or per site.
+
+    Parameters
+    ----------
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    sheetNames : str or list of str, optional
+        The sheets to read: None for all of them, a pattern such as `"Week *"`, or a list of names
+    layout : SheetLayout, optional
+        Where the blocks are in each sheet; its sheet name is ignored. If None, the layout of
+        each sheet is detected separately, so the sheets may differ in size.
+
+    Returns
+    -------
+    instances : dict
+        - Keys: sheet names, in workbook order (or in the order listed)
+        - Values: the instance read from that sheet
+    """
+    # Parse the workbook once; the sheet names are only known after opening it.
+    with pd.ExcelFile(filePath, engine="openpyxl") as excelFile:
+        selectedNames = selectSheetNames(excelFile.sheet_names, sheetNames)
+        frames = pd.read_excel(excelFile, sheet_name=selectedNames, header=None)
+
+    return {sheetName: _instanceFromFrame(frames[sheetName], None if layout is None else layout.forSheet(sheetName),
+                                          sheetName)
+            for sheetName in selectedNames}
+
+
+def _instanceFromFrame(data, layout, sheetName) -> ProductionInstance:
+    """
+    Slice the input blocks out of a sheet read with `header=None`, detecting the layout if it is None.
+    """
+    if layout is None:
+        layout = SheetLayout.fromLabels(data.to_numpy(dtype=object), sheetName)
+
+    numProducts = layout.numProducts
+    numPlants = layout.numPlants
+
+    # Slice each block based on start coordinates and list lengths.
+    startRow = layout.profitStartRow - 1
+    startCol = layout.profitStartCol - 1
+    productProfits = data.iloc[startRow, startCol:startCol + numProducts].to_numpy(dtype=float)
+
+    startRow = layout.hoursAvailableStartRow - 1
+    startCol = layout.hoursAvailableStartCol - 1
+    plantAvailableHours = data.iloc[startRow:startRow + numPlants, startCol].to_numpy(dtype=float)
+
+    startRow = layout.hoursStartRow - 1
+    startCol = layout.hoursStartCol - 1
+    plantProductHours = data.iloc[startRow:startRow + numPlants,
+                                  startCol:startCol + numProducts].fillna(0).to_numpy(dtype=float)
+
+    return ProductionInstance(layout.productNames,
+                              layout.plantNames,
+                              productProfits,
+                              plantProductHours,
+                              plantAvailableHours)
+
+
+@instrumented
+def writeDataPandas(soln, objVal, instance=None, filePath=constant.DATA_PATH, layout=None, mipGap=None,
+                    objBound=None) -> None:
+    """
+    Write the solution back to the original Excel sheet using pandas.
+
+    Only the output ranges are updated; the other sheets and the formatting are kept, and the
+    file is replaced atomically once the new content is complete.
+
+    Parameters
+    ----------
+    soln : dict, SolutionView or array-like
+        The optimal solutions (key is the full variable name), or the values in the product
+        order of `instance`.
+    objVal : float
+        The optimal objective function value.
+    instance : ProductionInstance, optional
+        The instance that was solved (default product order: the product names of `layout`).
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`).
+    layout : SheetLayout, optional
+        Where the output cells are in the sheet (default: detected in the `constant.SHEET_NAME` sheet).
+    mipGap, objBound : float, optional
+        For a MIP, the relative gap and the best bound (see `getMipGap`), written with their labels
+        in the two rows below the total profit.
+    """
+    # Update a copy of the workbook in place ("overlay"), which keeps the other sheets and the
+    # formatting, then atomically replace the original file with it.
+    with atomicWrite(filePath, copyExisting=True) as tmpPath:
+        with pd.ExcelWriter(tmpPath, engine="openpyxl", mode="a", if_sheet_exists="overlay") as writer:
+            # The writer has already loaded the workbook, so the layout is detected from it.
+            if layout is None:
+                layout = SheetLayout.detect(writer.book)
+
+            productNames = layout.productNames if instance is None else instance.productNames
+            if not isinstance(soln, Mapping):
+                soln = dict(zip(productNames, np.asarray(soln).tolist()))
+
+            # Only the output ranges are written, as small frames placed at their start coordinates.
+            batchesProduced = pd.DataFrame([[soln.get(product, 0) for product in productNames]])
+            totalProfit = pd.DataFrame([[objVal]])
+
+            # Write the batches produced solutions.
+            batchesProduced.to_excel(writer,
+                                     sheet_name=layout.sheetName,
+                                     startrow=layout.batchesProducedStartRow - 1,
+                                     startcol=layout.batchesProducedStartCol - 1,
+                                     index=False,
+                                     header=False)
+
+            # Write the total profit solution.
+            totalProfit.to_excel(writer,
+                                 sheet_name=layout.sheetName,
+                                 startrow=layout.totalProfitRow - 1,
+                                 startcol=layout.totalProfitCol - 1,
+                                 index=False,
+                                 header=False)
+
+            # Write the MIP gap and best bound, with their labels.
+            if mipGap is not None:
+                mipReport = pd.DataFrame([[constant.LABEL_MIP_GAP, mipGap], [constant.LABEL_OBJ_BOUND, objBound]])
+                mipReport.to_excel(writer,
+                                   sheet_name=layout.sheetName,
+                                   startrow=layout.totalProfitRow,
+                                   startcol=layout.totalProfitCol - 2,
+                                   index=False,
+                                   header=False)
+
+
+def writeSensitivityPandas(constrReport, varReport, filePath=constant.DATA_PATH) -> None:
+    """
+    Write the sensitivity report to two sheets of the Excel file using pandas.
+
+    The sheets are replaced if they already exist; the other sheets are kept, and the file is
+    replaced atomically once the new content is complete.
+
+    Parameters
+    ----------
+    constrReport : pandas.DataFrame
+        The constraint report returned by `getSensitivityReport`.
+    varReport : pandas.DataFrame
+        The variable report returned by `getSensitivityReport`.
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`).
+    """
+    with atomicWrite(filePath, copyExisting=True) as tmpPath:
+        with pd.ExcelWriter(tmpPath, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+            constrReport.to_excel(writer, sheet_name=constant.SENSITIVITY_CONSTR_SHEET_NAME)
+            varReport.to_excel(writer, sheet_name=constant.SENSITIVITY_VAR_SHEET_NAME)
+
+
+def writeParametricPandas(curves, filePath=constant.DATA_PATH, sheetName=constant.PARAMETRIC_SHEET_NAME) -> None:
+    """
+    Write parametric curves to one sheet of the Excel file using pandas, one row per breakpoint.
+
+    The sheet is replaced if it already exists; the other sheets are kept, and the file is
+    replaced atomically once the new content is complete.
+
+    Parameters
+    ----------
+    curves : dict or list of ParametricCurve
+        The curves returned by `sweepAvailableHours` or `sweepProfits`.
+    filePath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`).
+    sheetName : str, optional
+        The worksheet name (default: `constant.PARAMETRIC_SHEET_NAME`).
+    """
+    curves = curves.values() if isinstance(curves, dict) else curves
+    table = pd.concat([curve.toFrame() for curve in curves], ignore_index=True)
+
+    with atomicWrite(filePath, copyExisting=True) as tmpPath:
+        with pd.ExcelWriter(tmpPath, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
+            table.to_excel(writer, sheet_name=sheetName, index=False)
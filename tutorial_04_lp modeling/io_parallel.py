@@ -0,0 +1,117 @@
+"""
+Read many workbooks concurrently in a process pool, streaming the instances back as they are parsed.
+"""
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import constant
+from io_openpyxl import readDataOpenpyxl
+
+
+def _readOne(reader, filePath, readerKwargs) -> tuple:
+    """
+    Read one workbook in a worker, turning any error into a message so that it cannot break the pool.
+    """
+    try:
+        return filePath, reader(filePath, **readerKwargs), None
+    except Exception as error:
+        return filePath, None, f"{type(error).__name__}: {error}"
+
+
+def readWorkbooksParallel(filePaths, reader=readDataOpenpyxl, maxWorkers=constant.PARALLEL_READ_MAX_WORKERS,
+                          maxPending=constant.PARALLEL_READ_MAX_PENDING, useThreads=False, **readerKwargs):
+    """
+    Parse workbooks concurrently and yield each instance as soon as it is read.
+
+    Openpyxl spends most of its time parsing XML in Python, so processes, not threads, are what
+    make the files parse in parallel. At most `maxPending` files are submitted and not yet consumed:
+    a slow consumer (e.g. one that builds and solves each model) holds the workers back instead
+    of letting parsed instances pile up in memory.
+
+    Parameters
+    ----------
+    filePaths : iterable of str
+        The paths to the Excel files; read lazily, so it may be a generator
+    reader : callable, optional
+        A module-level reader taking the file path, e.g. `readDataOpenpyxl` (default), `readDataPandas`
+        or `readDataCached`
+    maxWorkers : int, optional
+        The number of worker processes (default: `constant.PARALLEL_READ_MAX_WORKERS`)
+    maxPending : int, optional
+        The maximum number of files in flight (default: `constant.PARALLEL_READ_MAX_PENDING`)
+    useThreads : bool, optional
+        If True, use threads instead of processes, e.g. for readers that mostly wait on I/O
+    **readerKwargs
+        Passed to `reader`, e.g. `layout`
+
+    Yields
+    ------
+    filePath : str
+        The path of the file
+    instance : ProductionInstance or None
+        The instance read, or None if reading failed
+    error : str or None
+        The error message if reading failed; a failing file never stops the other files
+    """
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+    if maxPending is None:
+        maxPending = 2 * maxWorkers
+
+    executorClass = ThreadPoolExecutor if useThreads else ProcessPoolExecutor
+    executor = executorClass(max_workers=maxWorkers)
+
+    filePaths = iter(filePaths)
+    pending = {}
+
+    try:
+        while True:
+            # Keep up to maxPending files in flight.
+            for filePath in filePaths:
+                pending[executor.submit(_readOne, reader, filePath, readerKwargs)] = filePath
+                if len(pending) >= maxPending:
+                    break
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                filePath = pending.pop(future)
+                error = future.exception()  # e.g. a worker process died
+                if error is None:
+                    yield future.result()
+                else:
+                    yield filePath, None, f"{type(error).__name__}: {error}"
+    finally:
+        # Runs also when the consumer stops early: drop the files not started yet.
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main():
+    """
+    Main function
+    """
+    parser = argparse.ArgumentParser(description="Read Wyndor workbooks in parallel.")
+    parser.add_argument("path", help="a directory of .xlsx workbooks")
+    parser.add_argument("--workers", type=int, default=constant.PARALLEL_READ_MAX_WORKERS,
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    filePaths = sorted(glob.glob(os.path.join(args.path, "*.xlsx")))
+
+    startTime = time.perf_counter()
+    for filePath, instance, error in readWorkbooksParallel(filePaths, maxWorkers=args.workers):
+        if error is None:
+            print(f"{filePath}: {instance.numProducts} products, {instance.numPlants} plants")
+        else:
+            print(f"{filePath}: {error}")
+    print(f"Read {len(filePaths)} workbooks in {time.perf_counter() - startTime:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Reading from and writing to CSV, Parquet and Arrow IPC tables using pandas.
+
+An instance is a directory with three tables, in the format given by the file extension:
+- `products`: product, profit and, optionally, upperBound
+- `plants`: plant, availableHours
+- `hours`: plant, product, hours (the nonzero hours only, one row per entry)
+
+The writers add a `solution` table (product, batches) and a `summary` table (totalProfit and, for
+a MIP, mipGap and objBound).
+Parquet and Arrow need pyarrow; CSV uses the pyarrow parser when it is installed.
+"""
+
+import os
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import constant
+from instance import ProductionInstance
+from io_openpyxl import readDataOpenpyxl
+from io_utils import atomicWrite
+from profiling import instrumented
+
+FILE_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _tablePath(filePath, tableName, fileFormat) -> str:
+    """
+    The path of one table of a tabular data directory.
+    """
+    if fileFormat not in FILE_EXTENSIONS:
+        raise ValueError(f"Unknown tabular format {fileFormat!r}, expected one of {list(FILE_EXTENSIONS)}")
+
+    return os.path.join(filePath, tableName + FILE_EXTENSIONS[fileFormat])
+
+
+def _readTable(filePath, tableName, fileFormat) -> pd.DataFrame:
+    """
+    Read one table of a tabular data directory.
+    """
+    tablePath = _tablePath(filePath, tableName, fileFormat)
+
+    if fileFormat == "parquet":
+        return pd.read_parquet(tablePath)
+    if fileFormat == "arrow":
+        return pd.read_feather(tablePath)
+
+    try:
+        import pyarrow  # noqa: F401 (the multithreaded CSV parser, if available)
+        engine = "pyarrow"
+    except ImportError:
+        engine = "c"
+    return pd.read_csv(tablePath, engine=engine)
+
+
+def _writeTable(table, filePath, tableName, fileFormat) -> None:
+    """
+    Write one table of a tabular data directory, atomically.
+    """
+    tablePath = _tablePath(filePath, tableName, fileFormat)
+    os.makedirs(filePath, exist_ok=True)
+
+    with atomicWrite(tablePath) as tmpPath:
+        if fileFormat == "parquet":
+            table.to_parquet(tmpPath, index=False)
+        elif fileFormat == "arrow":
+            table.to_feather(tmpPath)
+        else:
+            table.to_csv(tmpPath, index=False)
+
+
+@instrumented
+def readDataTabular(filePath=constant.TABULAR_PATH, fileFormat=constant.TABULAR_FORMAT) -> ProductionInstance:
+    """
+    Read production planning data from a directory of CSV, Parquet or Arrow IPC tables.
+
+    Parameters
+    ----------
+    filePath : str, optional
+        The data directory (default: `constant.TABULAR_PATH`)
+    fileFormat : str, optional
+        `csv`, `parquet` or `arrow` (default: `constant.TABULAR_FORMAT`)
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The profit per batch for each product, the hours required to produce one batch of
+        each product at each plant, and the available hours at each plant.
+
+    Raises
+    ------
+    KeyError
+        If the hours table names a product or plant missing from the other tables
+    """
+    products = _readTable(filePath, "products", fileFormat)
+    plants = _readTable(filePath, "plants", fileFormat)
+    hours = _readTable(filePath, "hours", fileFormat)
+
+    productNames = products["product"].astype(str).tolist()
+    plantNames = plants["plant"].astype(str).tolist()
+
+    # Map the names in the long table to matrix indices in one vectorized lookup.
+    rows = pd.Index(plantNames).get_indexer(hours["plant"].astype(str))
+    cols = pd.Index(productNames).get_indexer(hours["product"].astype(str))
+    if (rows < 0).any() or (cols < 0).any():
+        unknown = hours.loc[(rows < 0) | (cols < 0), ["plant", "product"]].head().values.tolist()
+        raise KeyError(f"The hours table names unknown plants or products, e.g. {unknown}")
+
+    plantProductHours = sp.csr_matrix((hours["hours"].to_numpy(dtype=float), (rows, cols)),
+                                      shape=(len(plantNames), len(productNames)))
+
+    return ProductionInstance(productNames,
+                              plantNames,
+                              products["profit"].to_numpy(dtype=float),
+                              plantProductHours,
+                              plants["availableHours"].to_numpy(dtype=float),
+                              products["upperBound"].to_numpy(dtype=float) if "upperBound" in products else None)
+
+
+def writeInstanceTabular(instance, filePath=constant.TABULAR_PATH, fileFormat=constant.TABULAR_FORMAT) -> None:
+    """
+    Write an instance as a directory of CSV, Parquet or Arrow IPC tables.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance to write
+    filePath : str, optional
+        The data directory, created if needed (default: `constant.TABULAR_PATH`)
+    fileFormat : str, optional
+        `csv`, `parquet` or `arrow` (default: `constant.TABULAR_FORMAT`)
+    """
+    products = pd.DataFrame({"product": instance.productNames, "profit": instance.productProfits})
+    if np.isfinite(instance.productUpperBounds).any():
+        products["upperBound"] = instance.productUpperBounds
+
+    plants = pd.DataFrame({"plant": instance.plantNames, "availableHours": instance.plantAvailableHours})
+
+    coo = instance.plantProductHours.tocoo()
+    hours = pd.DataFrame({"plant": np.asarray(instance.plantNames, dtype=object)[coo.row],
+                          "product": np.asarray(instance.productNames, dtype=object)[coo.col],
+                          "hours": coo.data})
+
+    _writeTable(products, filePath, "products", fileFormat)
+    _writeTable(plants, filePath, "plants", fileFormat)
+    _writeTable(hours, filePath, "hours", fileFormat)
+
+
+@instrumented
+def writeDataTabular(soln, objVal, instance=None, filePath=constant.TABULAR_PATH,
+                     fileFormat=constant.TABULAR_FORMAT, mipGap=None, objBound=None) -> None:
+    """
+    Write the solution to the `solution` and `summary` tables of a tabular data directory.
+
+    Parameters
+    ----------
+    soln : dict, SolutionView or array-like
+        The optimal solutions (key is the full variable name), or the values in the product
+        order of `instance`.
+    objVal : float
+        The optimal objective function value.
+    instance : ProductionInstance, optional
+        The instance that was solved (default: read from the `products` table of `filePath`).
+    filePath : str, optional
+        The data directory (default: `constant.TABULAR_PATH`).
+    fileFormat : str, optional
+        `csv`, `parquet` or `arrow` (default: `constant.TABULAR_FORMAT`).
+    mipGap, objBound : float, optional
+        For a MIP, the relative gap and the best bound (see `getMipGap`), added to the summary table.
+    """
+    if instance is None:
+        productNames = _readTable(filePath, "products", fileFormat)["product"].astype(str).tolist()
+    else:
+        productNames = instance.productNames
+
+    if isinstance(soln, Mapping):
+        batches = [soln.get(product, 0) for product in productNames]
+    else:
+        batches = np.asarray(soln, dtype=float)
+
+    _writeTable(pd.DataFrame({"product": productNames, "batches": batches}), filePath, "solution", fileFormat)
+    summary = pd.DataFrame({"totalProfit": [objVal]})
+    if mipGap is not None:
+        summary["mipGap"] = [mipGap]
+        summary["objBound"] = [objBound]
+    _writeTable(summary, filePath, "summary", fileFormat)
+
+
+def convertWorkbook(workbookPath=constant.DATA_PATH, filePath=constant.TABULAR_PATH,
+                    fileFormat=constant.TABULAR_FORMAT, layout=None) -> ProductionInstance:
+    """
+    Convert a workbook in the Excel layout to a directory of tables.
+
+    Parameters
+    ----------
+    workbookPath : str, optional
+        The path to the Excel file (default: `constant.DATA_PATH`)
+    filePath : str, optional
+        The data directory to write (default: `constant.TABULAR_PATH`)
+    fileFormat : str, optional
+        `csv`, `parquet` or `arrow` (default: `constant.TABULAR_FORMAT`)
+    layout : SheetLayout, optional
+        Where the blocks are in the sheet (default: detected)
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The converted instance
+    """
+    instance = readDataOpenpyxl(workbookPath, layout=layout)
+    writeInstanceTabular(instance, filePath, fileFormat)
+
+    return instance
@@ -0,0 +1,138 @@
+"""
+File helpers shared by the readers and writers.
+"""
+
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+
+
+@contextmanager
+def atomicWrite(filePath, copyExisting=False):
+    """
+    Write a file through a temporary file in the same directory, then rename it over `filePath`.
+
+    Readers never see a half-written file: either the rename happens and the new content is
+    complete, or an exception is raised and the original file is left untouched.
+
+    Parameters
+    ----------
+    filePath : str
+        The path of the file to (over)write
+    copyExisting : bool, optional
+        If True, start from a copy of the existing file, for writers that update a file in place
+
+    Yields
+    ------
+    tmpPath : str
+        The temporary path to write to
+    """
+    directory = os.path.dirname(os.path.abspath(filePath))
+    suffix = os.path.splitext(filePath)[1]
+    fd, tmpPath = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    os.close(fd)
+
+    try:
+        if copyExisting and os.path.exists(filePath):
+            shutil.copyfile(filePath, tmpPath)
+
+        yield tmpPath
+
+        # Make sure the content is on disk before the rename makes it visible.
+        with open(tmpPath, "rb+") as tmpFile:
+            os.fsync(tmpFile.fileno())
+
+        # mkstemp creates the file readable by its owner only: keep the mode of the file being
+        # replaced, or give a new file the mode `open` would have given it.
+        if os.path.exists(filePath):
+            shutil.copymode(filePath, tmpPath)
+        else:
+            os.chmod(tmpPath, 0o666 & ~_umask())
+
+        os.replace(tmpPath, filePath)
+    finally:
+        if os.path.exists(tmpPath):
+            os.remove(tmpPath)
+
+
+def _umask() -> int:
+    """
+    The umask of the process; `os.umask` only reads it by setting it, so it is restored at once.
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def saveArrays(filePath, arrays) -> None:
+    """
+    Save a dict of NumPy arrays to an uncompressed `.npz` file, atomically.
+
+    The members are stored without compression so that `loadArrays` can memory-map them.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the `.npz` file
+    arrays : dict
+        - Keys: array names
+        - Values: numpy.ndarray (numeric or fixed-width string dtype)
+    """
+    with atomicWrite(filePath) as tmpPath:
+        with open(tmpPath, "wb") as tmpFile:
+            np.savez(tmpFile, **arrays)
+
+
+def loadArrays(filePath, mmap=True) -> dict:
+    """
+    Load the arrays saved by `saveArrays`.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the `.npz` file
+    mmap : bool, optional
+        If True, memory-map each member (copy-on-write) instead of reading it into memory
+
+    Returns
+    -------
+    arrays : dict
+        - Keys: array names
+        - Values: numpy.ndarray (or numpy.memmap)
+    """
+    if not mmap:
+        with np.load(filePath) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+    with zipfile.ZipFile(filePath) as archive, open(filePath, "rb") as file:
+        for info in archive.infolist():
+            name = info.filename[:-len(".npy")]
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(archive.open(info))
+                continue
+
+            # Skip the local file header to reach the .npy member, then its own header.
+            file.seek(info.header_offset)
+            localHeader = file.read(30)
+            nameLength, extraLength = struct.unpack("<HH", localHeader[26:30])
+            file.seek(info.header_offset + 30 + nameLength + extraLength)
+
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(file)
+
+            if dtype.hasobject or np.prod(shape) == 0:
+                arrays[name] = np.load(archive.open(info))
+            else:
+                arrays[name] = np.memmap(filePath, dtype=dtype, mode="c", offset=file.tell(), shape=shape,
+                                         order="F" if fortranOrder else "C")
+
+    return arrays
@@ -0,0 +1,461 @@
+"""
+Location of the input and output blocks in a production planning worksheet.
+"""
+
+import math
+from dataclasses import dataclass, replace
+from fnmatch import fnmatchcase
+
+from openpyxl.utils import range_boundaries
+
+import constant
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """
+    Where the readers and writers find each block. Rows and columns are 1-based, as in Excel.
+
+    Attributes
+    ----------
+    sheetName : str
+        The worksheet name
+    productNames : tuple of str
+        The product names, in column order
+    plantNames : tuple of str
+        The plant names, in row order
+    profitStartRow, profitStartCol : int
+        The first cell of the profit per batch row
+    hoursStartRow, hoursStartCol : int
+        The top-left cell of the hours used per batch matrix (plants x products)
+    hoursAvailableStartRow, hoursAvailableStartCol : int
+        The first cell of the hours available column
+    batchesProducedStartRow, batchesProducedStartCol : int
+        The first cell of the batches produced output row
+    totalProfitRow, totalProfitCol : int
+        The total profit output cell
+    """
+
+    sheetName: str
+    productNames: tuple
+    plantNames: tuple
+    profitStartRow: int
+    profitStartCol: int
+    hoursStartRow: int
+    hoursStartCol: int
+    hoursAvailableStartRow: int
+    hoursAvailableStartCol: int
+    batchesProducedStartRow: int
+    batchesProducedStartCol: int
+    totalProfitRow: int
+    totalProfitCol: int
+
+    @property
+    def numProducts(self) -> int:
+        """The number of products."""
+        return len(self.productNames)
+
+    @property
+    def numPlants(self) -> int:
+        """The number of plants."""
+        return len(self.plantNames)
+
+    def forSheet(self, sheetName) -> "SheetLayout":
+        """
+        The same layout on another worksheet.
+
+        Parameters
+        ----------
+        sheetName : str
+            The worksheet name
+
+        Returns
+        -------
+        layout : SheetLayout
+            The layout
+        """
+        return replace(self, sheetName=sheetName)
+
+    @classmethod
+    def default(cls) -> "SheetLayout":
+        """
+        The layout described by the constants in `constant.py` (the Wyndor workbook).
+
+        Returns
+        -------
+        layout : SheetLayout
+            The default layout
+        """
+        return cls(sheetName=constant.SHEET_NAME,
+                   productNames=tuple(constant.PRODUCT_NAMES),
+                   plantNames=tuple(constant.PLANT_NAMES),
+                   profitStartRow=constant.INPUT_PROFIT_START_ROW,
+                   profitStartCol=constant.INPUT_PROFIT_START_COL,
+                   hoursStartRow=constant.INPUT_HOURS_START_ROW,
+                   hoursStartCol=constant.INPUT_HOURS_START_COL,
+                   hoursAvailableStartRow=constant.INPUT_HOURS_AVAILABLE_START_ROW,
+                   hoursAvailableStartCol=constant.INPUT_HOURS_AVAILABLE_START_COL,
+                   batchesProducedStartRow=constant.OUTPUT_BATCHES_PRODUCED_START_ROW,
+                   batchesProducedStartCol=constant.OUTPUT_BATCHES_PRODUCED_START_COL,
+                   totalProfitRow=constant.OUTPUT_PROFIT_START_ROW,
+                   totalProfitCol=constant.OUTPUT_PROFIT_START_COL)
+
+    @classmethod
+    def fromLabels(cls, rows, sheetName=constant.SHEET_NAME) -> "SheetLayout":
+        """
+        Detect the layout by scanning the sheet once for its header labels.
+
+        The profit row is labelled `constant.LABEL_PROFIT`, with the product names in the row
+        above it; the plant names run down the same label column below the hours available header
+        (`constant.LABEL_HOURS_AVAILABLE`), which also heads the hours available column. The outputs
+        are found from `constant.LABEL_BATCHES_PRODUCED` and `constant.LABEL_TOTAL_PROFIT`.
+        Labels are matched case-insensitively.
+
+        Parameters
+        ----------
+        rows : sequence of sequences
+            The cell values row by row, starting at A1, e.g. `list(sheet.iter_rows(values_only=True))`
+            or `dataFrame.to_numpy(dtype=object)`; empty cells are None or NaN
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+
+        Returns
+        -------
+        layout : SheetLayout
+            The detected layout
+
+        Raises
+        ------
+        ValueError
+            If a label is missing, or there are no products or plants
+        """
+        labels = {}
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                if isinstance(value, str):
+                    labels.setdefault(value.strip().lower(), (i, j))
+
+        def findLabel(label):
+            label = label.lower()
+            for text, position in labels.items():
+                if text == label or text.endswith(" " + label):
+                    return position
+            raise ValueError(f"Label {label!r} not found in sheet {sheetName!r}")
+
+        # 0-based positions of the labels
+        profitRow, labelCol = findLabel(constant.LABEL_PROFIT)
+        availableRow, availableCol = findLabel(constant.LABEL_HOURS_AVAILABLE)
+        outputRow, outputLabelCol = findLabel(constant.LABEL_BATCHES_PRODUCED)
+        totalProfitRow, totalProfitCol = findLabel(constant.LABEL_TOTAL_PROFIT)
+
+        productNames = _readNames(rows[profitRow - 1][labelCol + 1:]) if profitRow > 0 else []
+        plantNames = _readNames([row[labelCol] if labelCol < len(row) else None for row in rows[availableRow + 1:]])
+        if not productNames or not plantNames:
+            raise ValueError(f"No product or plant names found in sheet {sheetName!r}")
+
+        return cls(sheetName=sheetName,
+                   productNames=tuple(productNames),
+                   plantNames=tuple(plantNames),
+                   profitStartRow=profitRow + 1,
+                   profitStartCol=labelCol + 2,
+                   hoursStartRow=availableRow + 2,
+                   hoursStartCol=labelCol + 2,
+                   hoursAvailableStartRow=availableRow + 2,
+                   hoursAvailableStartCol=availableCol + 1,
+                   batchesProducedStartRow=outputRow + 1,
+                   batchesProducedStartCol=outputLabelCol + 2,
+                   totalProfitRow=totalProfitRow + 2,
+                   totalProfitCol=totalProfitCol + 1)
+
+    @classmethod
+    def fromSheet(cls, sheet, sheetName=constant.SHEET_NAME,
+                  maxHeaderRows=constant.LAYOUT_MAX_HEADER_ROWS) -> "SheetLayout":
+        """
+        Detect the layout from the header labels of an openpyxl worksheet, streaming it once and
+        only down to the outputs (see `fromRows`).
+
+        Parameters
+        ----------
+        sheet : openpyxl worksheet
+            The worksheet (a read-only worksheet is streamed row by row)
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+        maxHeaderRows : int, optional
+            The number of rows from the top searched for the profit and hours available labels
+            (default: `constant.LAYOUT_MAX_HEADER_ROWS`)
+
+        Returns
+        -------
+        layout : SheetLayout
+            The detected layout
+        """
+        return cls.fromRows(sheet.iter_rows(values_only=True), sheetName, maxHeaderRows)
+
+    @classmethod
+    def fromRows(cls, rows, sheetName=constant.SHEET_NAME,
+                 maxHeaderRows=constant.LAYOUT_MAX_HEADER_ROWS) -> "SheetLayout":
+        """
+        Detect the layout from a stream of rows without keeping the data blocks.
+
+        The rows are consumed from the top until the profit and hours available labels are found,
+        and then down to the batches produced label, keeping only the label cell of each plant
+        row; the rest of the stream is left unread. The labels are then located as in
+        `fromLabels`, so a sheet of thousands of products and plants is never held in memory.
+        A reader can pick the data out of the rows as they stream past (see `readDataOpenpyxl`).
+
+        Parameters
+        ----------
+        rows : iterable of sequences
+            The cell values row by row, starting at A1, e.g. `sheet.iter_rows(values_only=True)`
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+        maxHeaderRows : int, optional
+            The number of rows from the top searched for the profit and hours available labels
+            (default: `constant.LAYOUT_MAX_HEADER_ROWS`)
+
+        Returns
+        -------
+        layout : SheetLayout
+            The detected layout
+
+        Raises
+        ------
+        ValueError
+            If a label is missing, or there are no products or plants
+        """
+        rows = iter(rows)
+
+        # Full rows from the top, down to the row of the later of the two header labels
+        kept = []
+        labelCol = availableRow = None
+        for row in rows:
+            kept.append(row)
+            for j, value in enumerate(row):
+                if labelCol is None and _matchesLabel(value, constant.LABEL_PROFIT):
+                    labelCol = j
+                if availableRow is None and _matchesLabel(value, constant.LABEL_HOURS_AVAILABLE):
+                    availableRow = len(kept) - 1
+            if labelCol is not None and availableRow is not None:
+                break
+            if len(kept) >= maxHeaderRows:
+                # Let fromLabels report the missing label
+                return cls.fromLabels(kept, sheetName)
+        else:
+            return cls.fromLabels(kept, sheetName)
+
+        # Below them, only the label cell of each plant row, then full rows from the end of the
+        # plant names down to the batches produced label, so that the output labels are found
+        # wherever they are.
+        inPlants = True
+        for row in rows:
+            value = row[labelCol] if labelCol < len(row) else None
+            if inPlants and _isEmpty(value):
+                inPlants = False
+            kept.append((None,) * labelCol + (value,) if inPlants else row)
+            if _matchesLabel(value, constant.LABEL_BATCHES_PRODUCED):
+                break
+
+        return cls.fromLabels(kept, sheetName)
+
+    @classmethod
+    def fromDefinedNames(cls, workbook, sheetName=constant.SHEET_NAME):
+        """
+        Build the layout from the Excel defined names of an openpyxl workbook, if it has them.
+
+        The names are listed in `constant.py` (`DEFINED_NAME_*`). The product and plant names are
+        read from the `Products` and `Plants` ranges; every block starts at the top-left cell of its
+        range.
+
+        Parameters
+        ----------
+        workbook : openpyxl.Workbook
+            The workbook (a read-only workbook also works)
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+
+        Returns
+        -------
+        layout : SheetLayout or None
+            The layout, or None if any of the names is not defined for this sheet
+        """
+        definedNames = {"products": constant.DEFINED_NAME_PRODUCTS,
+                        "plants": constant.DEFINED_NAME_PLANTS,
+                        "profits": constant.DEFINED_NAME_PROFITS,
+                        "hours": constant.DEFINED_NAME_HOURS,
+                        "hoursAvailable": constant.DEFINED_NAME_HOURS_AVAILABLE,
+                        "batchesProduced": constant.DEFINED_NAME_BATCHES_PRODUCED,
+                        "totalProfit": constant.DEFINED_NAME_TOTAL_PROFIT}
+
+        # (minCol, minRow, maxCol, maxRow) of each range, 1-based
+        bounds = {}
+        for key, name in definedNames.items():
+            definedName = workbook.defined_names.get(name)
+            destinations = list(definedName.destinations) if definedName is not None else []
+            if len(destinations) != 1 or destinations[0][0] != sheetName:
+                return None
+            bounds[key] = range_boundaries(destinations[0][1].replace("$", ""))
+
+        def readRange(key):
+            minCol, minRow, maxCol, maxRow = bounds[key]
+            rows = workbook[sheetName].iter_rows(min_row=minRow, max_row=maxRow, min_col=minCol, max_col=maxCol,
+                                                 values_only=True)
+            return _readNames([value for row in rows for value in row])
+
+        return cls(sheetName=sheetName,
+                   productNames=tuple(readRange("products")),
+                   plantNames=tuple(readRange("plants")),
+                   profitStartRow=bounds["profits"][1],
+                   profitStartCol=bounds["profits"][0],
+                   hoursStartRow=bounds["hours"][1],
+                   hoursStartCol=bounds["hours"][0],
+                   hoursAvailableStartRow=bounds["hoursAvailable"][1],
+                   hoursAvailableStartCol=bounds["hoursAvailable"][0],
+                   batchesProducedStartRow=bounds["batchesProduced"][1],
+                   batchesProducedStartCol=bounds["batchesProduced"][0],
+                   totalProfitRow=bounds["totalProfit"][1],
+                   totalProfitCol=bounds["totalProfit"][0])
+
+    @classmethod
+    def detect(cls, workbook, sheetName=constant.SHEET_NAME, rows=None) -> "SheetLayout":
+        """
+        Detect the layout of a worksheet: from defined names if the workbook has them, otherwise
+        from the header labels (with `fromSheet`, which reads only the header rows and columns).
+
+        Parameters
+        ----------
+        workbook : openpyxl.Workbook
+            The workbook
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+        rows : sequence of sequences, optional
+            The cell values of the sheet, if already read, so that the sheet is not scanned again
+
+        Returns
+        -------
+        layout : SheetLayout
+            The detected layout
+        """
+        layout = cls.fromDefinedNames(workbook, sheetName)
+        if layout is not None:
+            return layout
+
+        if rows is None:
+            return cls.fromSheet(workbook[sheetName], sheetName)
+
+        return cls.fromLabels(rows, sheetName)
+
+    @classmethod
+    def forNames(cls, productNames, plantNames, sheetName=constant.SHEET_NAME) -> "SheetLayout":
+        """
+        The Wyndor layout stretched to the given products and plants.
+
+        The blocks keep their relative positions: the hours available column sits two columns
+        after the last product, and the output rows follow two rows after the last plant. For
+        2 products and 3 plants this is exactly the default layout.
+
+        Parameters
+        ----------
+        productNames : list of str
+            The product names
+        plantNames : list of str
+            The plant names
+        sheetName : str, optional
+            The worksheet name (default: `constant.SHEET_NAME`)
+
+        Returns
+        -------
+        layout : SheetLayout
+            The layout
+        """
+        numProducts = len(productNames)
+        numPlants = len(plantNames)
+        firstCol = constant.INPUT_PROFIT_START_COL
+        hoursAvailableCol = firstCol + numProducts + 2
+        outputRow = constant.INPUT_HOURS_START_ROW + numPlants + 2
+
+        return cls(sheetName=sheetName,
+                   productNames=tuple(productNames),
+                   plantNames=tuple(plantNames),
+                   profitStartRow=constant.INPUT_PROFIT_START_ROW,
+                   profitStartCol=firstCol,
+                   hoursStartRow=constant.INPUT_HOURS_START_ROW,
+                   hoursStartCol=firstCol,
+                   hoursAvailableStartRow=constant.INPUT_HOURS_START_ROW,
+                   hoursAvailableStartCol=hoursAvailableCol,
+                   batchesProducedStartRow=outputRow,
+                   batchesProducedStartCol=firstCol,
+                   totalProfitRow=outputRow,
+                   totalProfitCol=hoursAvailableCol)
+
+
+def selectSheetNames(availableNames, sheetNames=None) -> list[str]:
+    """
+    Choose the worksheets to read from a workbook.
+
+    Parameters
+    ----------
+    availableNames : list of str
+        The worksheet names of the workbook, in workbook order
+    sheetNames : str or list of str, optional
+        - If None, every worksheet except the sensitivity and parametric report sheets
+        - If a str, a shell-style pattern such as `"Week *"`
+        - If a list, exactly these worksheets, in this order
+
+    Returns
+    -------
+    sheetNames : list of str
+        The selected worksheet names
+
+    Raises
+    ------
+    KeyError
+        If a listed worksheet does not exist
+    """
+    if sheetNames is None:
+        reportNames = {constant.SENSITIVITY_CONSTR_SHEET_NAME, constant.SENSITIVITY_VAR_SHEET_NAME,
+                       constant.PARAMETRIC_SHEET_NAME}
+        return [name for name in availableNames if name not in reportNames]
+
+    if isinstance(sheetNames, str):
+        return [name for name in availableNames if fnmatchcase(name, sheetNames)]
+
+    missingNames = [name for name in sheetNames if name not in availableNames]
+    if missingNames:
+        raise KeyError(f"Worksheets not found: {missingNames}")
+
+    return list(sheetNames)
+
+
+def _isEmpty(value) -> bool:
+    """
+    Whether a cell value read by openpyxl (None) or pandas (NaN) is empty.
+    """
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    return isinstance(value, str) and not value.strip()
+
+
+def _matchesLabel(value, label) -> bool:
+    """
+    Whether a cell value is the label, or ends with it as in `fromLabels`, ignoring case.
+    """
+    if not isinstance(value, str):
+        return False
+    text = value.strip().lower()
+    label = label.lower()
+    return text == label or text.endswith(" " + label)
+
+
+def _readNames(values) -> list[str]:
+    """
+    The names in a run of cells, up to the first empty cell.
+    """
+    names = []
+    for value in values:
+        if _isEmpty(value):
+            break
+        names.append(str(value).strip())
+
+    return names
@@ -2,9 +2,24 @@
 Wyndor Production Planning Optimization Main Program
 """
 
-from io_openpyxl import readDataOpenpyxl, writeDataOpenpyxl
-from io_pandas import readDataPandas, writeDataPandas
-from model import formulateModel, solveModel, getOptimalSolution, getOptimalDualSolution, saveModel, readModel
+from openpyxl import load_workbook
+
+from backend import getBackend
+from cache import readDataCached
+from colgen import solveColumnGeneration
+from instance import stackInstances
+from io_openpyxl import readDataOpenpyxl, readWorkbookOpenpyxl, writeDataOpenpyxl
+from io_pandas import (readDataPandas, readWorkbookPandas, writeDataPandas, writeSensitivityPandas,
+                       writeParametricPandas)
+from io_tabular import convertWorkbook, readDataTabular, writeDataTabular
+from model import (formulateModel, solveModel, getOptimalSolution, getOptimalDualSolution, getSensitivityReport,
+                   saveModel, readModel, setMipStart, getMipGap)
+
+from mps_reader import readInstanceMps, readMps
+from parametric import sweepAvailableHours, sweepProfits
+from presolve import reduceInstance
+from profiling import runProfiled, stage
+from result_store import ResultStore, recordFromSolveResult
 
 import constant
 
@@ -20,39 +35,100 @@ def main():
 
     # Option 1) Read data from the Excel file using openpyxl, then formulate the LP model.
 
-    # Read data.
-    productProfits, plantProductHours, plantAvailableHours = readDataOpenpyxl()
+    # Read data. The workbook is loaded once and its handle is reused by the writer in Step 3.
+    # The load is the largest I/O cost of a run, so it is profiled as a stage of its own; cell
+    # values are read as `readDataOpenpyxl` reads them (the Wyndor workbook has no formulas).
+    with stage("loadWorkbook"):
+        workbook = load_workbook(constant.DATA_PATH, data_only=True)
+    instance = readDataOpenpyxl(workbook=workbook)
 
     # Formulate the LP model.
-    model = formulateModel(productProfits, plantProductHours, plantAvailableHours)
+    model = formulateModel(instance)
 
     # Option 2) Read data from the Excel file using pandas, then formulate the LP model.
 
     # Read data.
-    # productProfits, plantProductHours, plantAvailableHours = readDataPandas()
+    # instance = readDataPandas()
 
     # Formulate the LP model.
-    # model = formulateModel(productProfits, plantProductHours, plantAvailableHours)
+    # model = formulateModel(instance)
+
+    # Option 3) Read data through the parsed-instance cache, which skips Excel parsing when the
+    #           workbook has not changed (pass useCache=False to bypass it).
+
+    # instance = readDataCached(constant.DATA_PATH)
+    # model = formulateModel(instance)
+
+    # Option 4) Read every sheet (e.g. one per week) in one pass, and stack them into one
+    #           multi-period model; `splitValues` splits its solution by sheet.
+
+    # instances = readWorkbookOpenpyxl(constant.DATA_PATH, sheetNames="Week *")
+    # instances = readWorkbookPandas(constant.DATA_PATH, sheetNames="Week *")
+    # model = formulateModel(stackInstances(instances))
+
+    # Option 5) Read data from CSV, Parquet or Arrow tables, which parse much faster than Excel.
+    #           `convertWorkbook()` writes the Excel data to `constant.TABULAR_PATH` once.
 
-    # Option 3) Directly load the LP from the MPS or LP file.
+    # instance = readDataTabular(constant.TABULAR_PATH, fileFormat="parquet")
+    # model = formulateModel(instance)
+
+    # Option 6) Directly load the LP from the MPS or LP file, or from a binary snapshot.
 
     # model = readModel(constant.MPS_PATH)
     # model = readModel(constant.LP_PATH)
+    # model = readModel(constant.SNAPSHOT_PATH)
+
+    # Option 7) Parse the MPS file without Gurobi into arrays, then turn it into an instance for the
+    #           solver backends and the writers, or build the Gurobi model from the arrays.
+
+    # instance = readInstanceMps(constant.MPS_PATH)
+    # model = readMps(constant.MPS_GZ_PATH).toModel()
+
+    #
+    # Optional: Produce whole batches only (a MIP), optionally with minimum lot sizes and setup costs
+    #           per product, starting from the rounded-down LP solution.
+    #
+
+    # model = formulateModel(instance, integer=True, minLotSizes=[0, 2], setupCosts=[0, 1000])
+    # setMipStart(model)
+
+    #
+    # Optional: Shrink the instance before formulating it (zero-profit products, unused, single-product
+    #           and duplicate plants). Map the solution back with `reduction.postsolve(soln)` before
+    #           writing it.
+    #
+
+    # reduction = reduceInstance(instance)
+    # reduction.timeBuild()
+    # print(reduction.report())
+    # model = formulateModel(reduction.reduced)
 
     #
-    # Optional: Save the LP model to an LP or an MPS file.
+    # Optional: Save the LP model to an LP or an MPS file, or to a binary snapshot.
     #
 
     # Save the model.
     # saveModel(model, constant.MPS_PATH)
+    # saveModel(model, constant.MPS_GZ_PATH)
     # saveModel(model, constant.LP_PATH)
+    # saveModel(model, constant.SNAPSHOT_PATH)
 
     #
     # Step 2: Solve the LP model.
     #
 
     solveModel(model)
-    soln, objVal = getOptimalSolution(model)
+    soln, objVal = getOptimalSolution(model, verbose=True)
+
+    # For a MIP, pass the MIP controls (Threads, MIPGap, TimeLimit, ConcurrentMIP) to `solveModel`,
+    # and report the gap and bound; give them to the writers as `mipGap=mipGap, objBound=objBound`.
+    # solveModel(model, constant.MIP_PARAMS)
+    # mipGap, objBound = getMipGap(model)
+
+    # For a catalogue of many more products than are ever produced, skip Step 1 and solve by column
+    # generation, which only creates variables for the products priced into the model.
+    # result, history = solveColumnGeneration(instance)
+    # soln, objVal = result.solution(instance), result.objVal
 
     #
     # Optional: Extract dual variables.
@@ -60,16 +136,40 @@ def main():
 
     # dualVariables = getOptimalDualSolution(model)
 
+    # Duals, reduced costs, slacks and ranging for all constraints and variables at once.
+    # constrReport, varReport = getSensitivityReport(model)
+    # writeSensitivityPandas(constrReport, varReport)
+
+    # Profit as a piecewise-linear function of the hours of a plant (or of the profit of a product),
+    # solved once per basis rather than once per grid point.
+    # curves = sweepAvailableHours(instance, ["Plant 3"], 0, 40)
+    # curves.update(sweepProfits(instance, ["Doors"], 0, 10000))
+    # writeParametricPandas(curves)
+
     #
     # Step 3: Write the solution to the Excel file.
     #
 
+    # With the presolve reduction, report the solution of the original instance.
+    # soln = reduction.postsolve(soln)
+
     # Option 1) Use openpyxl
-    writeDataOpenpyxl(soln, objVal)
+    writeDataOpenpyxl(soln, objVal, instance, workbook=workbook)
 
     # Option 2) Use pandas
-    # writeDataPandas(soln, objVal)
+    # writeDataPandas(soln, objVal, instance)
+
+    # Option 3) Write CSV, Parquet or Arrow tables
+    # writeDataTabular(soln, objVal, instance, constant.TABULAR_PATH, fileFormat="parquet")
+
+    # Optional: Keep every run in the result store, to compare runs later without opening any workbook,
+    #           e.g. `store.query(["solvedAt", "objVal"], workbook=constant.DATA_PATH)`.
+    # with ResultStore() as store:
+    #     result = getBackend("gurobi").solve(instance)
+    #     store.append(recordFromSolveResult(result, instance, workbook=constant.DATA_PATH))
 
 
 if __name__ == "__main__":
-    main()
+    # Set WYNDOR_PROFILE_LOG=stages.jsonl to log per-stage timings, and
+    # WYNDOR_PROFILE_DUMP=run.prof (or run.html for pyinstrument) to profile the whole run.
+    runProfiled(main)
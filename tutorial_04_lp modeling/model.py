@@ -3,14 +3,74 @@ Formulate and solve the Wyndor Example using Gurobi.
 """
 
 import gurobipy as grb
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 
 import constant
+from environment import getEnv
+from instance import ProductionInstance
+from profiling import instrumented
+from snapshot import SNAPSHOT_SUFFIX, readSnapshot, saveSnapshot
+from solution import SolutionView
 
 
-def formulateModel(productProfits, plantProductHours, plantAvailableHours) -> grb.Model:
+@instrumented
+def formulateModel(instance, plantProductHours=None, plantAvailableHours=None, env=None, integer=False,
+                   minLotSizes=None, setupCosts=None) -> grb.Model:
     """
     Formulate a Gurobi model based on the given instance data.
 
+    A minimum lot size or setup cost adds a binary setup variable per product even if `integer`
+    is False: the model is then a MIP whose batches are continuous, but either zero or at least
+    the lot size. Its solution lists the setup variables after the products (see
+    `SolutionView.productValues`).
+
+    Parameters
+    ----------
+    instance : ProductionInstance or dict
+        The instance data. For backward compatibility, the nested-dict form
+        `formulateModel(productProfits, plantProductHours, plantAvailableHours)` is also accepted
+        and converted with `ProductionInstance.fromDicts`.
+    plantProductHours : nested dict, optional
+        Only used with the nested-dict form
+    plantAvailableHours : dict, optional
+        Only used with the nested-dict form
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment, `environment.getEnv()`)
+    integer : bool, optional
+        If True, only whole batches are produced (see `addBatchRules`)
+    minLotSizes : array-like, shape (n,), optional
+        The minimum number of batches of each product, if it is produced at all
+    setupCosts : array-like, shape (n,), optional
+        The fixed cost of producing each product at all
+
+    Returns
+    -------
+    model : gurobipy.Model
+        The formulated Gurobi model
+    """
+    if not isinstance(instance, ProductionInstance):
+        instance = ProductionInstance.fromDicts(instance, plantProductHours, plantAvailableHours)
+
+    model = formulateMatrixModel(instance.productProfits,
+                                 instance.plantProductHours,
+                                 instance.plantAvailableHours,
+                                 instance.productNames,
+                                 instance.plantNames,
+                                 env,
+                                 instance.productUpperBounds)
+
+    if integer or minLotSizes is not None or setupCosts is not None:
+        addBatchRules(model, instance, integer, minLotSizes, setupCosts)
+
+    return model
+
+
+def formulateDictModel(productProfits, plantProductHours, plantAvailableHours) -> grb.Model:
+    """
+    Formulate a Gurobi model from the nested-dict instance data, one variable and one term at a time.
+
     Parameters
     ----------
     productProfits : dict
@@ -35,7 +95,7 @@ def formulateModel(productProfits, plantProductHours, plantAvailableHours) -> gr
     """
 
     # Create a Gurobi model.
-    model = grb.Model(constant.MODEL_NAME)
+    model = grb.Model(constant.MODEL_NAME, env=getEnv())
 
     # Define decision variables.
     batchProductionDecisions = {}
@@ -64,7 +124,173 @@ def formulateModel(productProfits, plantProductHours, plantAvailableHours) -> gr
     return model
 
 
-def solveModel(model) -> None:
+def formulateMatrixModel(productProfits, plantProductHours, plantAvailableHours,
+                         productNames=None, plantNames=None, env=None, productUpperBounds=None) -> grb.Model:
+    """
+    Formulate the same Gurobi model as `formulateDictModel` from matrix data, using a few bulk
+    `addMVar`/`addMConstr` calls instead of one Python call per coefficient.
+
+    Parameters
+    ----------
+    productProfits : array-like, shape (n,)
+        The profit per batch for each product
+    plantProductHours : scipy.sparse matrix or array-like, shape (m, n)
+        The hours required to produce one batch of each product (column) at each plant (row)
+    plantAvailableHours : array-like, shape (m,)
+        The available hours at each plant
+    productNames : list of str, optional
+        The variable names, in column order (default: `x[0]`, `x[1]`, ...)
+    plantNames : list of str, optional
+        The constraint names, in row order (default: `c[0]`, `c[1]`, ...)
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment, `environment.getEnv()`)
+    productUpperBounds : array-like, shape (n,), optional
+        The maximum number of batches of each product (default: unbounded)
+
+    Returns
+    -------
+    model : gurobipy.Model
+        The formulated Gurobi model
+    """
+
+    profits = np.asarray(productProfits, dtype=float)
+    availableHours = np.asarray(plantAvailableHours, dtype=float)
+    hours = sp.csr_matrix(plantProductHours, dtype=float)
+    hours.eliminate_zeros()
+
+    if hours.shape != (availableHours.size, profits.size):
+        raise ValueError(f"plantProductHours has shape {hours.shape}, "
+                         f"expected ({availableHours.size}, {profits.size})")
+
+    if productNames is None:
+        productNames = [f"x[{j}]" for j in range(profits.size)]
+    if plantNames is None:
+        plantNames = [f"c[{i}]" for i in range(availableHours.size)]
+
+    # Create a Gurobi model.
+    model = grb.Model(constant.MODEL_NAME, env=env if env is not None else getEnv())
+
+    # Define decision variables together with their objective coefficients.
+    batchProductionDecisions = model.addMVar(profits.size,
+                                             lb=0.0,
+                                             ub=grb.GRB.INFINITY if productUpperBounds is None else productUpperBounds,
+                                             obj=profits,
+                                             vtype=grb.GRB.CONTINUOUS,
+                                             name=list(productNames))
+    model.ModelSense = grb.GRB.MAXIMIZE
+
+    # For each plant, the total used hours <= the available hours.
+    model.addMConstr(hours, batchProductionDecisions, grb.GRB.LESS_EQUAL, availableHours,
+                     name=list(plantNames))
+
+    # Return the model.
+    return model
+
+
+def addBatchRules(model, instance, integer=True, minLotSizes=None, setupCosts=None) -> None:
+    """
+    Turn the batch decisions of a model built by `formulateModel` into a mixed-integer program.
+
+    A product with a minimum lot size or a setup cost gets a binary setup variable `setup[product]`,
+    with `batches <= maxBatches * setup` (the setup cost is charged in the objective) and
+    `batches >= minLotSize * setup`. The big-M is `instance.maxBatches()`, the most batches that fit.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The model, with one batch variable per product of `instance` as its first variables
+    instance : ProductionInstance
+        The instance the model was built from
+    integer : bool, optional
+        If True, the batch variables are integer
+    minLotSizes : array-like, shape (n,), optional
+        The minimum number of batches of each product, if it is produced at all (default: none)
+    setupCosts : array-like, shape (n,), optional
+        The fixed cost of producing each product at all (default: none)
+
+    Raises
+    ------
+    ValueError
+        If a product with a lot size or setup cost has no finite maximum number of batches
+    """
+    model.update()
+    batchVars = model.getVars()[:instance.numProducts]
+
+    if integer:
+        model.setAttr("VType", batchVars, [grb.GRB.INTEGER] * len(batchVars))
+
+    lotSizes = np.zeros(instance.numProducts) if minLotSizes is None else np.asarray(minLotSizes, dtype=float)
+    costs = np.zeros(instance.numProducts) if setupCosts is None else np.asarray(setupCosts, dtype=float)
+    setupProducts = np.flatnonzero((lotSizes > 0) | (costs > 0))
+
+    # The setup products and their lot sizes are kept on the model for `setMipStart`.
+    model._setupProducts = setupProducts
+    model._minLotSizes = lotSizes
+
+    if setupProducts.size == 0:
+        return
+
+    maxBatches = instance.maxBatches()[setupProducts]
+    if integer:
+        maxBatches = np.floor(maxBatches)
+    if not np.isfinite(maxBatches).all():
+        raise ValueError("Every product with a lot size or setup cost needs a finite maximum number of batches")
+
+    batches = grb.MVar.fromlist([batchVars[j] for j in setupProducts.tolist()])
+    setups = model.addMVar(setupProducts.size,
+                           vtype=grb.GRB.BINARY,
+                           obj=-costs[setupProducts],
+                           name=[f"setup[{instance.productNames[j]}]" for j in setupProducts.tolist()])
+
+    model.addConstr(batches <= maxBatches * setups, name="setupLink")
+
+    lotProducts = np.flatnonzero(lotSizes[setupProducts] > 0)
+    if lotProducts.size:
+        model.addConstr(batches[lotProducts] >= lotSizes[setupProducts[lotProducts]] * setups[lotProducts],
+                        name="minLot")
+
+
+def setMipStart(model) -> bool:
+    """
+    Give a MIP built by `addBatchRules` a start: its LP relaxation rounded down.
+
+    Rounding batches down never uses more hours, so the start is feasible. Products rounded to
+    fewer batches than their minimum lot size are not produced, and a setup is on exactly when
+    its product is produced.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The MIP
+
+    Returns
+    -------
+    started : bool
+        True if the relaxation was solved and the start was set
+    """
+    model.update()
+    relaxed = model.relax()
+    relaxed.Params.OutputFlag = 0
+    relaxed.optimize()
+    if relaxed.Status != grb.GRB.OPTIMAL:
+        relaxed.dispose()
+        return False
+
+    setupProducts = model._setupProducts
+    numProducts = model._minLotSizes.size
+    batches = np.floor(np.asarray(relaxed.getAttr("X"), dtype=float)[:numProducts] + 1e-6)
+    relaxed.dispose()
+
+    batches[batches < model._minLotSizes] = 0
+    setups = (batches[setupProducts] > 0).astype(float)
+
+    model.setAttr("Start", model.getVars(), np.concatenate([batches, setups]).tolist())
+
+    return True
+
+
+@instrumented
+def solveModel(model, params=None) -> None:
     """
     Optimize the given Gurobi model.
 
@@ -72,45 +298,91 @@ def solveModel(model) -> None:
     ----------
     model : gurobipy.Model
         The Gurobi model to be optimized
+    params : dict, optional
+        Gurobi parameters to set first, e.g. the MIP controls of `constant.MIP_PARAMS`
+        (`Threads`, `MIPGap`, `TimeLimit`, `ConcurrentMIP`)
 
     """
+    for name, value in (params or {}).items():
+        model.setParam(name, value)
+
     model.optimize()
 
 
-def getOptimalSolution(model) -> dict[str, float]:
+@instrumented
+def getOptimalSolution(model, verbose=False, maxPrint=constant.SOLUTION_PRINT_LIMIT) -> tuple[SolutionView, float]:
     """
     Get the optimal solution of the (optimized) Gurobi model.
 
+    The values of all variables are fetched with one bulk attribute query into a NumPy array;
+    names and Python objects are only created for the entries that are used. Printing needs the
+    names of the first variables, which Gurobi only returns for all variables at once (then kept
+    by the view), so it is off by default.
+
     Parameters
     ----------
     model : gurobipy.Model
         The Gurobi model to be optimized
+    verbose : bool, optional
+        If True, print the objective function value and the first `maxPrint` solutions
+        (default: False)
+    maxPrint : int, optional
+        The maximum number of solutions to print (default: `constant.SOLUTION_PRINT_LIMIT`)
 
     Returns
     -------
-    soln : dict
-        The optimal solutions
+    soln : SolutionView
+        The optimal solutions, a read-only mapping
         - Keys: variable names
         - Values: optimal decision variable values
+        Use `soln.array` for the NumPy array and `soln.toDict()` for a plain dict. An integer
+        model also holds its `setup[...]` binaries; `soln.productValues(instance)` drops them.
     objVal : float
         The optimal objective function value
     """
-    soln = {}
-    for var in model.getVars():
-        soln[var.VarName] = var.X
+    soln = SolutionView(model, np.asarray(model.getAttr("X"), dtype=float))
 
     objVal = model.objVal
 
     # Print the optimal solutions and objective function value.
-    print("\nThe optimal solutions:")
-    for varName, varValue in soln.items():
-        print(f"    {varName}: {varValue}")
+    if verbose:
+        print("\nThe optimal solutions:")
+        for varName, varValue in zip(soln.names[:maxPrint], soln.array[:maxPrint].tolist()):
+            print(f"    {varName}: {varValue}")
+        if len(soln) > maxPrint:
+            print(f"    ... ({len(soln) - maxPrint} more, {np.count_nonzero(soln.array)} nonzero in total)")
 
-    print(f"The optimal objective function value: {objVal}\n")
+        print(f"The optimal objective function value: {objVal}\n")
 
     return soln, objVal
 
 
+def getMipGap(model) -> tuple[float | None, float | None]:
+    """
+    Get the relative gap and the best bound of a solved MIP.
+
+    A continuous model has no gap, so both values are None: `(None, None)`, never None itself,
+    so the result can always be unpacked.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The optimized Gurobi model
+
+    Returns
+    -------
+    mipGap : float or None
+        The relative gap between the solution and the bound; infinite if no solution was found,
+        None if the model is not a MIP
+    objBound : float or None
+        The best bound on the objective function value; None if the model is not a MIP
+    """
+    if not model.IsMIP:
+        return None, None
+
+    return model.MIPGap, model.ObjBound
+
+
 def getOptimalDualSolution(model, constrNames=None) -> dict[str, float]:
     """
     Get the optimal dual variable values of a given set of constraints.
@@ -137,10 +409,10 @@ def getOptimalDualSolution(model, constrNames=None) -> dict[str, float]:
 
     if constrNames is None:
         constrs = model.getConstrs()
+        duals = dict(zip(model.getAttr("ConstrName", constrs), model.getAttr("Pi", constrs)))
 
-        for constr in constrs:
-            duals[constr.constrName] = constr.pi
-            print(f"{constr.constrName}: Optimal dual variable value = {constr.pi}")
+        for constrName, pi in duals.items():
+            print(f"{constrName}: Optimal dual variable value = {pi}")
 
         return duals
 
@@ -162,28 +434,74 @@ def getOptimalDualSolution(model, constrNames=None) -> dict[str, float]:
     return duals
 
 
-def readModel(filePath) -> grb.Model:
+def getSensitivityReport(model) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Get the duals, reduced costs, slacks and ranging information of an optimized LP model.
+
+    Each attribute is fetched for all constraints or all variables in a single `getAttr` call.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The optimized Gurobi model (a continuous model with an optimal basis)
+
+    Returns
+    -------
+    constrReport : pandas.DataFrame
+        One row per constraint, indexed by constraint name
+        - RHS: the right-hand side
+        - Slack: the slack at the optimal solution
+        - Pi: the optimal dual variable value (shadow price)
+        - SARHSLow, SARHSUp: the range of right-hand side values over which `Pi` stays valid
+    varReport : pandas.DataFrame
+        One row per variable, indexed by variable name
+        - X: the optimal value
+        - Obj: the objective coefficient
+        - RC: the reduced cost
+        - SAObjLow, SAObjUp: the range of objective coefficients over which the basis stays optimal
     """
-    Load a Gurobi model from a MPS or LP file.
+    constrs = model.getConstrs()
+    constrReport = pd.DataFrame({attr: np.asarray(model.getAttr(attr, constrs), dtype=float)
+                                 for attr in ("RHS", "Slack", "Pi", "SARHSLow", "SARHSUp")},
+                                index=pd.Index(model.getAttr("ConstrName", constrs), name="Constraint"))
+
+    variables = model.getVars()
+    varReport = pd.DataFrame({attr: np.asarray(model.getAttr(attr, variables), dtype=float)
+                              for attr in ("X", "Obj", "RC", "SAObjLow", "SAObjUp")},
+                             index=pd.Index(model.getAttr("VarName", variables), name="Variable"))
+
+    return constrReport, varReport
+
+
+def readModel(filePath, env=None) -> grb.Model:
+    """
+    Load a Gurobi model from a MPS or LP file, or from a binary snapshot.
 
     Parameters
     ----------
     filePath : str
         The path to the file to load the model from
+        - `.npz`: a binary snapshot written by `saveModel`, memory-mapped and rebuilt with the matrix API
+        - `.mps`, `.lp`, optionally compressed (`.mps.gz`, `.mps.bz2`, ...): read by Gurobi
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment, `environment.getEnv()`)
 
     Returns
     -------
     model : gurobipy.Model
         The loaded Gurobi model
     """
-    model = grb.read(filePath)
+    if filePath.endswith(SNAPSHOT_SUFFIX):
+        return readSnapshot(filePath, env=env)
+
+    model = grb.read(filePath, env=env if env is not None else getEnv())
 
     return model
 
 
 def saveModel(model, filePath) -> None:
     """
-    Save the given Gurobi model to a file, either in MPS or LP format.
+    Save the given Gurobi model to a file, in MPS or LP format or as a binary snapshot.
 
     Parameters
     ----------
@@ -191,5 +509,12 @@ def saveModel(model, filePath) -> None:
         The Gurobi model to be saved
     filePath : str
         The path to the file to save the model to
+        - `.npz`: a binary snapshot (CSR matrix, bounds, objective, senses, right-hand sides and
+          names), much faster to write and load than the text formats
+        - `.mps`, `.lp`: written by Gurobi; add `.gz`, `.bz2` or `.7z` to compress
     """
+    if filePath.endswith(SNAPSHOT_SUFFIX):
+        saveSnapshot(model, filePath)
+        return
+
     model.write(filePath)
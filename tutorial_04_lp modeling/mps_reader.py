@@ -0,0 +1,414 @@
+"""
+A streaming MPS reader in pure Python and NumPy, which needs neither Gurobi nor a license.
+"""
+
+import bz2
+import gzip
+import lzma
+from array import array
+from dataclasses import dataclass
+
+import numpy as np
+import scipy.sparse as sp
+
+import constant
+from instance import ProductionInstance
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+# Bound types: whether they take a value, and the variable type they set (None: unchanged).
+BOUND_TYPES = {"UP": (True, None), "LO": (True, None), "FX": (True, None), "FR": (False, None),
+               "MI": (False, None), "PL": (False, None), "BV": (False, "B"), "LI": (True, "I"),
+               "UI": (True, "I"), "SC": (True, None)}
+
+
+@dataclass
+class MpsData:
+    """
+    A linear model read from an MPS file, as arrays.
+
+    Attributes
+    ----------
+    name : str
+        The model name
+    modelSense : int
+        1 to minimize, -1 to maximize (as `gurobipy.GRB.MINIMIZE` / `MAXIMIZE`)
+    objCon : float
+        The objective constant
+    varNames : list of str
+        The variable names, in column order
+    constrNames : list of str
+        The constraint names, in row order
+    obj, lb, ub : numpy.ndarray, shape (n,)
+        The objective coefficients and the variable bounds
+    vtype : numpy.ndarray, shape (n,)
+        The variable types, `C`, `I` or `B`
+    sense : numpy.ndarray, shape (m,)
+        The constraint senses, `<`, `>` or `=`
+    rhs : numpy.ndarray, shape (m,)
+        The right-hand sides
+    matrix : scipy.sparse.csr_matrix, shape (m, n)
+        The constraint coefficients
+    """
+
+    name: str
+    modelSense: int
+    objCon: float
+    varNames: list
+    constrNames: list
+    obj: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    vtype: np.ndarray
+    sense: np.ndarray
+    rhs: np.ndarray
+    matrix: sp.csr_matrix
+
+    @property
+    def numVars(self) -> int:
+        """The number of variables."""
+        return len(self.varNames)
+
+    @property
+    def numConstrs(self) -> int:
+        """The number of constraints."""
+        return len(self.constrNames)
+
+    def toModel(self, env=None):
+        """
+        Build the Gurobi model with a few bulk matrix API calls, as `snapshot.readSnapshot` does.
+
+        Parameters
+        ----------
+        env : gurobipy.Env, optional
+            The Gurobi environment to create the model in (default: the shared environment)
+
+        Returns
+        -------
+        model : gurobipy.Model
+            The Gurobi model
+        """
+        import gurobipy as grb
+
+        from environment import getEnv
+
+        model = grb.Model(self.name, env=env if env is not None else getEnv())
+        x = model.addMVar(self.numVars, lb=self.lb, ub=self.ub, obj=self.obj, vtype=self.vtype, name=self.varNames)
+        model.addMConstr(self.matrix, x, self.sense, self.rhs, name=self.constrNames)
+        model.ModelSense = self.modelSense
+        model.ObjCon = self.objCon
+        model.update()
+
+        return model
+
+    def toInstance(self) -> ProductionInstance:
+        """
+        Read the model as a production planning instance: maximize profit subject to plant hours.
+
+        `>` rows are negated into `<` rows, and a minimization is negated into a maximization.
+
+        Returns
+        -------
+        instance : ProductionInstance
+            The instance, with the variables as products and the constraints as plants
+
+        Raises
+        ------
+        ValueError
+            If the model has equality rows, integer variables, nonzero lower bounds or an
+            objective constant, which a production planning instance cannot represent
+        """
+        problems = []
+        if (self.sense == "=").any():
+            problems.append(f"{int((self.sense == '=').sum())} equality rows")
+        if (self.vtype != "C").any():
+            problems.append(f"{int((self.vtype != 'C').sum())} integer variables")
+        if (self.lb != 0).any():
+            problems.append(f"{int((self.lb != 0).sum())} variables with a nonzero lower bound")
+        if self.objCon != 0:
+            problems.append(f"an objective constant of {self.objCon}")
+        if problems:
+            raise ValueError(f"Model {self.name!r} is not a production planning instance: {', '.join(problems)}")
+
+        rowSigns = np.where(self.sense == ">", -1.0, 1.0)
+
+        return ProductionInstance(self.varNames,
+                                  self.constrNames,
+                                  -self.modelSense * self.obj,
+                                  sp.diags(rowSigns) @ self.matrix,
+                                  rowSigns * self.rhs,
+                                  self.ub)
+
+
+def readMps(filePath, chunkBytes=constant.MPS_CHUNK_BYTES) -> MpsData:
+    """
+    Read an MPS file (free format, optionally compressed as `.gz`, `.bz2` or `.xz`) into arrays.
+
+    The file is read in chunks of lines, and the coefficients are appended to typed arrays
+    (12 bytes per nonzero) as they stream in, so the memory used is that of the result plus one
+    chunk. The data are checked while they are read: duplicate row or column names, entries for
+    unknown rows or columns, unknown bound types and malformed numbers raise `ValueError` with the
+    line number. Only the first RHS and BOUNDS sets are used; RANGES sections are not supported.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the MPS file
+    chunkBytes : int, optional
+        The approximate size of each chunk of lines (default: `constant.MPS_CHUNK_BYTES`)
+
+    Returns
+    -------
+    data : MpsData
+        The model
+    """
+    opener = next((opener for suffix, opener in OPENERS.items() if filePath.endswith(suffix)), open)
+
+    name = ""
+    modelSense = 1
+    objName = None
+    # Objective rows after the first are ignored, as Gurobi does, so their entries are skipped.
+    extraObjRows = set()
+    rowIndex = {}
+    senses = []
+    colIndex = {}
+    obj = array("d")
+    # The COLUMNS section lists each column's entries together, so the matrix streams in CSC order.
+    colStarts = array("q")
+    rowIndices = array("i")
+    values = array("d")
+    isInteger = array("b")
+    rhs = None
+    lb = ub = None
+    rhsSet = boundSet = None
+    objCon = 0.0
+
+    section = None
+    integerMarker = False
+    lineNumber = 0
+    ended = False
+
+    def fail(message):
+        raise ValueError(f"{filePath}, line {lineNumber}: {message}")
+
+    def toFloat(token):
+        try:
+            return float(token)
+        except ValueError:
+            fail(f"{token!r} is not a number")
+
+    with opener(filePath, "rt") as file:
+        for lines in iter(lambda: file.readlines(chunkBytes), []):
+            if ended:
+                break
+            for line in lines:
+                lineNumber += 1
+                if not line.strip() or line.startswith("*"):
+                    continue
+
+                tokens = line.split()
+                if not line[0].isspace():
+                    section = tokens[0].upper()
+                    if section == "NAME":
+                        name = tokens[1] if len(tokens) > 1 else ""
+                    elif section == "OBJSENSE" and len(tokens) > 1:
+                        modelSense = _parseSense(tokens[1], fail)
+                    elif section == "COLUMNS":
+                        rhs = np.zeros(len(senses))
+                    elif section == "RHS" and rhs is None:
+                        rhs = np.zeros(len(senses))
+                    elif section == "BOUNDS":
+                        lb, ub = np.zeros(len(colIndex)), np.full(len(colIndex), np.inf)
+                        vtypes = np.where(np.frombuffer(isInteger, dtype=np.int8), "I", "C")
+                    elif section == "RANGES":
+                        fail("RANGES sections are not supported")
+                    elif section == "ENDATA":
+                        ended = True
+                        break
+                    elif section not in ("ROWS", "OBJSENSE", "RHS"):
+                        fail(f"unknown section {section!r}")
+                    continue
+
+                if section == "COLUMNS":
+                    if len(tokens) >= 3 and tokens[1] == "'MARKER'":
+                        if tokens[2] == "'INTORG'":
+                            integerMarker = True
+                        elif tokens[2] == "'INTEND'":
+                            integerMarker = False
+                        else:
+                            fail(f"unknown marker {tokens[2]!r}")
+                        continue
+                    if len(tokens) not in (3, 5):
+                        fail(f"expected a column and one or two row/value pairs, got {len(tokens)} fields")
+
+                    colName = tokens[0]
+                    if colName not in colIndex:
+                        colIndex[colName] = len(colIndex)
+                        colStarts.append(len(values))
+                        obj.append(0.0)
+                        isInteger.append(integerMarker)
+                    elif colIndex[colName] != len(colIndex) - 1:
+                        fail(f"column {colName!r} appears again after other columns")
+
+                    for rowName, token in zip(tokens[1::2], tokens[2::2]):
+                        if rowName == objName:
+                            obj[-1] = toFloat(token)
+                        elif rowName in rowIndex:
+                            rowIndices.append(rowIndex[rowName])
+                            values.append(toFloat(token))
+                        elif rowName not in extraObjRows:
+                            fail(f"column {colName!r} has an entry for unknown row {rowName!r}")
+
+                elif section == "ROWS":
+                    if len(tokens) != 2:
+                        fail(f"expected a row type and name, got {len(tokens)} fields")
+                    rowType, rowName = tokens[0].upper(), tokens[1]
+                    if rowName in rowIndex or rowName == objName or rowName in extraObjRows:
+                        fail(f"duplicate row {rowName!r}")
+                    if rowType == "N":
+                        if objName is None:
+                            objName = rowName
+                        else:
+                            extraObjRows.add(rowName)
+                    elif rowType in ("L", "G", "E"):
+                        rowIndex[rowName] = len(senses)
+                        senses.append({"L": "<", "G": ">", "E": "="}[rowType])
+                    else:
+                        fail(f"unknown row type {rowType!r}")
+
+                elif section == "RHS":
+                    if len(tokens) % 2 == 1:
+                        setName, pairs = tokens[0], tokens[1:]
+                    else:
+                        setName, pairs = None, tokens
+                    rhsSet = rhsSet or setName
+                    if setName != rhsSet:
+                        continue
+
+                    for rowName, token in zip(pairs[::2], pairs[1::2]):
+                        if rowName == objName:
+                            # An objective right-hand side is the negated objective constant.
+                            objCon = -toFloat(token)
+                        elif rowName in rowIndex:
+                            rhs[rowIndex[rowName]] = toFloat(token)
+                        elif rowName not in extraObjRows:
+                            fail(f"right-hand side for unknown row {rowName!r}")
+
+                elif section == "BOUNDS":
+                    boundType = tokens[0].upper()
+                    if boundType not in BOUND_TYPES:
+                        fail(f"unknown bound type {boundType!r}")
+                    hasValue, boundVType = BOUND_TYPES[boundType]
+                    if boundType == "SC":
+                        fail("semi-continuous variables are not supported")
+
+                    numFields = 3 + hasValue
+                    if len(tokens) == numFields or (boundType == "BV" and len(tokens) == 4):
+                        setName, colName = tokens[1], tokens[2]
+                    elif len(tokens) == numFields - 1:
+                        setName, colName = None, tokens[1]
+                    else:
+                        fail(f"expected {numFields} fields for a {boundType} bound, got {len(tokens)}")
+                    boundSet = boundSet or setName
+                    if setName != boundSet:
+                        continue
+
+                    if colName not in colIndex:
+                        fail(f"bound for unknown column {colName!r}")
+                    j = colIndex[colName]
+                    value = toFloat(tokens[-1]) if hasValue else None
+
+                    if boundType == "UP" or boundType == "UI":
+                        ub[j] = value
+                        if value < 0 and lb[j] == 0:
+                            # A negative upper bound on a default lower bound frees the variable below.
+                            lb[j] = -np.inf
+                    elif boundType == "LO" or boundType == "LI":
+                        lb[j] = value
+                    elif boundType == "FX":
+                        lb[j] = ub[j] = value
+                    elif boundType == "FR":
+                        lb[j], ub[j] = -np.inf, np.inf
+                    elif boundType == "MI":
+                        lb[j] = -np.inf
+                    elif boundType == "PL":
+                        ub[j] = np.inf
+                    elif boundType == "BV":
+                        lb[j], ub[j] = 0.0, 1.0
+                    if boundVType is not None:
+                        vtypes[j] = boundVType
+
+                elif section == "OBJSENSE":
+                    modelSense = _parseSense(tokens[0], fail)
+
+                else:
+                    fail(f"data line outside a known section ({section!r})")
+
+    if not ended:
+        raise ValueError(f"{filePath}: missing ENDATA, the file may be truncated")
+    if objName is None:
+        raise ValueError(f"{filePath}: no objective (N) row")
+
+    numVars, numConstrs = len(colIndex), len(senses)
+    if rhs is None:
+        rhs = np.zeros(numConstrs)
+    if lb is None:
+        lb, ub = np.zeros(numVars), np.full(numVars, np.inf)
+        vtypes = np.where(np.frombuffer(isInteger, dtype=np.int8), "I", "C")
+    colStarts.append(len(values))
+
+    matrix = sp.csc_matrix((np.frombuffer(values, dtype=float),
+                            np.frombuffer(rowIndices, dtype=np.int32),
+                            np.frombuffer(colStarts, dtype=np.int64)),
+                           shape=(numConstrs, numVars)).tocsr()
+    _checkDuplicateEntries(filePath, matrix, colIndex)
+
+    return MpsData(name, modelSense, objCon, list(colIndex), list(rowIndex),
+                   np.frombuffer(obj, dtype=float).copy(), lb, ub,
+                   vtypes, np.array(senses, dtype="U1"), rhs, matrix)
+
+
+def _parseSense(token, fail) -> int:
+    """
+    Parse an OBJSENSE value into a model sense.
+    """
+    sense = token.upper()
+    if sense in ("MAX", "MAXIMIZE"):
+        return -1
+    if sense in ("MIN", "MINIMIZE"):
+        return 1
+    fail(f"unknown objective sense {token!r}")
+
+
+def _checkDuplicateEntries(filePath, matrix, colIndex) -> None:
+    """
+    Raise `ValueError` if a column has two entries for the same row.
+
+    The CSR conversion lists each row's columns in increasing order, so a repeated entry is a
+    column index equal to the previous one within the same row.
+    """
+    repeated = np.flatnonzero(np.diff(matrix.indices) == 0)
+    # Equal indices across a row boundary are different entries.
+    repeated = repeated[~np.isin(repeated + 1, matrix.indptr)]
+    if repeated.size:
+        colName = list(colIndex)[matrix.indices[repeated[0]]]
+        raise ValueError(f"{filePath}: column {colName!r} has {repeated.size} duplicate row entries")
+
+
+def readInstanceMps(filePath, chunkBytes=constant.MPS_CHUNK_BYTES) -> ProductionInstance:
+    """
+    Read an MPS file as a production planning instance, for the solver backends or the I/O tools.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the MPS file
+    chunkBytes : int, optional
+        The approximate size of each chunk of lines (default: `constant.MPS_CHUNK_BYTES`)
+
+    Returns
+    -------
+    instance : ProductionInstance
+        The instance (see `MpsData.toInstance`)
+    """
+    return readMps(filePath, chunkBytes).toInstance()
@@ -0,0 +1,225 @@
+"""
+Parametric analysis: trace the optimal profit as available hours or profits move over a range.
+"""
+
+from dataclasses import dataclass
+
+import gurobipy as grb
+import numpy as np
+import pandas as pd
+
+import constant
+from session import ModelSession
+
+
+@dataclass
+class ParametricCurve:
+    """
+    The optimal objective function value as a piecewise-linear function of one parameter.
+
+    Attributes
+    ----------
+    name : str
+        The plant (for available hours) or product (for profits) that was swept
+    kind : str
+        `availableHours` or `profit`
+    breakpoints : numpy.ndarray, shape (k + 1,)
+        The parameter values where the slope changes, including both ends of the range
+    objVals : numpy.ndarray, shape (k + 1,)
+        The optimal objective function value at each breakpoint (NaN where the LP is not optimal)
+    slopes : numpy.ndarray, shape (k,)
+        The slope of each linear piece: the dual value of the plant, or the batches of the product
+    solves : int
+        The number of re-optimizations the sweep took
+    iterations : int
+        The total number of simplex iterations of those re-optimizations
+    """
+
+    name: str
+    kind: str
+    breakpoints: np.ndarray
+    objVals: np.ndarray
+    slopes: np.ndarray
+    solves: int
+    iterations: int
+
+    def evaluate(self, values) -> np.ndarray:
+        """
+        Evaluate the curve by linear interpolation between breakpoints.
+
+        Parameters
+        ----------
+        values : float or array-like
+            Parameter values within the swept range
+
+        Returns
+        -------
+        objVals : numpy.ndarray
+            The optimal objective function values
+        """
+        return np.interp(values, self.breakpoints, self.objVals)
+
+    def toFrame(self) -> pd.DataFrame:
+        """
+        Return the curve as a table with one row per breakpoint; the slope is that of the piece
+        starting at the breakpoint (NaN for the last one).
+
+        Returns
+        -------
+        curve : pandas.DataFrame
+            The columns are name, kind, parameter, objVal and slope
+        """
+        return pd.DataFrame({"name": self.name,
+                             "kind": self.kind,
+                             "parameter": self.breakpoints,
+                             "objVal": self.objVals,
+                             "slope": np.append(self.slopes, np.nan)})
+
+
+def sweepAvailableHours(instance, plants, low, high, env=None,
+                        maxBreakpoints=constant.PARAMETRIC_MAX_BREAKPOINTS) -> dict[str, ParametricCurve]:
+    """
+    Trace the optimal profit as the available hours of each plant move from `low` to `high`,
+    the other plants keeping their hours.
+
+    One model is kept for all sweeps. Within the right-hand side range of the current basis
+    (`SARHSLow` to `SARHSUp`), the profit is linear with the plant's dual value as slope, so each
+    re-optimization jumps straight to the end of that range instead of solving at every grid point,
+    and warm-starts from the previous basis.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance data
+    plants : str or list of str
+        The plant names to sweep, one at a time
+    low, high : float or dict
+        The ends of the range, either one value for every plant or a dict by plant name
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment)
+    maxBreakpoints : int, optional
+        The maximum number of breakpoints per curve (default: `constant.PARAMETRIC_MAX_BREAKPOINTS`)
+
+    Returns
+    -------
+    curves : dict
+        - Keys: plant names
+        - Values: ParametricCurve
+    """
+    session = ModelSession(instance, env=env)
+    curves = {}
+
+    for plant in [plants] if isinstance(plants, str) else plants:
+        constr = session.constrs[plant]
+        original = constr.RHS
+        curves[plant] = _sweep(session, plant, "availableHours",
+                               lambda value: session.setAvailableHours(plant, value),
+                               lambda: (constr.Pi, constr.SARHSUp),
+                               _endOfRange(low, plant), _endOfRange(high, plant), maxBreakpoints)
+        session.setAvailableHours(plant, original)
+
+    session.model.dispose()
+    return curves
+
+
+def sweepProfits(instance, products, low, high, env=None,
+                 maxBreakpoints=constant.PARAMETRIC_MAX_BREAKPOINTS) -> dict[str, ParametricCurve]:
+    """
+    Trace the optimal profit as the profit per batch of each product moves from `low` to `high`,
+    the other products keeping their profits.
+
+    Within the objective range of the current basis (`SAObjLow` to `SAObjUp`), the optimal
+    solution does not change, so the profit is linear with the product's batches as slope; each
+    re-optimization jumps straight to the end of that range.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance data
+    products : str or list of str
+        The product names to sweep, one at a time
+    low, high : float or dict
+        The ends of the range, either one value for every product or a dict by product name
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment)
+    maxBreakpoints : int, optional
+        The maximum number of breakpoints per curve (default: `constant.PARAMETRIC_MAX_BREAKPOINTS`)
+
+    Returns
+    -------
+    curves : dict
+        - Keys: product names
+        - Values: ParametricCurve
+    """
+    session = ModelSession(instance, env=env)
+    curves = {}
+
+    for product in [products] if isinstance(products, str) else products:
+        var = session.vars[product]
+        original = var.Obj
+        curves[product] = _sweep(session, product, "profit",
+                                 lambda value: session.setProfit(product, value),
+                                 lambda: (var.X, var.SAObjUp),
+                                 _endOfRange(low, product), _endOfRange(high, product), maxBreakpoints)
+        session.setProfit(product, original)
+
+    session.model.dispose()
+    return curves
+
+
+def _endOfRange(value, name) -> float:
+    """
+    Return the end of the sweep range of a plant or product, given for all names or by name.
+    """
+    return float(value[name] if isinstance(value, dict) else value)
+
+
+def _sweep(session, name, kind, setValue, getSlopeAndUp, low, high, maxBreakpoints) -> ParametricCurve:
+    """
+    Walk from `low` to `high` one basis at a time.
+
+    At each step the parameter is set just past the previous breakpoint and the model is
+    re-optimized; the slope and the upper end of the range over which it holds are read from the
+    new basis, and the objective at the next breakpoint is extrapolated along that slope.
+    """
+    if high < low:
+        raise ValueError(f"The range of {name!r} is empty: {low} > {high}")
+
+    step = constant.PARAMETRIC_STEP * max(1.0, high - low)
+    breakpoints, objVals, slopes = [low], [], []
+    solves = iterations = 0
+
+    value = low
+    while True:
+        setValue(value)
+        stats = session.optimize()
+        solves += 1
+        iterations += stats["iterations"]
+
+        if stats["status"] != grb.GRB.OPTIMAL:
+            # No basis to follow: report the rest of the range as not optimal.
+            if not objVals:
+                objVals.append(np.nan)
+            breakpoints.append(high)
+            slopes.append(np.nan)
+            objVals.append(np.nan)
+            break
+
+        slope, up = getSlopeAndUp()
+        objVal = stats["objVal"]
+        if not objVals:
+            objVals.append(objVal)
+
+        # The objective at the last breakpoint is continuous; the step past it only finds the new basis.
+        # A degenerate basis may end its range at the last breakpoint, which adds no piece.
+        end = min(up, high)
+        if end > breakpoints[-1]:
+            slopes.append(slope)
+            breakpoints.append(end)
+            objVals.append(objVal + slope * (end - value))
+
+        if end >= high or len(breakpoints) > maxBreakpoints:
+            break
+        value = min(end + step, high)
+
+    return ParametricCurve(name, kind, np.array(breakpoints), np.array(objVals), np.array(slopes), solves, iterations)
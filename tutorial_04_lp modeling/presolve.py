@@ -0,0 +1,241 @@
+"""
+Presolve-style reduction of a production planning instance before the model is built.
+"""
+
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import numpy as np
+
+from instance import ProductionInstance
+from solution import SolutionView
+
+
+@dataclass
+class Reduction:
+    """
+    A reduced instance and the mapping back to the original one.
+
+    Attributes
+    ----------
+    original : ProductionInstance
+        The instance that was reduced
+    reduced : ProductionInstance
+        The instance to formulate and solve instead
+    productMap : numpy.ndarray, shape (reduced number of products,)
+        The original index of each product of the reduced instance
+    plantMap : numpy.ndarray, shape (reduced number of plants,)
+        The original index of each plant of the reduced instance
+    stats : dict
+        - droppedProducts: products with no positive profit, or bounded to 0, fixed at 0
+        - emptyPlants: plants that no remaining product uses
+        - boundedPlants: plants used by a single product, turned into an upper bound on it
+        - redundantPlants: plants whose hours cannot run out within the product bounds
+        - duplicatePlants: plants whose constraint is a multiple of a tighter one
+        - reduceTime: the wall time of the reduction, in seconds
+        - buildTimeOriginal, buildTimeReduced: the wall times of building the original and the
+          reduced model, in seconds, once `timeBuild` has been called
+    """
+
+    original: ProductionInstance
+    reduced: ProductionInstance
+    productMap: np.ndarray
+    plantMap: np.ndarray
+    stats: dict
+
+    def postsolve(self, soln) -> np.ndarray:
+        """
+        Map a solution of the reduced instance back to the original products.
+
+        Parameters
+        ----------
+        soln : SolutionView, dict or array-like
+            The optimal solution of the reduced model, e.g. as returned by `getOptimalSolution`
+
+        Returns
+        -------
+        values : numpy.ndarray, shape (original number of products,)
+            The optimal values in the product order of the original instance, ready for the
+            writers; the dropped products are 0
+        """
+        if isinstance(soln, SolutionView):
+            values = soln.productValues(self.reduced)
+        elif isinstance(soln, Mapping):
+            values = [soln[name] for name in self.reduced.productNames]
+        else:
+            values = soln
+
+        fullValues = np.zeros(self.original.numProducts)
+        fullValues[self.productMap] = np.asarray(values, dtype=float)
+
+        return fullValues
+
+    def timeBuild(self, env=None) -> tuple[float, float]:
+        """
+        Build the Gurobi model of the original and of the reduced instance, and record how long
+        each took in `stats` for `report`.
+
+        Parameters
+        ----------
+        env : gurobipy.Env, optional
+            The Gurobi environment to create the models in (default: the shared environment, `environment.getEnv()`)
+
+        Returns
+        -------
+        buildTimeOriginal, buildTimeReduced : float
+            The wall times of the two builds, in seconds
+        """
+        from model import formulateModel
+
+        for key, instance in (("buildTimeOriginal", self.original), ("buildTimeReduced", self.reduced)):
+            startTime = time.perf_counter()
+            model = formulateModel(instance, env=env)
+            model.update()
+            self.stats[key] = time.perf_counter() - startTime
+            model.dispose()
+
+        return self.stats["buildTimeOriginal"], self.stats["buildTimeReduced"]
+
+    def report(self) -> str:
+        """
+        Describe how much the reduction shrank the instance, and, if `timeBuild` has been called,
+        how much build time it saved.
+
+        Returns
+        -------
+        report : str
+            One line for the sizes, one for the reductions applied, and one for the build times
+        """
+        original, reduced = self.original, self.reduced
+        sizes = (f"products {original.numProducts} -> {reduced.numProducts}, "
+                 f"plants {original.numPlants} -> {reduced.numPlants}, "
+                 f"nonzeros {original.plantProductHours.nnz} -> {reduced.plantProductHours.nnz}")
+        reductions = ", ".join(f"{key} {value}" for key, value in self.stats.items() if "Time" not in key)
+        report = f"Presolve: {sizes} in {self.stats['reduceTime']:.4f} s\n  {reductions}"
+
+        if "buildTimeOriginal" in self.stats:
+            buildTimeOriginal, buildTimeReduced = self.stats["buildTimeOriginal"], self.stats["buildTimeReduced"]
+            saved = buildTimeOriginal - buildTimeReduced - self.stats["reduceTime"]
+            report += (f"\n  build {buildTimeOriginal:.4f} s -> {buildTimeReduced:.4f} s, "
+                       f"saved {saved:.4f} s net of the reduction")
+
+        return report
+
+
+def reduceInstance(instance) -> Reduction:
+    """
+    Shrink an instance with reductions that keep every optimal objective value.
+
+    The reductions rely on the hours and the available hours being nonnegative; if they are not,
+    the instance is returned unchanged. Until nothing changes:
+    - products with no positive profit, or with an upper bound of 0, are fixed at 0 and dropped
+    - plants that no remaining product uses are dropped
+    - a plant used by a single product becomes an upper bound on that product
+    - a plant that cannot run out of hours even with every product at its upper bound is dropped
+    Then, of plants whose constraints are multiples of each other, only the tightest is kept.
+
+    Parameters
+    ----------
+    instance : ProductionInstance
+        The instance to reduce
+
+    Returns
+    -------
+    reduction : Reduction
+        The reduced instance and the postsolve mapping
+    """
+    startTime = time.perf_counter()
+    stats = dict.fromkeys(("droppedProducts", "emptyPlants", "boundedPlants", "redundantPlants",
+                           "duplicatePlants"), 0)
+
+    productMap = np.arange(instance.numProducts)
+    plantMap = np.arange(instance.numPlants)
+    upperBounds = np.array(instance.productUpperBounds)
+    hours = instance.plantProductHours
+
+    if (hours.data < 0).any() or (instance.plantAvailableHours < 0).any():
+        stats["reduceTime"] = time.perf_counter() - startTime
+        return Reduction(instance, instance, productMap, plantMap, stats)
+
+    profits = instance.productProfits
+    availableHours = instance.plantAvailableHours
+
+    changed = True
+    while changed:
+        changed = False
+
+        # Fixing a product at 0 never uses hours and never adds profit.
+        keepProducts = (profits[productMap] > 0) & (upperBounds[productMap] > 0)
+        if not keepProducts.all():
+            stats["droppedProducts"] += int((~keepProducts).sum())
+            productMap = productMap[keepProducts]
+            changed = True
+
+        active = hours[plantMap][:, productMap]
+        rowNnz = active.getnnz(axis=1)
+
+        # A plant used by a single product j only says x_j <= available hours / hours per batch.
+        singleRows = np.flatnonzero(rowNnz == 1)
+        if singleRows.size:
+            products = productMap[active.indices[active.indptr[singleRows]]]
+            bounds = availableHours[plantMap[singleRows]] / active.data[active.indptr[singleRows]]
+            np.minimum.at(upperBounds, products, bounds)
+
+        # The most hours a plant can use, with every product at its upper bound.
+        maxHours = active @ upperBounds[productMap]
+        redundantRows = (rowNnz > 1) & (maxHours <= availableHours[plantMap])
+
+        keepPlants = (rowNnz > 1) & ~redundantRows
+        if not keepPlants.all():
+            stats["emptyPlants"] += int((rowNnz == 0).sum())
+            stats["boundedPlants"] += singleRows.size
+            stats["redundantPlants"] += int(redundantRows.sum())
+            plantMap = plantMap[keepPlants]
+            changed = True
+
+    # The loop ended without a change, so `active` is the current submatrix.
+    keepRows = _tightestRows(active, availableHours[plantMap])
+    stats["duplicatePlants"] += plantMap.size - keepRows.size
+    plantMap = plantMap[keepRows]
+
+    reduced = ProductionInstance([instance.productNames[j] for j in productMap.tolist()],
+                                 [instance.plantNames[i] for i in plantMap.tolist()],
+                                 profits[productMap],
+                                 active[keepRows],
+                                 availableHours[plantMap],
+                                 upperBounds[productMap])
+    stats["reduceTime"] = time.perf_counter() - startTime
+
+    return Reduction(instance, reduced, productMap, plantMap, stats)
+
+
+def _tightestRows(hours, availableHours) -> np.ndarray:
+    """
+    Keep only the tightest of the rows that are positive multiples of each other.
+
+    Rows are compared after scaling by their largest coefficient; the kept row is the one with the
+    fewest scaled available hours, and it keeps its original coefficients.
+
+    Returns
+    -------
+    keepRows : numpy.ndarray
+        The indices of the rows to keep, in increasing order
+    """
+    if hours.shape[0] < 2:
+        return np.arange(hours.shape[0])
+
+    hours = hours.tocsr()
+    hours.sort_indices()
+    rowNnz = np.diff(hours.indptr)
+    rowMax = np.maximum.reduceat(hours.data, hours.indptr[:-1])
+    scaledData = np.round(hours.data / np.repeat(rowMax, rowNnz), 12)
+    scaledHours = availableHours / rowMax
+
+    tightest = {}
+    for i, (start, end) in enumerate(zip(hours.indptr[:-1].tolist(), hours.indptr[1:].tolist())):
+        key = (hours.indices[start:end].tobytes(), scaledData[start:end].tobytes())
+        if key not in tightest or scaledHours[i] < scaledHours[tightest[key]]:
+            tightest[key] = i
+
+    return np.sort(np.fromiter(tightest.values(), dtype=int))
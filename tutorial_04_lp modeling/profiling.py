@@ -0,0 +1,181 @@
+"""
+Stage-level timing instrumentation for the read, formulate, solve and write pipeline.
+
+Instrumentation is off unless a JSON lines log file is configured, either with
+`configureProfiling(logPath)` or with the environment variable named by `constant.PROFILE_LOG_ENV`.
+Each instrumented stage then appends one JSON object per call to the log.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+import constant
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_config = {"logPath": os.environ.get(constant.PROFILE_LOG_ENV), "runId": uuid.uuid4().hex}
+
+
+def configureProfiling(logPath) -> None:
+    """
+    Turn the stage instrumentation on (or off) for this process.
+
+    Parameters
+    ----------
+    logPath : str or None
+        The JSON lines file the stage records are appended to; None turns instrumentation off
+    """
+    _config["logPath"] = logPath
+
+
+def _peakRssMB():
+    """
+    The peak resident set size of the process so far, in MB (None where unavailable).
+    """
+    if resource is None:
+        return None
+
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+    return maxRss / 2 ** 20 if sys.platform == "darwin" else maxRss / 2 ** 10
+
+
+def _modelStats(model) -> dict:
+    """
+    The size and, once optimized, the solver statistics of a Gurobi model.
+
+    `gurobipy` is not imported here; anything with a `NumVars` attribute is treated as a model.
+    """
+    model.update()
+    stats = {"numVars": model.NumVars, "numConstrs": model.NumConstrs, "numNZs": model.NumNZs}
+
+    # Status 1 is LOADED: the model has not been optimized yet.
+    if model.Status != 1:
+        stats.update({"status": model.Status, "runtime": model.Runtime, "iterCount": model.IterCount})
+
+    return stats
+
+
+def _objectStats(obj) -> dict:
+    """
+    Describe a stage argument or return value: a Gurobi model or a `ProductionInstance`.
+    """
+    if hasattr(obj, "NumVars"):
+        return _modelStats(obj)
+
+    if hasattr(obj, "plantProductHours"):
+        return {"numProducts": obj.numProducts, "numPlants": obj.numPlants, "numNZs": obj.plantProductHours.nnz}
+
+    return {}
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a block of code and append its record to the profiling log.
+
+    Parameters
+    ----------
+    name : str
+        The stage name
+
+    Yields
+    ------
+    record : dict
+        The record being built; the block may add fields to it
+    """
+    record = {}
+    if _config["logPath"] is None:
+        yield record
+        return
+
+    startWall = time.perf_counter()
+    startCpu = time.process_time()
+    try:
+        yield record
+    finally:
+        record = {"runId": _config["runId"],
+                  "timestamp": time.time(),
+                  "stage": name,
+                  "wallTime": time.perf_counter() - startWall,
+                  "cpuTime": time.process_time() - startCpu,
+                  "peakRssMB": _peakRssMB(),
+                  **record}
+
+        with open(_config["logPath"], "a") as logFile:
+            logFile.write(json.dumps(record) + "\n")
+
+
+def instrumented(func):
+    """
+    Decorator that runs a pipeline function inside a `stage` named after it.
+
+    The record also holds the model size and solver statistics of a Gurobi model passed as the
+    first argument or returned, and the dimensions of a `ProductionInstance` returned.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _config["logPath"] is None:
+            return func(*args, **kwargs)
+
+        with stage(func.__name__) as record:
+            result = func(*args, **kwargs)
+
+            stats = _objectStats(result[0] if isinstance(result, tuple) and result else result)
+            if not stats and args:
+                stats = _objectStats(args[0])
+            record.update(stats)
+
+        return result
+
+    return wrapper
+
+
+def runProfiled(func, profilePath=os.environ.get(constant.PROFILE_DUMP_ENV)):
+    """
+    Run a function, optionally under a profiler.
+
+    Parameters
+    ----------
+    func : callable
+        The function to run, e.g. `main`
+    profilePath : str, optional
+        Where to write the profile (default: the environment variable named by
+        `constant.PROFILE_DUMP_ENV`). A path ending in `.html` uses pyinstrument, if installed;
+        any other path gets a cProfile dump readable with `pstats` or snakeviz.
+        If None, the function runs without a profiler.
+
+    Returns
+    -------
+    result : object
+        The return value of `func`
+    """
+    if not profilePath:
+        return func()
+
+    if profilePath.endswith(".html"):
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return func()
+        finally:
+            profiler.stop()
+            with open(profilePath, "w") as file:
+                file.write(profiler.output_html())
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(profilePath)
@@ -0,0 +1,365 @@
+"""
+A SQLite store of solve results, so that many runs can be compared without opening any workbook.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import constant
+
+# The scalar columns of a run; the vectors x and duals are stored as float64 blobs next to them.
+RUN_COLUMNS = ["runId", "solvedAt", "workbook", "scenario", "instanceHash", "backend", "status", "objVal",
+               "mipGap", "objBound", "params", "readTime", "buildTime", "solveTime", "totalTime", "error"]
+VECTOR_COLUMNS = ["x", "duals"]
+NAME_COLUMNS = ["productNames", "plantNames"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instanceHash TEXT PRIMARY KEY,
+    productNames TEXT NOT NULL,
+    plantNames TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    runId INTEGER PRIMARY KEY,
+    solvedAt TEXT NOT NULL,
+    workbook TEXT,
+    scenario TEXT,
+    instanceHash TEXT REFERENCES instances (instanceHash),
+    backend TEXT,
+    status TEXT NOT NULL,
+    objVal REAL,
+    mipGap REAL,
+    objBound REAL,
+    params TEXT,
+    readTime REAL,
+    buildTime REAL,
+    solveTime REAL,
+    totalTime REAL,
+    error TEXT,
+    x BLOB,
+    duals BLOB
+);
+CREATE INDEX IF NOT EXISTS runsWorkbook ON runs (workbook, solvedAt);
+CREATE INDEX IF NOT EXISTS runsScenario ON runs (scenario, solvedAt);
+CREATE INDEX IF NOT EXISTS runsSolvedAt ON runs (solvedAt);
+CREATE INDEX IF NOT EXISTS runsInstance ON runs (instanceHash);
+"""
+
+
+class ResultStore:
+    """
+    Append solve results to a SQLite database and query them back by workbook, scenario and date.
+
+    Each run is one row: the scalar results in their own columns, and the solution and dual
+    vectors as raw float64 blobs, so that a query that does not select them never reads them.
+    The product and plant names are stored once per instance (by `ProductionInstance.contentHash`)
+    rather than once per run.
+
+    Use it as a context manager, or call `close` when done.
+    """
+
+    def __init__(self, filePath=constant.RESULT_STORE_PATH):
+        """
+        Parameters
+        ----------
+        filePath : str, optional
+            The path to the SQLite file, created if needed (default: `constant.RESULT_STORE_PATH`)
+        """
+        self.filePath = filePath
+        if os.path.dirname(filePath):
+            os.makedirs(os.path.dirname(filePath), exist_ok=True)
+
+        self._connection = sqlite3.connect(filePath)
+        # Readers are not blocked while a batch is written.
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        self._connection.close()
+
+    def append(self, record) -> int:
+        """
+        Append one run.
+
+        Parameters
+        ----------
+        record : dict
+            A run, as returned by `recordFromSolveResult` or `recordFromBatchResult`
+
+        Returns
+        -------
+        runId : int
+            The identifier of the new run
+        """
+        return self.appendMany([record])[0]
+
+    def appendMany(self, records) -> list[int]:
+        """
+        Append many runs in one transaction, which is much faster than one transaction per run.
+
+        Parameters
+        ----------
+        records : iterable of dict
+            The runs; missing keys are stored as NULL, and `solvedAt` defaults to now
+
+        Returns
+        -------
+        runIds : list of int
+            The identifiers of the new runs, in order
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        instanceRows = {}
+        runRows = []
+        for record in records:
+            if record.get("instanceHash") is not None and record.get("productNames") is not None:
+                instanceRows[record["instanceHash"]] = (record["instanceHash"],
+                                                        json.dumps(list(record["productNames"])),
+                                                        json.dumps(list(record.get("plantNames") or [])))
+
+            params = record.get("params")
+            runRows.append((_isoformat(record.get("solvedAt")) or now,
+                            record.get("workbook"),
+                            record.get("scenario"),
+                            record.get("instanceHash"),
+                            record.get("backend"),
+                            record.get("status", "ERROR"),
+                            record.get("objVal"),
+                            record.get("mipGap"),
+                            record.get("objBound"),
+                            json.dumps(params, sort_keys=True) if params is not None else None,
+                            record.get("readTime"),
+                            record.get("buildTime"),
+                            record.get("solveTime"),
+                            record.get("totalTime"),
+                            record.get("error"),
+                            _toBlob(record.get("x")),
+                            _toBlob(record.get("duals"))))
+
+        columns = RUN_COLUMNS[1:] + VECTOR_COLUMNS
+        sql = f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self._connection:
+            self._connection.executemany("INSERT OR IGNORE INTO instances VALUES (?, ?, ?)", instanceRows.values())
+            # The identifiers are not guessed from MAX(runId): they need not be contiguous, and
+            # another connection may write to the database at the same time.
+            cursor = self._connection.cursor()
+            runIds = []
+            for runRow in runRows:
+                cursor.execute(sql, runRow)
+                runIds.append(cursor.lastrowid)
+
+        return runIds
+
+    def query(self, columns=None, workbook=None, scenario=None, since=None, until=None, instanceHash=None,
+              status=None, limit=None) -> pd.DataFrame:
+        """
+        Load runs, reading only the requested columns.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            The columns to load (default: the scalar columns, without the vectors and names)
+            - Scalar: runId, solvedAt, workbook, scenario, instanceHash, backend, status, objVal,
+              mipGap, objBound, params, readTime, buildTime, solveTime, totalTime, error
+            - Vectors, loaded as NumPy arrays: x, duals
+            - Names, loaded as lists: productNames, plantNames
+        workbook, scenario, instanceHash, status : str or list of str, optional
+            Only the runs with one of these values
+        since, until : str, date or datetime, optional
+            Only the runs solved at or after `since` and before `until`
+        limit : int, optional
+            Only the latest `limit` matching runs
+
+        Returns
+        -------
+        runs : pandas.DataFrame
+            One row per run, from the oldest to the latest
+        """
+        columns = list(columns) if columns is not None else RUN_COLUMNS
+        unknownColumns = [column for column in columns if column not in RUN_COLUMNS + VECTOR_COLUMNS + NAME_COLUMNS]
+        if unknownColumns:
+            raise ValueError(f"Unknown columns {unknownColumns}, expected some of "
+                             f"{RUN_COLUMNS + VECTOR_COLUMNS + NAME_COLUMNS}")
+
+        selected = [f"instances.{column}" if column in NAME_COLUMNS else f"runs.{column}" for column in columns]
+        sql = f"SELECT {', '.join(selected)} FROM runs"
+        if any(column in NAME_COLUMNS for column in columns):
+            sql += " LEFT JOIN instances ON instances.instanceHash = runs.instanceHash"
+
+        conditions, params = [], []
+        for column, value in (("workbook", workbook), ("scenario", scenario), ("instanceHash", instanceHash),
+                              ("status", status)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            conditions.append(f"runs.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if since is not None:
+            conditions.append("runs.solvedAt >= ?")
+            params.append(_isoformat(since))
+        if until is not None:
+            conditions.append("runs.solvedAt < ?")
+            params.append(_isoformat(until))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        sql += " ORDER BY runs.solvedAt DESC, runs.runId DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        rows = self._connection.execute(sql, params).fetchall()[::-1]
+        data = {column: list(values) for column, values in zip(columns, zip(*rows))} if rows else {}
+        for column in data:
+            if column in VECTOR_COLUMNS:
+                data[column] = [_fromBlob(blob) for blob in data[column]]
+            elif column in NAME_COLUMNS:
+                data[column] = [json.loads(names) if names is not None else None for names in data[column]]
+
+        return pd.DataFrame(data, columns=columns)
+
+    def solutionMatrix(self, column="x", **filters) -> pd.DataFrame:
+        """
+        Load a vector column of the matching runs as one table, with one column per name.
+
+        Runs of different instances are aligned by product (or plant) name; a name missing from a
+        run is NaN.
+
+        Parameters
+        ----------
+        column : str, optional
+            `x` for the solutions, with product columns, or `duals` for the duals, with plant columns
+        **filters
+            Passed to `query`, e.g. `workbook`, `scenario`, `since`
+
+        Returns
+        -------
+        values : pandas.DataFrame
+            One row per run, indexed by runId
+        """
+        if column not in VECTOR_COLUMNS:
+            raise ValueError(f"Unknown vector column {column!r}, expected one of {VECTOR_COLUMNS}")
+
+        namesColumn = "productNames" if column == "x" else "plantNames"
+        runs = self.query(["runId", column, namesColumn], **filters)
+        rows = [pd.Series(values, index=names, dtype=float) if values is not None else pd.Series(dtype=float)
+                for values, names in zip(runs[column], runs[namesColumn])]
+
+        return pd.DataFrame(rows, index=pd.Index(runs["runId"], name="runId"))
+
+
+def recordFromSolveResult(result, instance, workbook=None, scenario=None, params=None, readTime=None) -> dict:
+    """
+    Build a run record from a backend `SolveResult`.
+
+    Parameters
+    ----------
+    result : SolveResult
+        The result returned by a solver backend
+    instance : ProductionInstance
+        The instance that was solved
+    workbook, scenario : str, optional
+        Where the instance came from, for lookups
+    params : dict, optional
+        The solver parameters, stored as JSON
+    readTime : float, optional
+        The time spent reading the data, in seconds
+
+    Returns
+    -------
+    record : dict
+        The record to pass to `ResultStore.append`
+    """
+    return {"workbook": workbook,
+            "scenario": scenario,
+            "instanceHash": instance.contentHash(),
+            "productNames": instance.productNames,
+            "plantNames": instance.plantNames,
+            "backend": result.backend,
+            "status": result.status,
+            "objVal": result.objVal,
+            "params": params,
+            "readTime": readTime,
+            "buildTime": result.buildTime,
+            "solveTime": result.solveTime,
+            "totalTime": (readTime or 0.0) + result.buildTime + result.solveTime,
+            "x": result.x,
+            "duals": result.duals}
+
+
+def recordFromBatchResult(result, params=None) -> dict:
+    """
+    Build a run record from a result of `batch.solveScenario`.
+
+    Parameters
+    ----------
+    result : dict
+        The batch result
+    params : dict, optional
+        The solver parameters, stored as JSON
+
+    Returns
+    -------
+    record : dict
+        The record to pass to `ResultStore.append`
+    """
+    soln = result.get("soln") or {}
+    duals = result.get("duals") or {}
+
+    return {"workbook": result["workbook"],
+            "scenario": result["name"],
+            "instanceHash": result.get("instanceHash"),
+            "productNames": list(soln) or None,
+            "plantNames": list(duals),
+            "backend": "gurobi",
+            "status": result["status"],
+            "objVal": result["objVal"],
+            "params": params,
+            "readTime": result["readTime"],
+            "buildTime": result["buildTime"],
+            "solveTime": result["solveTime"],
+            "totalTime": result["totalTime"],
+            "error": result["error"],
+            "x": list(soln.values()) if soln else None,
+            "duals": list(duals.values()) if duals else None}
+
+
+def _isoformat(value):
+    """
+    Convert a date or datetime to the ISO text stored in `solvedAt`; strings are kept as they are.
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _toBlob(values):
+    """
+    Store a vector as the raw bytes of a float64 array.
+    """
+    if values is None:
+        return None
+    return np.ascontiguousarray(values, dtype=np.float64).tobytes()
+
+
+def _fromBlob(blob):
+    """
+    Read back a vector stored by `_toBlob`.
+    """
+    if blob is None:
+        return None
+    return np.frombuffer(blob, dtype=np.float64)
@@ -0,0 +1,282 @@
+"""
+An asyncio solve service: submit instances, await their results, follow their progress, cancel them.
+"""
+
+import asyncio
+import itertools
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import gurobipy as grb
+
+import constant
+from backend import GurobiBackend, SolveResult
+from cache import readDataCached
+
+
+class SolveJob:
+    """
+    A submitted solve. Await it (`await job`) to get its `SolveResult`.
+
+    Attributes
+    ----------
+    jobId : str
+        The job identifier
+    instance : ProductionInstance
+        The instance being solved
+    """
+
+    def __init__(self, jobId, instance):
+        self.jobId = jobId
+        self.instance = instance
+        self.task = None
+        self._model = None
+        self._cancelRequested = False
+        self._lock = threading.Lock()
+
+    def __await__(self):
+        return self.task.__await__()
+
+    def cancel(self) -> None:
+        """
+        Cancel the job: a queued job never starts, and a running solve is stopped with
+        `model.terminate()` and finishes with status `INTERRUPTED`.
+        """
+        with self._lock:
+            self._cancelRequested = True
+            if self._model is not None:
+                self._model.terminate()
+
+
+class SolveService:
+    """
+    Run solves in a bounded pool of worker threads while the caller's event loop stays free.
+
+    Gurobi releases the GIL while it optimizes, so threads solve in parallel. Each worker thread
+    creates its own Gurobi environment on first use, since an environment must not be shared
+    between threads that solve at the same time.
+    """
+
+    def __init__(self, maxConcurrency=constant.SERVICE_MAX_CONCURRENCY, gurobiParams=constant.SERVICE_GUROBI_PARAMS):
+        """
+        Parameters
+        ----------
+        maxConcurrency : int, optional
+            The maximum number of solves running at once (default: `constant.SERVICE_MAX_CONCURRENCY`)
+        gurobiParams : dict, optional
+            The Gurobi parameters of each worker environment (default: `constant.SERVICE_GUROBI_PARAMS`)
+        """
+        self.maxConcurrency = maxConcurrency
+        self.gurobiParams = gurobiParams
+        self._executor = ThreadPoolExecutor(max_workers=maxConcurrency, thread_name_prefix="solve")
+        self._threadState = threading.local()
+        self._envs = []
+        self._envsLock = threading.Lock()
+        self._jobIds = itertools.count(1)
+
+    def submit(self, instance, progress=None, jobId=None) -> SolveJob:
+        """
+        Submit an instance to solve. Must be called from a running event loop.
+
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance to solve
+        progress : callable, optional
+            Called on the event loop with a dict for every progress report of the solver:
+            jobId, time, and objVal (and bound for MIP models)
+        jobId : str, optional
+            The job identifier (default: a sequence number)
+
+        Returns
+        -------
+        job : SolveJob
+            The job; await it for the `SolveResult`
+        """
+        job = SolveJob(jobId or str(next(self._jobIds)), instance)
+        loop = asyncio.get_running_loop()
+        job.task = loop.create_task(self._run(job, progress))
+        return job
+
+    async def _run(self, job, progress) -> SolveResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._solve, job, progress, loop)
+
+    def close(self) -> None:
+        """
+        Stop accepting work, wait for the running solves to finish, and dispose of the worker
+        environments so that their license tokens are released.
+        """
+        self._executor.shutdown(wait=True)
+        with self._envsLock:
+            for env in self._envs:
+                env.dispose()
+            self._envs.clear()
+
+    def _env(self):
+        """
+        The Gurobi environment of the current worker thread.
+        """
+        if getattr(self._threadState, "env", None) is None:
+            self._threadState.env = grb.Env(params=self.gurobiParams)
+            with self._envsLock:
+                self._envs.append(self._threadState.env)
+        return self._threadState.env
+
+    def _solve(self, job, progress, loop) -> SolveResult:
+        """
+        Build and solve a job's model in a worker thread.
+        """
+        if job._cancelRequested:
+            return SolveResult("gurobi", "INTERRUPTED")
+
+        backend = GurobiBackend(self._env())
+        model, buildTime = backend.build(job.instance)
+
+        with job._lock:
+            if job._cancelRequested:
+                model.dispose()
+                return SolveResult("gurobi", "INTERRUPTED", buildTime=buildTime)
+            job._model = model
+
+        def callback(cbModel, where):
+            # Gurobi ignores a `terminate()` that arrives before `optimize()` starts, so a
+            # cancellation requested in that window is applied here.
+            if job._cancelRequested:
+                cbModel.terminate()
+                return
+            if progress is None:
+                return
+
+            if where == grb.GRB.Callback.SIMPLEX:
+                event = {"objVal": cbModel.cbGet(grb.GRB.Callback.SPX_OBJVAL)}
+            elif where == grb.GRB.Callback.BARRIER:
+                event = {"objVal": cbModel.cbGet(grb.GRB.Callback.BARRIER_PRIMOBJ)}
+            elif where == grb.GRB.Callback.MIP:
+                event = {"objVal": cbModel.cbGet(grb.GRB.Callback.MIP_OBJBST),
+                         "bound": cbModel.cbGet(grb.GRB.Callback.MIP_OBJBND)}
+            else:
+                return
+
+            event.update({"jobId": job.jobId, "time": cbModel.cbGet(grb.GRB.Callback.RUNTIME)})
+            loop.call_soon_threadsafe(progress, event)
+
+        try:
+            try:
+                return backend.optimize(model, buildTime, callback)
+            finally:
+                with job._lock:
+                    job._model = None
+        finally:
+            model.dispose()
+
+
+async def serveStdio(service) -> None:
+    """
+    A line-based JSON front end on stdin/stdout, standing in for an HTTP service.
+
+    Each input line is a request:
+    - `{"id": "a", "workbook": "data/wyndor.xlsx"}` solves a workbook; `productProfits` and
+      `plantAvailableHours` override entries as in the batch manifest
+    - `{"cancel": "a"}` cancels a job
+
+    Each output line is `{"id", "progress": {...}}` while solving, then `{"id", "status", "objVal",
+    "soln", "buildTime", "solveTime"}` or `{"id", "error"}`. A request whose id belongs to a job
+    that has not finished yet is rejected with an error. Workbooks are read in worker threads, so a
+    large one does not hold up the other jobs.
+
+    Parameters
+    ----------
+    service : SolveService
+        The service the requests are submitted to
+    """
+    loop = asyncio.get_running_loop()
+    # A job id maps to None while its workbook is being read, then to its SolveJob.
+    jobs = {}
+    cancelled = set()
+    pending = set()
+    requestIds = itertools.count(1)
+
+    def emit(message):
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+
+    async def run(request, jobId):
+        try:
+            # Excel parsing runs off the event loop, so other jobs keep reporting and can be cancelled.
+            instance = await loop.run_in_executor(None, readDataCached, request["workbook"])
+            instance = instance.withUpdates(request.get("productProfits"), request.get("plantAvailableHours"))
+            job = service.submit(instance,
+                                 progress=lambda event: emit({"id": event["jobId"], "progress": event}),
+                                 jobId=jobId)
+        except Exception as error:
+            jobs.pop(jobId, None)
+            cancelled.discard(jobId)
+            emit({"id": jobId, "error": f"{type(error).__name__}: {error}"})
+            return
+
+        jobs[jobId] = job
+        if jobId in cancelled:
+            job.cancel()
+
+        try:
+            result = await job
+            emit({"id": jobId, "status": result.status, "objVal": result.objVal,
+                  "soln": result.solution(job.instance), "buildTime": result.buildTime,
+                  "solveTime": result.solveTime})
+        except Exception as error:
+            emit({"id": jobId, "error": f"{type(error).__name__}: {error}"})
+        finally:
+            jobs.pop(jobId, None)
+            cancelled.discard(jobId)
+
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            break
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+        except Exception as error:
+            emit({"id": None, "error": f"{type(error).__name__}: {error}"})
+            continue
+
+        if "cancel" in request:
+            jobId = request["cancel"]
+            if jobs.get(jobId) is not None:
+                jobs[jobId].cancel()
+            elif jobId in jobs:
+                cancelled.add(jobId)
+            continue
+
+        jobId = request.get("id") or f"request-{next(requestIds)}"
+        if jobId in jobs:
+            emit({"id": jobId, "error": f"Job id {jobId!r} is already in use"})
+            continue
+
+        jobs[jobId] = None
+        task = loop.create_task(run(request, jobId))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+
+
+def main():
+    """
+    Main function
+    """
+    service = SolveService()
+    try:
+        asyncio.run(serveStdio(service))
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+A persistent model session for incremental updates and warm-started re-solves.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+
+from instance import ProductionInstance
+from model import formulateModel
+
+
+class ModelSession:
+    """
+    Keep one Gurobi model alive across data changes and re-optimize from the previous basis.
+
+    Changing an available hours value, a profit or a single hours coefficient updates the model
+    in place, so Gurobi keeps its optimal basis and the next `optimize` call warm-starts from it.
+
+    Attributes
+    ----------
+    instance : ProductionInstance
+        The current data, kept in sync with the model
+    model : gurobipy.Model
+        The Gurobi model
+    vars : dict
+        - Keys: product names
+        - Values: gurobipy.Var
+    constrs : dict
+        - Keys: plant names
+        - Values: gurobipy.Constr
+    env : gurobipy.Env or None
+        The Gurobi environment the models are created in (None for the shared environment,
+        `environment.getEnv()`)
+    """
+
+    def __init__(self, instance, env=None):
+        """
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance data; it is copied, so later changes do not affect the caller's instance
+        env : gurobipy.Env, optional
+            The Gurobi environment to create the model in (default: the shared environment, `environment.getEnv()`)
+        """
+        self.instance = ProductionInstance(instance.productNames,
+                                           instance.plantNames,
+                                           np.array(instance.productProfits),
+                                           instance.plantProductHours.copy(),
+                                           np.array(instance.plantAvailableHours),
+                                           np.array(instance.productUpperBounds))
+        self.env = env
+        self.model = formulateModel(self.instance, env=env)
+        self.model.update()
+        self.vars = dict(zip(self.instance.productNames, self.model.getVars()))
+        self.constrs = dict(zip(self.instance.plantNames, self.model.getConstrs()))
+
+    def setAvailableHours(self, plant, hours) -> None:
+        """
+        Change the available hours (right-hand side) of a plant.
+
+        Parameters
+        ----------
+        plant : str
+            The plant name
+        hours : float
+            The new available hours
+        """
+        self.constrs[plant].RHS = hours
+        self.instance.plantAvailableHours[self.instance.plantIndex[plant]] = hours
+
+    def setProfit(self, product, profit) -> None:
+        """
+        Change the profit per batch (objective coefficient) of a product.
+
+        Parameters
+        ----------
+        product : str
+            The product name
+        profit : float
+            The new profit per batch
+        """
+        self.vars[product].Obj = profit
+        self.instance.productProfits[self.instance.productIndex[product]] = profit
+
+    def setHours(self, plant, product, hours) -> None:
+        """
+        Change the hours required to produce one batch of a product at a plant (a matrix coefficient).
+
+        Parameters
+        ----------
+        plant : str
+            The plant name
+        product : str
+            The product name
+        hours : float
+            The new hours required
+        """
+        self.model.chgCoeff(self.constrs[plant], self.vars[product], hours)
+
+        # Adding a new nonzero changes the sparsity structure, which SciPy warns about.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", sp.SparseEfficiencyWarning)
+            i = self.instance.plantIndex[plant]
+            j = self.instance.productIndex[product]
+            self.instance.plantProductHours[i, j] = hours
+
+    def optimize(self) -> dict:
+        """
+        Re-optimize the model, warm-starting from the current basis if there is one.
+
+        Returns
+        -------
+        stats : dict
+            - status: the Gurobi status code
+            - objVal: the optimal objective function value (None if not optimal)
+            - iterations: the number of simplex iterations
+            - runtime: the Gurobi runtime in seconds
+            - wallTime: the wall time of the call in seconds
+        """
+        startTime = time.perf_counter()
+        self.model.optimize()
+        wallTime = time.perf_counter() - startTime
+
+        return _solveStats(self.model, wallTime)
+
+    def compareWithColdStart(self) -> dict:
+        """
+        Warm re-solve the session model, then build and solve the same data from scratch,
+        and report what the warm start saved.
+
+        Returns
+        -------
+        comparison : dict
+            - warm: the stats of the warm re-solve (see `optimize`)
+            - cold: the stats of the cold build and solve; its wallTime includes the build
+            - iterationsSaved: cold minus warm simplex iterations
+            - timeSaved: cold minus warm wall time in seconds
+        """
+        warm = self.optimize()
+
+        startTime = time.perf_counter()
+        coldModel = formulateModel(self.instance, env=self.env)
+        coldModel.optimize()
+        cold = _solveStats(coldModel, time.perf_counter() - startTime)
+        coldModel.dispose()
+
+        return {"warm": warm,
+                "cold": cold,
+                "iterationsSaved": cold["iterations"] - warm["iterations"],
+                "timeSaved": cold["wallTime"] - warm["wallTime"]}
+
+
+def _solveStats(model, wallTime) -> dict:
+    """
+    Collect the solve statistics of an optimized model.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The optimized model
+    wallTime : float
+        The measured wall time in seconds
+
+    Returns
+    -------
+    stats : dict
+        See `ModelSession.optimize`
+    """
+    return {"status": model.Status,
+            "objVal": model.ObjVal if model.SolCount > 0 else None,
+            "iterations": int(model.IterCount),
+            "runtime": model.Runtime,
+            "wallTime": wallTime}
@@ -0,0 +1,88 @@
+"""
+Binary model snapshots: save a Gurobi model as CSR arrays and rebuild it through the matrix API.
+"""
+
+import gurobipy as grb
+import numpy as np
+import scipy.sparse as sp
+
+from environment import getEnv
+from io_utils import loadArrays, saveArrays
+
+SNAPSHOT_SUFFIX = ".npz"
+
+
+def saveSnapshot(model, filePath) -> None:
+    """
+    Save a (linear) Gurobi model to a binary snapshot file.
+
+    The snapshot holds the constraint matrix in CSR form, the objective, bounds, variable types,
+    senses, right-hand sides and names, as an uncompressed `.npz` file that can be memory-mapped.
+
+    Parameters
+    ----------
+    model : gurobipy.Model
+        The Gurobi model to be saved
+    filePath : str
+        The path to the `.npz` file
+    """
+    model.update()
+    variables = model.getVars()
+    constrs = model.getConstrs()
+    matrix = model.getA().tocsr()
+
+    saveArrays(filePath, {
+        "modelName": np.array(model.ModelName),
+        "modelSense": np.array(model.ModelSense),
+        "objCon": np.array(model.ObjCon),
+        "data": matrix.data,
+        "indices": matrix.indices,
+        "indptr": matrix.indptr,
+        "obj": np.asarray(model.getAttr("Obj", variables), dtype=float),
+        "lb": np.asarray(model.getAttr("LB", variables), dtype=float),
+        "ub": np.asarray(model.getAttr("UB", variables), dtype=float),
+        "vtype": np.array(model.getAttr("VType", variables), dtype="U1"),
+        "varNames": np.array(model.getAttr("VarName", variables), dtype=str),
+        "sense": np.array(model.getAttr("Sense", constrs), dtype="U1"),
+        "rhs": np.asarray(model.getAttr("RHS", constrs), dtype=float),
+        "constrNames": np.array(model.getAttr("ConstrName", constrs), dtype=str),
+    })
+
+
+def readSnapshot(filePath, mmap=True, env=None) -> grb.Model:
+    """
+    Load a Gurobi model from a binary snapshot file.
+
+    Parameters
+    ----------
+    filePath : str
+        The path to the `.npz` file
+    mmap : bool, optional
+        If True, memory-map the arrays instead of reading them into memory
+    env : gurobipy.Env, optional
+        The Gurobi environment to create the model in (default: the shared environment, `environment.getEnv()`)
+
+    Returns
+    -------
+    model : gurobipy.Model
+        The rebuilt Gurobi model
+    """
+    arrays = loadArrays(filePath, mmap=mmap)
+
+    numVars = arrays["obj"].size
+    numConstrs = arrays["rhs"].size
+    matrix = sp.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(numConstrs, numVars))
+
+    model = grb.Model(str(arrays["modelName"]), env=env if env is not None else getEnv())
+    x = model.addMVar(numVars,
+                      lb=arrays["lb"],
+                      ub=arrays["ub"],
+                      obj=arrays["obj"],
+                      vtype=arrays["vtype"],
+                      name=arrays["varNames"].tolist())
+    model.addMConstr(matrix, x, arrays["sense"], arrays["rhs"], name=arrays["constrNames"].tolist())
+    model.ModelSense = int(arrays["modelSense"])
+    model.ObjCon = float(arrays["objCon"])
+    model.update()
+
+    return model
@@ -0,0 +1,107 @@
+"""
+A lazy, name-indexed view of a solution vector.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class SolutionView(Mapping):
+    """
+    A read-only mapping from variable names to values, backed by one NumPy array.
+
+    The values are fetched in bulk up front. Variable names are only fetched from the model when
+    the view is iterated or looked up by name, and Python float objects are only created for the
+    entries actually looked up, so a large solution costs one array instead of a dict of a million
+    entries. The first lookup by name fetches all names in one bulk query and indexes their
+    positions; later lookups are dict lookups.
+
+    The model must stay alive (not disposed) while names are looked up.
+
+    The view covers every variable of the model: with `formulateModel(..., integer=True)` or lot
+    sizes, the `setup[...]` binaries follow the products, so `len(soln)` is then larger than
+    `instance.numProducts`; `productValues` returns the products only.
+
+    Attributes
+    ----------
+    array : numpy.ndarray
+        The values, in model variable order (not `values`, which is the `Mapping` method)
+    """
+
+    def __init__(self, model, array):
+        """
+        Parameters
+        ----------
+        model : gurobipy.Model
+            The model the values belong to, used to resolve names on demand
+        array : numpy.ndarray
+            The values, in model variable order
+        """
+        self._model = model
+        self._names = None
+        self._positions = None
+        self.array = array
+
+    @property
+    def names(self) -> list[str]:
+        """The variable names, in model variable order, fetched in bulk on first use."""
+        if self._names is None:
+            self._names = self._model.getAttr("VarName")
+        return self._names
+
+    def __getitem__(self, name) -> float:
+        if self._positions is None:
+            self._positions = {varName: j for j, varName in enumerate(self.names)}
+        return float(self.array[self._positions[name]])
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return self.array.size
+
+    def __repr__(self) -> str:
+        return f"SolutionView({self.array.size} variables, {np.count_nonzero(self.array)} nonzero)"
+
+    def productValues(self, instance) -> np.ndarray:
+        """
+        Return the values of the products only, without the setup binaries of an integer model.
+
+        Parameters
+        ----------
+        instance : ProductionInstance
+            The instance the model was formulated from; its products are the first variables
+
+        Returns
+        -------
+        values : numpy.ndarray, shape (n,)
+            The number of batches of each product, in product order
+        """
+        return self.array[:instance.numProducts]
+
+    def nonzero(self) -> dict[str, float]:
+        """
+        Return the nonzero entries, which is usually a small part of a large solution.
+
+        Returns
+        -------
+        soln : dict
+            - Keys: variable names
+            - Values: nonzero optimal decision variable values
+        """
+        indices = np.flatnonzero(self.array)
+        names = self.names
+        return {names[j]: value for j, value in zip(indices.tolist(), self.array[indices].tolist())}
+
+    def toDict(self) -> dict[str, float]:
+        """
+        Materialize the whole solution as a dict.
+
+        Returns
+        -------
+        soln : dict
+            - Keys: variable names
+            - Values: optimal decision variable values
+        """
+        return dict(zip(self.names, self.array.tolist()))
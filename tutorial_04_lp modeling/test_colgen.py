@@ -0,0 +1,46 @@
+"""
+Tests of column generation, run with `python -m pytest`.
+"""
+
+import gurobipy as grb
+import numpy as np
+import pytest
+
+from backend import GurobiBackend
+from colgen import solveColumnGeneration
+from generator import generateInstance
+
+
+@pytest.fixture(scope="module")
+def env():
+    env = grb.Env(params={"OutputFlag": 0})
+    yield env
+    env.dispose()
+
+
+@pytest.fixture(scope="module")
+def instance():
+    return generateInstance(2000, 50, 0.1, seed=1)
+
+
+def testConvergesToFullOptimum(env, instance):
+    result, history = solveColumnGeneration(instance, env=env)
+    full = GurobiBackend(env).solve(instance)
+
+    assert result.status == "OPTIMAL"
+    assert history[-1]["added"] == 0
+    assert result.objVal == pytest.approx(full.objVal, rel=1e-6)
+
+
+@pytest.mark.parametrize("maxRounds, maxColumnsPerRound", [(0, 100), (1, 100), (2, 5)])
+def testRoundLimitReturnsFeasibleMaster(env, instance, maxRounds, maxColumnsPerRound):
+    # The rounds run out while pricing still adds columns.
+    result, history = solveColumnGeneration(instance, maxColumnsPerRound=maxColumnsPerRound, maxRounds=maxRounds,
+                                            env=env)
+
+    assert result.status == "ITERATION_LIMIT"
+    assert len(history) == maxRounds
+    assert result.x.shape == (instance.numProducts,)
+    assert (instance.plantProductHours @ result.x <= instance.plantAvailableHours + 1e-6).all()
+    assert result.objVal == pytest.approx(instance.productProfits @ result.x, rel=1e-6)
+    assert np.all(result.x >= 0)